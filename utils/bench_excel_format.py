@@ -0,0 +1,110 @@
+import os
+import glob
+import json
+import time
+import argparse
+import pandas as pd
+
+import json_stream
+import excel_format
+
+# Fixtures checked into the repo (one JSON file per Matrixify sheet)
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "output_json")
+
+
+# Per-cell formatting used by the converters before excel_format existed
+def legacy_format_for_excel(df):
+    for col in df.columns:
+        if pd.api.types.is_bool_dtype(df[col]):
+            df[col] = df[col].replace({True: 'TRUE', False: 'FALSE'})
+        elif pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].apply(lambda x: f"{x:,.0f}" if pd.notna(x) and x == int(x) else f"{x:,.2f}")
+    return df
+
+
+def legacy_coerce_from_excel(df):
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            df[col] = df[col].apply(lambda x: True if x == 'TRUE' else (False if x == 'FALSE' else x))
+        elif pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].apply(lambda x: f"{int(x):,}" if pd.notna(x) and x == int(x) else f"{x:,.2f}")
+    return df
+
+
+# Function to give fixture columns real types, as a typed JSON export would have them
+def type_columns(df):
+    """
+    Fixtures store every value as text. Numeric-looking columns become numbers and
+    'True'/'False' columns become booleans so the benchmark exercises every formatter.
+    """
+    for col in df.columns:
+        values = df[col]
+        non_empty = values[values != ""]
+        if non_empty.empty:
+            continue
+        if non_empty.isin(["True", "False"]).all():
+            df[col] = values == "True"
+            continue
+        numbers = pd.to_numeric(values.replace("", None), errors="coerce")
+        if numbers[values != ""].notna().all():
+            df[col] = numbers
+    return df
+
+
+# Function to time a formatter over fresh copies of a DataFrame
+def time_formatter(formatter, df, runs):
+    best = None
+    for _ in range(runs):
+        frame = df.copy()
+        start = time.perf_counter()
+        formatter(frame)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# Function to benchmark one fixture file
+def bench_fixture(json_file, scale, runs):
+    try:
+        records = list(json_stream.iter_records(json_file))
+    except ValueError as e:
+        print(f"⚠️ Skipping {json_file}: {e}")
+        return None
+
+    df = type_columns(pd.DataFrame.from_records(records * scale))
+    text_df = pd.DataFrame.from_records(records * scale).astype(object)
+    rows = len(df)
+
+    result = {"section": os.path.splitext(os.path.basename(json_file))[0], "rows": rows, "columns": len(df.columns)}
+    for name, formatter, frame in (
+        ("to_excel_legacy", legacy_format_for_excel, df),
+        ("to_excel_vectorized", excel_format.format_for_excel, df),
+        ("from_excel_legacy", legacy_coerce_from_excel, text_df),
+        ("from_excel_vectorized", excel_format.coerce_from_excel, text_df),
+    ):
+        seconds = time_formatter(formatter, frame, runs)
+        result[f"{name}_rows_per_sec"] = round(rows / seconds) if seconds else None
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Excel column formatting on the output_json fixtures.")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="Directory of section JSON fixtures")
+    parser.add_argument("--scale", type=int, default=10, help="Repeat each fixture this many times")
+    parser.add_argument("--runs", type=int, default=3, help="Best-of runs per formatter")
+    parser.add_argument("--output", help="Optional path for the JSON results")
+    args = parser.parse_args()
+
+    results = []
+    for json_file in sorted(glob.glob(os.path.join(args.fixtures, "*.json"))):
+        result = bench_fixture(json_file, args.scale, args.runs)
+        if result:
+            results.append(result)
+            print(f"📊 {result['section']}: {result['rows']} rows | "
+                  f"to Excel {result['to_excel_legacy_rows_per_sec']:,} → {result['to_excel_vectorized_rows_per_sec']:,} rows/s | "
+                  f"from Excel {result['from_excel_legacy_rows_per_sec']:,} → {result['from_excel_vectorized_rows_per_sec']:,} rows/s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"✅ Results written to {args.output}")
@@ -0,0 +1,157 @@
+import io
+import os
+import sys
+import glob
+import json
+import time
+import platform
+import resource
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from datetime import datetime, timezone
+
+import json_diff
+import json_stream
+import pipeline
+import excel_import
+import synthetic_data
+import convertJSONToExcel_in_git
+
+STAGES = ("diff", "id_extraction", "change_extraction", "json_to_excel", "excel_to_json")
+
+
+# Function to run one stage and measure its wall time and Python heap peak
+def measure(name, function, *args, trace_memory=True, verbose=False):
+    """
+    The heap peak comes from tracemalloc and covers the main process only; stages that use
+    worker processes report those separately through the children's max RSS.
+
+    :return: (stage result, metrics dictionary)
+    """
+    if trace_memory:
+        tracemalloc.start()
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    start = time.perf_counter()
+    try:
+        with output:
+            result = function(*args)
+    finally:
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+
+    metrics = {"seconds": round(seconds, 4)}
+    if peak is not None:
+        metrics["python_peak_mb"] = round(peak / 2 ** 20, 2)
+    print(f"⏱️ {name}: {seconds:.2f}s" + (f", peak {metrics['python_peak_mb']} MB" if peak is not None else ""))
+    return result, metrics
+
+
+# Function to diff every generated section between base/ and head/
+def diff_dataset(dataset_dir):
+    diffs = {}
+    for head_file in sorted(glob.glob(os.path.join(dataset_dir, "head", "*.json"))):
+        section = os.path.splitext(os.path.basename(head_file))[0]
+        base_file = os.path.join(dataset_dir, "base", f"{section}.json")
+        diffs[section] = json_diff.diff_sections(
+            section, json_stream.iter_records(base_file), json_stream.iter_records(head_file)
+        )
+    return diffs
+
+
+# Function to find the workbook written by the JSON → Excel stage
+def latest_workbook(excel_dir):
+    return max(glob.glob(os.path.join(excel_dir, "*.xlsx")), key=os.path.getmtime)
+
+
+# Function to benchmark every stage at one scale
+def bench_scale(work_dir, scale, args, templates):
+    dataset_dir = os.path.join(work_dir, f"scale-{scale}")
+    sizes, generate_metrics = measure(
+        "generate", synthetic_data.write_dataset, dataset_dir, scale, args.change_rate, args.seed, templates,
+        trace_memory=False, verbose=args.verbose,
+    )
+    result = {
+        "scale": scale,
+        "rows": sum(head_rows for _, head_rows in sizes.values()),
+        "sections": {section: {"base_rows": base, "head_rows": head} for section, (base, head) in sizes.items()},
+        "stages": {"generate": generate_metrics},
+    }
+
+    ids_file = os.path.join(dataset_dir, "changed_ids.txt")
+    changes_dir = os.path.join(dataset_dir, "change-only-jsons")
+    excel_dir = os.path.join(dataset_dir, "excel")
+    json_dir = os.path.join(dataset_dir, "excel-json")
+    stage_calls = {
+        "diff": lambda: diff_dataset(dataset_dir),
+        "id_extraction": lambda: json_diff.write_changed_ids(diffs, ids_file),
+        "change_extraction": lambda: pipeline.extract_changes(diffs, changes_dir),
+        "json_to_excel": lambda: convertJSONToExcel_in_git.json_to_excel(
+            os.path.join(dataset_dir, "head"), excel_dir, None, args.excel_mode, args.workers
+        ),
+        "excel_to_json": lambda: excel_import.convert_workbook(
+            latest_workbook(excel_dir), json_dir, ["Export Summary"], args.workers
+        ),
+    }
+
+    diffs = None
+    for stage in args.stages:
+        if stage in ("id_extraction", "change_extraction") and diffs is None:
+            diffs = diff_dataset(dataset_dir)
+        if stage == "excel_to_json" and not glob.glob(os.path.join(excel_dir, "*.xlsx")):
+            stage_calls["json_to_excel"]()
+        output, metrics = measure(
+            f"{stage} (×{scale})", stage_calls[stage], trace_memory=not args.no_memory, verbose=args.verbose
+        )
+        if stage == "diff":
+            diffs = output
+            metrics["changed_ids"] = sum(len(section_diff.changed_ids) for section_diff in diffs.values())
+        result["stages"][stage] = metrics
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the sync pipeline on synthetic Matrixify data.")
+    parser.add_argument("--fixtures", default=synthetic_data.FIXTURE_DIR, help="Directory of section JSON templates")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100], help="Dataset sizes, in fixture multiples")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--change-rate", type=float, default=0.05, help="Share of entities changed between revisions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--excel-mode", choices=["pandas", "streaming"], default="pandas")
+    parser.add_argument("--workers", type=int, help="Worker processes for the Excel stages (default: all cores)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (faster, no heap peaks)")
+    parser.add_argument("--work-dir", help="Keep generated data here instead of a temporary directory")
+    parser.add_argument("--output", help="Optional path for the JSON results")
+    parser.add_argument("--verbose", action="store_true", help="Show the output of each stage")
+    args = parser.parse_args()
+
+    templates = synthetic_data.load_templates(args.fixtures)
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "change_rate": args.change_rate,
+        "excel_mode": args.excel_mode,
+        "results": [],
+    }
+
+    with (contextlib.nullcontext(args.work_dir) if args.work_dir else tempfile.TemporaryDirectory()) as work_dir:
+        for scale in args.scales:
+            print(f"\n🚀 Scale ×{scale}")
+            report["results"].append(bench_scale(work_dir, scale, args, templates))
+
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+    report["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * rss_unit / 2 ** 20, 2)
+    report["children_max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * rss_unit / 2 ** 20, 2)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        print(f"✅ Results written to {args.output}")
+    else:
+        print(json.dumps(report, indent=4))
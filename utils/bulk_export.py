@@ -0,0 +1,533 @@
+import os
+import json
+import asyncio
+import argparse
+import tempfile
+import urllib.request
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import entities
+import json_stream
+import instrumentation
+from shopify_graphql import API_VERSION, ShopifyGraphQLClient, GraphQLError
+
+# Store to export from; SHOPIFY_GRAPHQL_ENDPOINT points the exporter at a mock server instead
+SHOPIFY_STORE = os.getenv("SHOPIFY_STORE", "mb-stg.myshopify.com")
+
+# Matrixify writes most timestamps in the shop's time zone (Files stay in UTC)
+SHOP_TIMEZONE = os.getenv("SHOP_TIMEZONE", "UTC")
+
+# Seconds between bulk operation status checks
+POLL_INTERVAL = float(os.getenv("BULK_POLL_INTERVAL", "2"))
+
+# Section files whose column order and storage format re-exports keep (the output directory is
+# recreated before every export, so it has nothing to compare with)
+REPO_DIR = os.getenv("REPO_DIR", "../repo-shopify-data")
+
+# Oldest Admin API version with the `menus` connection
+MIN_API_VERSION = {"Menus": "2024-07"}
+
+BULK_RUN_MUTATION = """mutation RunBulkQuery($query: String!) {
+  bulkOperationRunQuery(query: $query) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}"""
+
+BULK_STATUS_QUERY = """query BulkOperationStatus($id: ID!) {
+  node(id: $id) { ... on BulkOperation { id status errorCode objectCount url } }
+}"""
+
+METAFIELDS = "metafields { edges { node { id namespace key type value } } }"
+MENU_ITEM = "id title type resourceId tags url"
+
+BULK_QUERIES = {
+    "Pages": f"""{{ pages {{ edges {{ node {{
+        id handle title body createdAt updatedAt isPublished publishedAt templateSuffix {METAFIELDS}
+    }} }} }} }}""",
+    "Redirects": """{ urlRedirects { edges { node { id path target } } } }""",
+    "Files": """{ files { edges { node {
+        id alt createdAt fileStatus fileErrors { message }
+        ... on MediaImage { mimeType image { url width height } }
+        ... on Video { duration originalSource { url mimeType width height } }
+        ... on GenericFile { url mimeType }
+    } } } }""",
+    "Menus": f"""{{ menus {{ edges {{ node {{
+        id handle title isDefault items {{ {MENU_ITEM} items {{ {MENU_ITEM} items {{ {MENU_ITEM} }} }} }}
+    }} }} }} }}""",
+    "Metaobjects": """{ metaobjectDefinitions { edges { node {
+        id type name
+        metaobjects { edges { node {
+            id handle displayName updatedAt capabilities { publishable { status } } fields { key type value }
+        } } }
+    } } } }""",
+    "Custom_Collections": f"""{{ collections(query: "collection_type:custom") {{ edges {{ node {{
+        id handle title descriptionHtml sortOrder templateSuffix updatedAt publishedOnCurrentPublication
+        image {{ url width height altText }}
+        products {{ edges {{ node {{ id handle }} }} }}
+        {METAFIELDS}
+    }} }} }} }}""",
+}
+
+# Columns of each section in the order Matrixify exports them; Metafield columns follow
+SECTION_COLUMNS = {
+    "Pages": [
+        "ID", "Handle", "Command", "Title", "Author", "Body HTML", "Created At", "Updated At", "Published",
+        "Published At", "Template Suffix",
+    ],
+    "Redirects": ["ID", "Path", "Command", "Target"],
+    "Files": [
+        "ID", "File Name", "Command", "Link", "Alt Text", "Created At", "Type", "Mime Type", "Width", "Height",
+        "Duration", "Status", "Errors",
+    ],
+    "Menus": [
+        "ID", "Handle", "Command", "Title", "Is Default", "Top Row", "Row #", "Menu Item: ID", "Menu Item: Title",
+        "Menu Item: Command", "Menu Item: Resource Type", "Menu Item: Resource ID", "Menu Item: Resource Handle",
+        "Menu Item: Collection Tags", "Menu Item: URL", "Menu Item: Parent ID", "Menu Item: Parent Title",
+        "Menu Item: Position",
+    ],
+    "Metaobjects": [
+        "ID", "Handle", "Command", "Display Name", "Status", "Updated At", "Definition: Handle", "Definition: Name",
+        "Top Row", "Row #", "Field", "Value",
+    ],
+    "Custom_Collections": [
+        "ID", "Handle", "Command", "Title", "Body HTML", "Sort Order", "Template Suffix", "Updated At", "Published",
+        "Published At", "Published Scope", "Image Src", "Image Width", "Image Height", "Image Alt Text", "Row #",
+        "Top Row", "Product: ID", "Product: Handle", "Product: Position", "Product: Command",
+    ],
+}
+
+# Sections other sections refer to are exported first, so references to objects they add resolve
+EXPORT_ORDER = ["Files", "Metaobjects", "Pages", "Custom_Collections", "Menus", "Redirects"]
+
+# GID type -> section of the objects it refers to
+REFERENCE_TARGETS = {
+    "MediaImage": "Files", "GenericFile": "Files", "Video": "Files",
+    "Metaobject": "Metaobjects", "Page": "Pages", "Collection": "Custom_Collections",
+}
+
+SORT_ORDERS = {
+    "ALPHA_ASC": "Alphabet", "ALPHA_DESC": "Alphabet Descending", "BEST_SELLING": "Best Selling",
+    "CREATED": "Created", "CREATED_DESC": "Created Descending", "MANUAL": "Manual",
+    "PRICE_ASC": "Price", "PRICE_DESC": "Price Descending",
+}
+
+
+# Function to get the numeric part of a Shopify gid
+def numeric_id(gid):
+    return gid.rsplit("/", 1)[-1] if gid else ""
+
+
+# Function to format an ISO timestamp the way Matrixify does ("2024-09-30 14:54:55 -0700")
+def format_time(value, zone=None):
+    if not value:
+        return ""
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return moment.astimezone(zone or ZoneInfo(SHOP_TIMEZONE)).strftime("%Y-%m-%d %H:%M:%S %z")
+
+
+# Function to format a boolean as the text the Excel converter produces
+def bool_text(value, false_text="False"):
+    return "True" if value else false_text
+
+
+# Function to convert an enum like "READY" to "Ready"
+def enum_text(value):
+    return value.replace("_", " ").title() if value else ""
+
+
+# Function to convert milliseconds to "HH:MM:SS"
+def format_duration(milliseconds):
+    if milliseconds in (None, ""):
+        return ""
+    seconds = int(milliseconds) // 1000
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def text(value):
+    return "" if value is None else str(value)
+
+
+class ReferenceResolver:
+    """
+    The Admin API returns references as GIDs and lists as JSON arrays; Matrixify writes file
+    names, "definition.handle" for metaobjects, handles for pages and collections, and joins
+    lists with ", ". GIDs are resolved from the current section files and from the rows of this
+    export; a GID nothing resolves (e.g. products, which are not exported) is written as it is.
+    """
+
+    def __init__(self):
+        self.names = {}  # gid -> text Matrixify writes for a reference to it
+
+    def add(self, section, row):
+        # Rows of a multi-row entity repeat its ID and handle
+        if row.get("ID") in (None, ""):
+            return
+        if section == "Files":
+            self.names[row["ID"]] = row.get("File Name", "")
+        elif section == "Metaobjects":
+            self.names[f"gid://shopify/Metaobject/{row['ID']}"] = f"{row.get('Definition: Handle', '')}.{row.get('Handle', '')}"
+        elif section in ("Pages", "Custom_Collections"):
+            gid_type = "Page" if section == "Pages" else "Collection"
+            self.names[f"gid://shopify/{gid_type}/{row['ID']}"] = row.get("Handle", "")
+
+    def load(self, repo_dir):
+        """Index the objects of the current section files."""
+        for section in set(REFERENCE_TARGETS.values()):
+            file_path = os.path.join(repo_dir, f"{section}.json")
+            try:
+                for entity in entities.iter_entities(json_stream.iter_records(file_path)):
+                    self.add(section, entity.rows[0])
+            except ValueError as e:
+                print(f"⚠️ {file_path}: not valid JSON ({e}), its references stay GIDs")
+        return self
+
+    def track(self, section, rows):
+        """Pass rows through, indexing them for the sections exported after this one."""
+        for row in rows:
+            self.add(section, row)
+            yield row
+
+    def name(self, gid):
+        return self.names.get(gid, gid)
+
+    def format(self, value_type, value):
+        """
+        :param value_type: Metafield or metaobject field type (e.g. "list.metaobject_reference")
+        :return: Value as Matrixify writes it
+        """
+        value = text(value)
+        if not value_type or not value:
+            return value
+        base_type = value_type.removeprefix("list.")
+        if base_type == value_type:
+            return self.name(value) if base_type.endswith("_reference") else value
+        try:
+            items = json.loads(value)
+        except ValueError:
+            return value
+        if not isinstance(items, list):
+            return value
+        if base_type.endswith("_reference"):
+            items = [self.name(text(item)) for item in items]
+        return ", ".join(text(item) for item in items)
+
+
+# Function to name the Matrixify column of a metafield
+def metafield_column(metafield):
+    # SEO fields live in the "global" namespace and are exported without it, as [string]
+    if metafield["namespace"] == "global":
+        return f"Metafield: {metafield['key']} [string]"
+    return f"Metafield: {metafield['namespace']}.{metafield['key']} [{metafield['type']}]"
+
+
+# Function to attach child lines (nested connections) to their top-level object
+def group_children(lines):
+    """
+    Bulk JSONL is flat: nested connection nodes follow their parent on their own lines with a
+    "__parentId". Only one top-level object and its children are held at a time.
+
+    :return: Generator of (parent, list of children)
+    """
+    parent = None
+    children = []
+    for line in lines:
+        if "__parentId" in line and parent is not None:
+            children.append(line)
+            continue
+        if parent is not None:
+            yield parent, children
+        parent, children = line, []
+    if parent is not None:
+        yield parent, children
+
+
+def is_metafield(node):
+    return "/Metafield/" in node.get("id", "")
+
+
+def page_rows(lines, resolver=None):
+    resolver = resolver or ReferenceResolver()
+    for page, children in group_children(lines):
+        row = {
+            "ID": numeric_id(page["id"]),
+            "Handle": page.get("handle"),
+            "Command": "MERGE",
+            "Title": text(page.get("title")),
+            "Author": "",  # Not exposed by the Admin GraphQL API
+            "Body HTML": text(page.get("body")),
+            "Created At": format_time(page.get("createdAt")),
+            "Updated At": format_time(page.get("updatedAt")),
+            "Published": bool_text(page.get("isPublished")),
+            "Published At": format_time(page.get("publishedAt")),
+            "Template Suffix": text(page.get("templateSuffix")),
+        }
+        for metafield in filter(is_metafield, children):
+            row[metafield_column(metafield)] = resolver.format(metafield.get("type"), metafield.get("value"))
+        yield row
+
+
+def redirect_rows(lines, resolver=None):
+    for redirect in lines:
+        yield {"ID": numeric_id(redirect["id"]), "Path": redirect["path"], "Command": "MERGE", "Target": redirect["target"]}
+
+
+def file_rows(lines, resolver=None):
+    for file in lines:
+        source = file.get("image") or file.get("originalSource") or {}
+        url = source.get("url") or file.get("url") or ""
+        file_type = "IMAGE" if "/MediaImage/" in file["id"] else "VIDEO" if "/Video/" in file["id"] else "FILE"
+        yield {
+            "ID": file["id"],
+            "File Name": url.split("?", 1)[0].rsplit("/", 1)[-1],
+            "Command": "MERGE",
+            "Link": url,
+            "Alt Text": text(file.get("alt")),
+            "Created At": format_time(file.get("createdAt"), timezone.utc),
+            "Type": file_type,
+            "Mime Type": text(file.get("mimeType") or source.get("mimeType")),
+            "Width": text(source.get("width")),
+            "Height": text(source.get("height")),
+            "Duration": format_duration(file.get("duration")),
+            "Status": enum_text(file.get("fileStatus")),
+            "Errors": "; ".join(error["message"] for error in file.get("fileErrors") or []),
+        }
+
+
+def menu_rows(lines, resolver=None):
+    resolver = resolver or ReferenceResolver()
+    row_number = 0
+    for menu in lines:
+        # Depth-first, so nested items follow their parent like in the Matrixify sheet
+        stack = [(item, position, None) for position, item in reversed(list(enumerate(menu.get("items") or [], 1)))]
+        top_row = True
+        while stack:
+            item, position, parent = stack.pop()
+            row_number += 1
+            yield {
+                "ID": numeric_id(menu["id"]),
+                "Handle": menu["handle"],
+                "Command": "MERGE",
+                "Title": menu["title"],
+                "Is Default": bool_text(menu.get("isDefault"), ""),
+                "Top Row": bool_text(top_row, ""),
+                "Row #": str(row_number),
+                "Menu Item: ID": numeric_id(item["id"]),
+                "Menu Item: Title": text(item.get("title")),
+                "Menu Item: Command": "MERGE",
+                "Menu Item: Resource Type": text(item.get("type")),
+                "Menu Item: Resource ID": numeric_id(item.get("resourceId")),
+                "Menu Item: Resource Handle": resolver.names.get(item.get("resourceId"), "") if item.get("type") in ("PAGE", "COLLECTION") else "",
+                "Menu Item: Collection Tags": ", ".join(item.get("tags") or []),
+                "Menu Item: URL": text(item.get("url")),
+                "Menu Item: Parent ID": numeric_id(parent["id"]) if parent else "",
+                "Menu Item: Parent Title": text(parent.get("title")) if parent else "",
+                "Menu Item: Position": str(position),
+            }
+            top_row = False
+            children = item.get("items") or []
+            stack.extend((child, child_position, item) for child_position, child in reversed(list(enumerate(children, 1))))
+
+
+def metaobject_rows(lines, resolver=None):
+    resolver = resolver or ReferenceResolver()
+    definitions = {}
+    row_number = 0
+    for line in lines:
+        if "__parentId" not in line:
+            definitions[line["id"]] = line
+            continue
+        definition = definitions.get(line["__parentId"], {})
+        publishable = (line.get("capabilities") or {}).get("publishable") or {}
+        for position, field in enumerate(line.get("fields") or []):
+            row_number += 1
+            yield {
+                "ID": numeric_id(line["id"]),
+                "Handle": line["handle"],
+                "Command": "MERGE",
+                "Display Name": text(line.get("displayName")),
+                "Status": enum_text(publishable.get("status")),
+                "Updated At": format_time(line.get("updatedAt")),
+                "Definition: Handle": definition.get("type", ""),
+                "Definition: Name": definition.get("name", ""),
+                "Top Row": bool_text(position == 0, ""),
+                "Row #": str(row_number),
+                "Field": field["key"],
+                "Value": resolver.format(field.get("type"), field.get("value")),
+            }
+
+
+def collection_rows(lines, resolver=None):
+    resolver = resolver or ReferenceResolver()
+    row_number = 0
+    for collection, children in group_children(lines):
+        image = collection.get("image") or {}
+        manual = collection.get("sortOrder") == "MANUAL"
+        common = {
+            "ID": numeric_id(collection["id"]),
+            "Handle": collection["handle"],
+            "Command": "MERGE",
+            "Title": text(collection.get("title")),
+            "Sort Order": SORT_ORDERS.get(collection.get("sortOrder"), enum_text(collection.get("sortOrder"))),
+            "Updated At": format_time(collection.get("updatedAt")),
+            # Publication date and scope have no Admin GraphQL field; Matrixify-only columns stay empty
+            "Published": bool_text(collection.get("publishedOnCurrentPublication")),
+            "Published At": "",
+            "Published Scope": "",
+        }
+        # Like Matrixify, body, template, image and metafields are only written on the top row
+        top_only = {
+            "Body HTML": text(collection.get("descriptionHtml")),
+            "Template Suffix": text(collection.get("templateSuffix")),
+            "Image Src": text(image.get("url")),
+            "Image Width": text(image.get("width")),
+            "Image Height": text(image.get("height")),
+            "Image Alt Text": text(image.get("altText")),
+        }
+        for metafield in filter(is_metafield, children):
+            top_only[metafield_column(metafield)] = resolver.format(metafield.get("type"), metafield.get("value"))
+
+        products = [child for child in children if not is_metafield(child)] or [None]
+        for position, product in enumerate(products, 1):
+            row_number += 1
+            row = dict(common, **(top_only if position == 1 else {}))
+            row.update({
+                "Row #": str(row_number),
+                "Top Row": bool_text(position == 1, ""),
+                "Product: ID": numeric_id(product["id"]) if product else "",
+                "Product: Handle": product["handle"] if product else "",
+                "Product: Position": str(position) if product and manual else "",
+                "Product: Command": "MERGE" if product else "",
+            })
+            yield row
+
+
+ROW_BUILDERS = {
+    "Pages": page_rows,
+    "Redirects": redirect_rows,
+    "Files": file_rows,
+    "Menus": menu_rows,
+    "Metaobjects": metaobject_rows,
+    "Custom_Collections": collection_rows,
+}
+
+
+# Function to stream the lines of a bulk operation result
+def iter_jsonl(url):
+    with urllib.request.urlopen(url) as response:
+        for line in response:
+            if line.strip():
+                yield json.loads(line)
+
+
+# Function to read the columns of an existing section file (its first record)
+def existing_columns(file_path):
+    try:
+        first = next(iter(json_stream.iter_records(file_path)), None)
+    except ValueError:
+        return []
+    return list(first) if first else []
+
+
+# Function to write section rows with one column set for every record
+def write_section(file_path, rows, base_columns, reference_path=None):
+    """
+    Metafield columns are only known once every row has been seen, so rows are spilled to a
+    temporary JSONL file first and then written with the full column set. Columns of the existing
+    section file are kept in their position (even when now empty), so re-exports produce small git diffs.
+
+    :param reference_path: Existing section file to take column order and storage format from
+        (default: file_path itself)
+    :return: Number of rows written
+    """
+    reference_path = reference_path or file_path
+    extra_columns = {}
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.TemporaryFile("w+", encoding="utf-8", dir=directory) as spill:
+        for row in rows:
+            for column in row:
+                if column not in extra_columns and column not in base_columns:
+                    extra_columns[column] = None
+            spill.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+        known = [column for column in existing_columns(reference_path) if column not in base_columns]
+        columns = list(base_columns) + known + [column for column in extra_columns if column not in known]
+
+        spill.seek(0)
+        temp_path = f"{file_path}.tmp"
+        records = ({column: row.get(column, "") for column in columns} for row in map(json.loads, spill))
+        count = json_stream.write_records(temp_path, records, storage_format=json_stream.output_format(reference_path))
+    os.replace(temp_path, file_path)
+    return count
+
+
+# Function to run a bulk query and wait for its result
+async def run_bulk_query(client, query, poll_interval=POLL_INTERVAL):
+    """
+    :return: URL of the JSONL result, or None when the query matched no objects
+    :raises GraphQLError: If the operation cannot start or does not complete
+    """
+    data = await client.execute(BULK_RUN_MUTATION, {"query": query})
+    result = data["bulkOperationRunQuery"]
+    if result["userErrors"]:
+        raise GraphQLError(result["userErrors"])
+    operation_id = result["bulkOperation"]["id"]
+
+    while True:
+        operation = (await client.execute(BULK_STATUS_QUERY, {"id": operation_id}))["node"]
+        if operation["status"] == "COMPLETED":
+            return operation.get("url")
+        if operation["status"] in ("FAILED", "CANCELED", "EXPIRED"):
+            raise GraphQLError([{"message": f"Bulk operation {operation_id} {operation['status']}: {operation.get('errorCode')}"}])
+        await asyncio.sleep(poll_interval)
+
+
+# Function to export sections straight from the Admin API into section JSON files
+async def export_sections(client, sections, output_dir, poll_interval=POLL_INTERVAL, repo_dir=REPO_DIR,
+                          api_version=API_VERSION):
+    """
+    Shopify runs one bulk query per shop at a time, so sections are exported one after another.
+
+    :param repo_dir: Directory of the current section files (column order, storage format, references)
+    :return: Dictionary of section -> number of rows written
+    """
+    exported = {}
+    resolver = ReferenceResolver().load(repo_dir)
+    for section in sorted(sections, key=EXPORT_ORDER.index):
+        if api_version < MIN_API_VERSION.get(section, api_version):
+            print(f"⚠️ Skipping {section}: it needs Admin API {MIN_API_VERSION[section]} or newer "
+                  f"(SHOPIFY_API_VERSION={api_version})")
+            continue
+        with instrumentation.stage(f"bulk_export/{section}"):
+            print(f"🚀 Running bulk export for {section}...")
+            url = await run_bulk_query(client, BULK_QUERIES[section], poll_interval)
+            lines = iter_jsonl(url) if url else iter(())
+            output_file_path = os.path.join(output_dir, f"{section}.json")
+            reference_path = os.path.join(repo_dir, f"{section}.json")
+            rows = resolver.track(section, ROW_BUILDERS[section](lines, resolver))
+            exported[section] = write_section(output_file_path, rows, SECTION_COLUMNS[section], reference_path)
+            instrumentation.count("rows_exported", exported[section], section)
+            print(f"✅ {section}: {exported[section]} rows written to {output_file_path}")
+    return exported
+
+
+async def main(args):
+    async with ShopifyGraphQLClient(
+        SHOPIFY_STORE, os.getenv("SHOPIFY_ACCESS_TOKEN"), endpoint=os.getenv("SHOPIFY_GRAPHQL_ENDPOINT"), max_connections=1
+    ) as client:
+        await export_sections(client, args.sections, args.output_dir, args.poll_interval, args.repo_dir)
+
+    # Same marker the Excel conversion writes, so createPR.py and run_scripts.sh work unchanged
+    with open(os.path.join(args.output_dir, "convert.json.completed"), "w") as f:
+        f.write("Conversion complete.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export sections with Shopify bulk operations instead of Matrixify.")
+    parser.add_argument("--sections", nargs="+", choices=list(BULK_QUERIES), default=list(BULK_QUERIES))
+    parser.add_argument("--output-dir", default="../output_json", help="Directory for the <Section>.json files")
+    parser.add_argument("--repo-dir", default=REPO_DIR, help="Current section files, whose column order is kept")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,212 @@
+import os
+import json
+import hashlib
+import subprocess
+
+import entities
+import json_diff
+import json_stream
+import fingerprints
+import references
+import instrumentation
+
+# Bump when the state layout or fingerprint normalization changes, forcing a full rebuild
+STATE_VERSION = 2
+
+
+# Function to get a cheap signature of every section file at a revision
+def revision_signatures(repo_dir, rev):
+    """
+    Blob IDs for the git index and commits (one git call for all sections), and
+    mtime/size for the working tree. A section only needs re-reading when its signature changes.
+
+    :return: Dictionary of section -> signature
+    """
+    signatures = {}
+    if rev is json_diff.WORKTREE:
+        for file_path in json_diff.list_section_files(repo_dir, rev):
+            stat = os.stat(file_path)
+            signatures[section_name(file_path)] = f"{stat.st_mtime_ns}:{stat.st_size}"
+        return signatures
+
+    if rev == json_diff.INDEX:
+        command = ["git", "ls-files", "-s", "--", os.path.join(repo_dir, "")]
+    else:
+        command = ["git", "ls-tree", rev, "--", os.path.join(repo_dir, "")]
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    for line in result.stdout.splitlines():
+        info, file_path = line.split("\t", 1)
+        if file_path.endswith(".json"):
+            # ls-files: "<mode> <blob> <stage>", ls-tree: "<mode> blob <blob>"
+            fields = info.split()
+            signatures[section_name(file_path)] = fields[1] if rev == json_diff.INDEX else fields[2]
+    return signatures
+
+
+# Function to hash an output file (None when it does not exist)
+def output_digest(file_path):
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# Function to get the section name of a file path
+def section_name(file_path):
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+
+# Function to resolve a revision to a commit SHA (None for the working tree or index)
+def resolve_commit(rev):
+    if rev in (json_diff.WORKTREE, json_diff.INDEX):
+        rev = "HEAD"
+    result = subprocess.run(["git", "rev-parse", "--verify", "--quiet", rev], capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+# Function to get a section's fingerprints, from its sidecar index when it is fresh
+def load_fingerprints(file_path, rev, signature):
+    """
+    The sidecar index is trusted only if it was built from the same JSON blob, so a lookup
+    replaces parsing the whole section; otherwise the section is parsed and fingerprinted.
+    """
+    blob_id = signature
+    if rev is json_diff.WORKTREE:
+        blob_id = fingerprints.git_blob_id(file_path) if os.path.exists(file_path) else None
+    indexed = fingerprints.fresh_index(file_path, blob_id, rev) if blob_id else None
+    if indexed is not None:
+        return indexed
+    return fingerprints.section_fingerprints(json_diff.iter_revision(file_path, rev))
+
+
+# Function to load the state of the previous run
+def load_state(state_path, base_rev, head_rev):
+    """
+    :return: The saved state, or a fresh one when missing, outdated or recorded for other revisions
+    """
+    fresh = {"version": STATE_VERSION, "base": base_rev, "head": head_rev, "commit": None, "sections": {}}
+    if not os.path.exists(state_path):
+        return fresh
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except ValueError:
+        print(f"⚠️ Ignoring unreadable state file {state_path}")
+        return fresh
+    if state.get("version") != STATE_VERSION or state.get("base") != base_rev or state.get("head") != head_rev:
+        return fresh
+    return state
+
+
+# Function to save the state atomically
+def save_state(state_path, state):
+    os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(temp_path, state_path)
+
+
+# Function to extract changes, re-reading only sections whose base or head changed since the last run
+def run_incremental(repo_dir, output_dir, changed_ids_file, base_rev, head_rev, state_path, only_sections=None,
+                    include_referrers=False):
+    """
+    Incremental equivalent of diff → changed_ids.txt → change-only JSON extraction. The state
+    file records the last processed commit, each section's base/head signatures and their
+    per-entity fingerprints.
+
+    :param only_sections: Optional list of section names to limit the run to
+    :param include_referrers: Also extract unchanged records referring to changed ones (see references.py)
+    :return: Dictionary of section -> list of changed IDs
+    """
+    state = load_state(state_path, base_rev, head_rev)
+    base_signatures = revision_signatures(repo_dir, base_rev)
+    head_signatures = revision_signatures(repo_dir, head_rev)
+    sections = sorted(set(base_signatures) | set(head_signatures))
+    if only_sections is not None:
+        sections = [section for section in sections if section in only_sections]
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Without a usable state nothing in the output directory can be trusted
+    if not state["sections"]:
+        for file_path in json_diff.list_section_files(output_dir):
+            os.remove(file_path)
+
+    # Sections that no longer exist at either revision
+    for section in set(state["sections"]) - set(sections):
+        del state["sections"][section]
+        output_file_path = os.path.join(output_dir, f"{section}.json")
+        if os.path.exists(output_file_path):
+            os.remove(output_file_path)
+
+    # First pass: changed IDs of every section whose base or head changed
+    recomputed = set()
+    for section in sections:
+        saved = state["sections"].get(section, {})
+        base_changed = saved.get("base_signature") != base_signatures.get(section)
+        head_changed = saved.get("head_signature") != head_signatures.get(section)
+        if saved and not (base_changed or head_changed):
+            continue
+
+        file_path = os.path.join(repo_dir, f"{section}.json")
+        # Stored as [key, fingerprint] pairs: JSON object keys would turn the keyless entity's None into "null"
+        base_fingerprints = dict(saved.get("base_fingerprints", ()))
+        if base_changed or not saved:
+            base_fingerprints = load_fingerprints(file_path, base_rev, base_signatures.get(section))
+        head_fingerprints = dict(saved.get("head_fingerprints", ()))
+        if head_changed or not saved:
+            head_fingerprints = load_fingerprints(file_path, head_rev, head_signatures.get(section))
+
+        added, modified, removed = fingerprints.compare_fingerprints(base_fingerprints, head_fingerprints)
+        for name, keys in (("added", added), ("modified", modified), ("removed", removed)):
+            instrumentation.count(name, len(keys), section)
+        print(f"🔍 {section}: {len(added)} added, {len(modified)} modified, {len(removed)} removed")
+
+        state["sections"][section] = dict(
+            saved,
+            base_signature=base_signatures.get(section),
+            head_signature=head_signatures.get(section),
+            base_fingerprints=list(base_fingerprints.items()),
+            head_fingerprints=list(head_fingerprints.items()),
+            changed_ids=sorted(added + modified, key=entities.order_key),
+        )
+        recomputed.add(section)
+
+    changed = {section: saved["changed_ids"] for section, saved in state["sections"].items() if saved["changed_ids"]}
+    referrers = {}
+    if include_referrers and changed:
+        blob_ids = None if head_rev is json_diff.WORKTREE else head_signatures
+        referrers = references.referrer_ids(repo_dir, changed, head_rev, blob_ids)
+
+    # Second pass: rewrite only the change-only files whose content is out of date
+    for section in sections:
+        saved = state["sections"][section]
+        output_file_path = os.path.join(output_dir, f"{section}.json")
+        referrer_keys = referrers.get(section, [])
+        # Change-only files edited or lost since the last run (e.g. a failed push) are rebuilt too
+        output_changed = saved.get("output_digest") != output_digest(output_file_path)
+        if section not in recomputed and not output_changed and saved.get("referrer_ids", []) == referrer_keys:
+            print(f"⏭️ {section}: unchanged since commit {state['commit']}")
+            instrumentation.count("sections_skipped")
+            continue
+
+        extract_ids = set(saved["changed_ids"]) | set(referrer_keys)
+        if extract_ids:
+            file_path = os.path.join(repo_dir, f"{section}.json")
+            rows = entities.select_rows(json_diff.iter_revision(file_path, head_rev), extract_ids)
+            count = json_stream.write_records(output_file_path, rows)
+            instrumentation.count("rows_extracted", count, section)
+            print(f"✅ {section}: {len(saved['changed_ids'])} changed, {len(referrer_keys)} referrers → {count} blocks")
+        else:
+            if os.path.exists(output_file_path):
+                os.remove(output_file_path)
+            print(f"✅ {section}: no changed records")
+
+        saved["referrer_ids"] = referrer_keys
+        saved["output_digest"] = output_digest(output_file_path)
+
+    json_diff.write_id_lists(changed, changed_ids_file)
+
+    state["commit"] = resolve_commit(head_rev)
+    save_state(state_path, state)
+    return changed
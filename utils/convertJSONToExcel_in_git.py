@@ -1,11 +1,54 @@
-import json
 import os
 import glob
 import pandas as pd
 from datetime import datetime
 
+import section_mirror
+import excel_format
+import streaming_excel
+import instrumentation
+import metafield_validation
+from section_cache import SectionCache
+
+# Bump whenever the sheet formatting below changes, so cached sheets are rebuilt
+CONVERTER_VERSION = "1"
+
+# "streaming" prepares sheets in a process pool and writes them with xlsxwriter's constant_memory mode
+EXCEL_WRITER_MODE = os.getenv("EXCEL_WRITER_MODE", "pandas")
+EXCEL_WORKERS = int(os.getenv("EXCEL_WORKERS", "0")) or None
+
+# Sections that metafield references must exist in
+REFERENCE_DIR = "repo-shopify-data"
+
+# Function to load a JSON file and format it as an Excel-ready DataFrame
+def prepare_sheet(json_file):
+    # Load through the section's Parquet mirror (rebuilt when the JSON changes), or stream the JSON
+    df = section_mirror.load_dataframe(json_file)
+
+    # Format booleans and numbers column by column (vectorized)
+    excel_format.format_for_excel(df)
+
+    return df
+
+# Function to check the typed metafield values of a sheet before Matrixify sees them
+def validate_sheet(json_file, columns):
+    """
+    Runs on every conversion, also for sheets reused from the cache, since a referenced
+    page or metaobject can be deleted without the section itself changing.
+    METAFIELD_VALIDATION=strict fails here.
+
+    :param columns: Column names of the sheet
+    """
+    checked = [column for column, _, _ in metafield_validation.compile_checks(tuple(columns))]
+    if metafield_validation.VALIDATION_MODE == "off" or not checked:
+        return
+    # Unformatted values of the metafield columns only (read column-wise from the Parquet mirror)
+    df = section_mirror.load_dataframe(json_file, columns=checked)
+    section = os.path.splitext(os.path.basename(json_file))[0]
+    metafield_validation.enforce(metafield_validation.validate_frame(df, section, REFERENCE_DIR), json_file)
+
 # Function to convert JSON files from a directory into an Excel file
-def json_to_excel(json_dir, output_folder):
+def json_to_excel(json_dir, output_folder, cache=None, mode=EXCEL_WRITER_MODE, workers=EXCEL_WORKERS):
     print(f"🔍 Searching for JSON files in: {os.path.abspath(json_dir)}")
 
     # Get all JSON files recursively
@@ -23,27 +66,32 @@ def json_to_excel(json_dir, output_folder):
     output_excel_file = os.path.join(output_folder, f'Export_{current_time}.xlsx')
 
     print(f"📄 Processing {len(json_files)} JSON files in {json_dir}...")
+    hits, misses = (cache.hits, cache.misses) if cache else (0, 0)
+
+    if mode == "streaming":
+        row_counts = streaming_excel.write_workbook(json_files, output_excel_file, prepare_sheet, workers, cache,
+                                                    validate_sheet)
+        for sheet_name, row_count in row_counts.items():
+            instrumentation.count("rows_exported", row_count, sheet_name)
+        print(f"🎉 Excel file created: {output_excel_file}")
+        return output_excel_file
 
     # Create an Excel writer object
     with pd.ExcelWriter(output_excel_file, engine='xlsxwriter') as writer:
         for json_file in json_files:
             sheet_name = os.path.splitext(os.path.basename(json_file))[0][:31]
 
-            with open(json_file, 'r') as f:
-                json_data = json.load(f)
-
             print(f"✅ Processing file: {json_file}")
 
-            df = pd.DataFrame(json_data)
-
-            for col in df.columns:
-                if pd.api.types.is_bool_dtype(df[col]):
-                    df[col] = df[col].replace({True: 'TRUE', False: 'FALSE'})
-                elif pd.api.types.is_numeric_dtype(df[col]):
-                    df[col] = df[col].apply(lambda x: f"{x:,.0f}" if pd.notna(x) and x == int(x) else f"{x:,.2f}")
+            # Reuse the formatted sheet when the section file is unchanged since the last run
+            df = cache.get_or_build(json_file, prepare_sheet) if cache else prepare_sheet(json_file)
+            validate_sheet(json_file, df.columns)
 
             df.to_excel(writer, sheet_name=sheet_name, index=False)
+            instrumentation.count("rows_exported", len(df), sheet_name)
 
+    if cache:
+        print(f"🗃️ Sheet cache: {cache.hits - hits} reused, {cache.misses - misses} regenerated")
     print(f"🎉 Excel file created: {output_excel_file}")
 
     return output_excel_file  # Return the file path for GitHub workflow commit
@@ -54,18 +102,25 @@ folder_mappings = {
     "changes/change-only-jsons": "changes/change-only-excel"
 }
 
-# Generate Excel files
-generated_files = []
-for json_dir, output_dir in folder_mappings.items():
-    print(f"\n🚀 Processing directory: {json_dir} → {output_dir}")
-    excel_file = json_to_excel(json_dir, output_dir)
-    if excel_file:
-        generated_files.append(excel_file)
-
-# ✅ Print generated file paths for workflow use
-if generated_files:
-    print("\n📂 Generated Excel files:")
-    for file in generated_files:
-        print(f" - {file}")
-
-print("\n🎯 JSON to Excel conversion completed successfully!")
+# Function to convert every mapped JSON directory and return the generated Excel files
+def convert_all(mappings=folder_mappings, cache=None, mode=EXCEL_WRITER_MODE, workers=EXCEL_WORKERS):
+    generated_files = []
+    for json_dir, output_dir in mappings.items():
+        print(f"\n🚀 Processing directory: {json_dir} → {output_dir}")
+        with instrumentation.stage(os.path.basename(json_dir)):
+            excel_file = json_to_excel(json_dir, output_dir, cache, mode, workers)
+        if excel_file:
+            generated_files.append(excel_file)
+    return generated_files
+
+if __name__ == "__main__":
+    # Generate Excel files
+    generated_files = convert_all(cache=SectionCache(CONVERTER_VERSION))
+
+    # ✅ Print generated file paths for workflow use
+    if generated_files:
+        print("\n📂 Generated Excel files:")
+        for file in generated_files:
+            print(f" - {file}")
+
+    print("\n🎯 JSON to Excel conversion completed successfully!")
@@ -4,6 +4,10 @@ import os
 import glob
 from datetime import datetime
 
+import section_mirror
+import excel_format
+import metafield_validation
+
 # Function to convert JSON files from a directory into an Excel file
 def json_to_excel(json_dir, output_folder):
     """
@@ -31,19 +35,16 @@ def json_to_excel(json_dir, output_folder):
             # Extract the sheet name from the JSON file name
             sheet_name = os.path.splitext(os.path.basename(json_file))[0][:31]  # Excel sheet names max length = 31
 
-            # Load JSON data
-            with open(json_file, 'r') as f:
-                json_data = json.load(f)
+            # Load through the section's Parquet mirror (rebuilt when the JSON changes), or stream the JSON
+            df = section_mirror.load_dataframe(json_file)
 
-            # Convert JSON data to a DataFrame
-            df = pd.DataFrame(json_data)
+            # Check typed metafield values before Matrixify sees them (METAFIELD_VALIDATION=strict fails here)
+            if metafield_validation.VALIDATION_MODE != "off":
+                errors = metafield_validation.validate_frame(df, os.path.splitext(os.path.basename(json_file))[0], "../repo-shopify-data")
+                metafield_validation.enforce(errors, json_file)
 
-            # Convert True/False to 'TRUE'/'FALSE'
-            for col in df.columns:
-                if pd.api.types.is_bool_dtype(df[col]):
-                    df[col] = df[col].replace({True: 'TRUE', False: 'FALSE'})
-                elif pd.api.types.is_numeric_dtype(df[col]):
-                    df[col] = df[col].apply(lambda x: f"{x:,.0f}" if pd.notna(x) and x == int(x) else f"{x:,.2f}")
+            # Format booleans and numbers column by column (vectorized)
+            excel_format.format_for_excel(df)
 
             # Write DataFrame to the corresponding sheet
             df.to_excel(writer, sheet_name=sheet_name, index=False)
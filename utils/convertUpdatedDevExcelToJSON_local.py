@@ -1,84 +1,44 @@
-import pandas as pd
-import json
 import os
 import glob
 
-# Function to exclude specific sheets
-def exclude_sheet(sheet_name, excluded_sheets):
-    """
-    Check if the sheet name should be excluded based on a list of excluded sheets.
-    
-    :param sheet_name: Name of the sheet to check
-    :param excluded_sheets: List of sheet names to exclude
-    :return: Boolean, True if sheet is in the exclude list, False otherwise
-    """
-    return sheet_name in excluded_sheets
+import excel_import
+import instrumentation
 
-# Get the current working directory
-current_dir = os.getcwd()
-
-# Define the path to the `developer_export` folder
-developer_export_dir = os.path.join(current_dir, '../developer_updated_matrixify_export')
-
-# Find all .xlsx files in the developer_export directory
-xlsx_files = glob.glob(os.path.join(developer_export_dir, '*.xlsx'))
+# Define sheets to exclude (e.g., Export Summary)
+excluded_sheets = ["Export Summary"]
 
-# Check if there is exactly one .xlsx file in the directory
-if len(xlsx_files) != 1:
-    raise ValueError("There should be exactly one .xlsx file in the developer_updated_matrixify_export directory.")
+# Define the output directory for JSON files
+output_dir = "../output_json"
 
-# Use the found .xlsx file
-file_path = xlsx_files[0]
+# Worker processes used to convert sheets in parallel (default: all cores)
+workers = int(os.getenv("EXCEL_WORKERS", "0")) or None
 
-# Load the Excel file with strict data types
-xls = pd.ExcelFile(file_path)
+# Sheets are converted in worker processes, so the script body must only run in the main process
+if __name__ == "__main__":
+    # Get the current working directory
+    current_dir = os.getcwd()
 
-# Get sheet names
-sheet_names = xls.sheet_names
+    # Define the path to the `developer_export` folder
+    developer_export_dir = os.path.join(current_dir, '../developer_updated_matrixify_export')
 
-# Define sheets to exclude (e.g., Export Summary)
-excluded_sheets = ["Export Summary"]
+    # Find all .xlsx files in the developer_export directory
+    xlsx_files = glob.glob(os.path.join(developer_export_dir, '*.xlsx'))
 
-# Create a dictionary of JSON files (one for each sheet)
-json_files = {}
-for sheet in sheet_names:
-    # Skip the sheets that are in the excluded_sheets list
-    if exclude_sheet(sheet, excluded_sheets):
-        continue
-    
-    # Read the sheet into a DataFrame
-    df = pd.read_excel(xls, sheet_name=sheet, dtype=str)  # Read all columns as strings to avoid automatic type conversion
-    
-    # Replace NaN values with an empty string
-    df = df.fillna("")
-    
-    # Iterate over each column to check if its data is a float or int and format if necessary
-    for col in df.columns:
-        # Check if the column contains 'TRUE'/'FALSE' as strings and convert them to booleans
-        if df[col].dtype == 'object':
-            df[col] = df[col].apply(lambda x: True if x == 'TRUE' else (False if x == 'FALSE' else x))
-        
-        # If the column contains numeric data, format with commas, but preserve as string
-        elif pd.api.types.is_numeric_dtype(df[col]):
-            df[col] = df[col].apply(lambda x: f"{int(x):,}" if pd.notna(x) and x == int(x) else f"{x:,.2f}")
-    
-    # Convert each sheet to a list of dictionaries (JSON format)
-    json_files[sheet] = df.to_dict(orient='records')
+    # Check if there is exactly one .xlsx file in the directory
+    if len(xlsx_files) != 1:
+        raise ValueError("There should be exactly one .xlsx file in the developer_updated_matrixify_export directory.")
 
-# Define the output directory for JSON files
-output_dir = "../output_json"
-os.makedirs(output_dir, exist_ok=True)
+    # Use the found .xlsx file
+    file_path = xlsx_files[0]
 
-# Save each sheet's data as a separate JSON file with modified sheet name
-for sheet, json_data in json_files.items():
-    sheet_filename = sheet.replace(" ", "_")  # Replace spaces with underscores
-    output_file = os.path.join(output_dir, f"{sheet_filename}.json")
-    with open(output_file, 'w') as f:
-        json.dump(json_data, f, indent=4)
+    # Stream every sheet row by row (read-only openpyxl) and write each sheet's JSON as soon as it is done
+    with instrumentation.stage("excel_to_json"):
+        excel_import.convert_workbook(file_path, output_dir, excluded_sheets, workers,
+                                      os.path.join(current_dir, '../repo-shopify-data'))
 
-# Create the completed marker file
-completed_file = os.path.join(output_dir, "convert.json.completed")
-with open(completed_file, 'w') as f:
-    f.write("Conversion complete.")
+    # Create the completed marker file
+    completed_file = os.path.join(output_dir, "convert.json.completed")
+    with open(completed_file, 'w') as f:
+        f.write("Conversion complete.")
 
-print(f"JSON files saved to {output_dir} and conversion marker created.")
+    print(f"JSON files saved to {output_dir} and conversion marker created.")
@@ -0,0 +1,122 @@
+import os
+import asyncio
+import argparse
+
+from shopify_graphql import ShopifyGraphQLClient
+
+# Stores and tokens come from the environment; *_GRAPHQL_ENDPOINT points a side at a mock server instead
+SOURCE_SHOPIFY_STORE = os.getenv("SOURCE_SHOPIFY_STORE", "mb-stg.myshopify.com")
+DESTINATION_SHOPIFY_STORE = os.getenv("DESTINATION_SHOPIFY_STORE", "mbdev09.myshopify.com")
+
+METAFIELD_DEFINITIONS_QUERY = """query MetafieldDefinitions($after: String) {
+  metafieldDefinitions(first: 250, ownerType: PRODUCT, after: $after) {
+    edges { node { id name namespace key type { name category } description } }
+    pageInfo { hasNextPage endCursor }
+  }
+}"""
+
+METAOBJECT_DEFINITIONS_QUERY = """query MetaobjectDefinitions($after: String) {
+  metaobjectDefinitions(first: 100, after: $after) {
+    edges { node { id type } }
+    pageInfo { hasNextPage endCursor }
+  }
+}"""
+
+METAOBJECT_DEFINITION_CREATE = (
+    "metaobjectDefinitionCreate(definition: $definition) "
+    "{ metaobjectDefinition { id type } userErrors { field message } }"
+)
+
+METAFIELD_DEFINITION_CREATE = (
+    "metafieldDefinitionCreate(definition: $definition) "
+    "{ createdDefinition { id namespace key } userErrors { field message } }"
+)
+
+
+# Function to build the destination input of a source metafield definition
+def metafield_definition_input(metafield, metaobject_ids):
+    metafield_type = (metafield.get("type") or {}).get("name") or "single_line_text_field"
+    metaobject_id = metaobject_ids.get(metafield_type.replace("list.", "")) if "metaobject_reference" in metafield_type else None
+
+    # Reserved "shopify.*" namespaces cannot be created in another store
+    namespace = metafield["namespace"]
+    if namespace.startswith("shopify."):
+        namespace = "custom_" + namespace.split(".")[1]
+
+    return {
+        "name": metafield["name"],
+        "namespace": namespace,
+        "key": metafield["key"],
+        "type": metafield_type,
+        "description": metafield.get("description") or "",
+        "ownerType": "PRODUCT",
+        "validations": [{"type": "metaobject_definition_id", "value": metaobject_id}] if metaobject_id else [],
+    }
+
+
+# Function to copy product metafield definitions (and the metaobject definitions they need)
+async def migrate_metafields(source, destination, batch_size=10):
+    """
+    :return: (number of metafield definitions created, list of (key, userErrors) failures)
+    """
+    print("🔄 Fetching metafield definitions from source store...")
+    metafields = [node async for node in source.paginate(METAFIELD_DEFINITIONS_QUERY, ("metafieldDefinitions",))]
+    if not metafields:
+        return 0, []
+
+    required_types = sorted({
+        metafield["type"]["name"].replace("list.", "")
+        for metafield in metafields if "metaobject_reference" in metafield["type"]["name"]
+    })
+
+    print("🔄 Fetching metaobject definitions...")
+    metaobject_ids = {
+        node["type"]: node["id"]
+        async for node in destination.paginate(METAOBJECT_DEFINITIONS_QUERY, ("metaobjectDefinitions",))
+    }
+    print(f"✅ Fetched {len(metaobject_ids)} metaobject definitions")
+
+    missing = [metaobject_type for metaobject_type in required_types if metaobject_type not in metaobject_ids]
+    if missing:
+        print(f"⚠️ Creating {len(missing)} missing metaobject definitions: {', '.join(missing)}")
+        results = await destination.execute_batched(
+            "mutation", METAOBJECT_DEFINITION_CREATE, {"definition": "MetaobjectDefinitionCreateInput!"},
+            [{"definition": {"type": metaobject_type, "name": metaobject_type.replace("_", " ", 1).upper()}}
+             for metaobject_type in missing],
+            batch_size,
+        )
+        for metaobject_type, result in zip(missing, results):
+            if result["userErrors"]:
+                print(f"❌ Error creating metaobject definition for: {metaobject_type} {result['userErrors']}")
+            else:
+                metaobject_ids[metaobject_type] = result["metaobjectDefinition"]["id"]
+
+    results = await destination.execute_batched(
+        "mutation", METAFIELD_DEFINITION_CREATE, {"definition": "MetafieldDefinitionInput!"},
+        [{"definition": metafield_definition_input(metafield, metaobject_ids)} for metafield in metafields],
+        batch_size,
+    )
+    failures = [(metafield["key"], result["userErrors"]) for metafield, result in zip(metafields, results) if result["userErrors"]]
+    for key, errors in failures:
+        print(f"❌ Error creating metafield: {key} {errors}")
+    return len(metafields) - len(failures), failures
+
+
+async def main(args):
+    async with ShopifyGraphQLClient(
+        SOURCE_SHOPIFY_STORE, os.getenv("SOURCE_ACCESS_TOKEN"), endpoint=os.getenv("SOURCE_GRAPHQL_ENDPOINT"),
+        max_connections=args.connections,
+    ) as source, ShopifyGraphQLClient(
+        DESTINATION_SHOPIFY_STORE, os.getenv("DESTINATION_ACCESS_TOKEN"), endpoint=os.getenv("DESTINATION_GRAPHQL_ENDPOINT"),
+        max_connections=args.connections,
+    ) as destination:
+        created, failures = await migrate_metafields(source, destination, args.batch_size)
+        print(f"🎉 Metafield migration completed! {created} created, {len(failures)} failed "
+              f"({source.requests + destination.requests} requests, {destination.throttled} throttled)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy product metafield definitions between Shopify stores.")
+    parser.add_argument("--connections", type=int, default=4, help="Keep-alive connections (concurrent requests) per store")
+    parser.add_argument("--batch-size", type=int, default=10, help="Definitions created per GraphQL request")
+    asyncio.run(main(parser.parse_args()))
@@ -1,24 +1,117 @@
-import json
 import os
 import glob
 import shutil  # This will be used for file copying
 
+import entities
+import json_stream
+import fingerprints
+import references
+import instrumentation
+
 # Paths to the output and repo directories
 output_json_dir = '../output_json'  # Directory containing the JSON files generated from the script
 repo_json_dir = '../repo-shopify-data'  # Source of truth directory
 
-# Get all JSON files in the output directory
-output_json_files = glob.glob(os.path.join(output_json_dir, '*.json'))
-
-# Process each JSON file
-for output_json_path in output_json_files:
-    # Derive the corresponding repo file path from the output path
-    file_name = os.path.basename(output_json_path)
-    repo_json_path = os.path.join(repo_json_dir, file_name)
-
-    # Copy the file from the output_json directory to the repo_json directory.
-    try:
-        shutil.copy(output_json_path, repo_json_path)  # This will copy the file to the destination
-        print(f"Successfully copied {file_name} to {repo_json_path}")
-    except Exception as e:
-        print(f"Error copying {file_name} to {repo_json_path}: {e}")
+
+# Function to get the per-entity fingerprints of a repo section, from its sidecar index when it is fresh
+def repo_fingerprints(repo_json_path):
+    if not os.path.exists(repo_json_path):
+        return {}
+    indexed = fingerprints.fresh_index(repo_json_path, fingerprints.git_blob_id(repo_json_path))
+    if indexed is not None:
+        return indexed
+    return fingerprints.section_fingerprints(json_stream.iter_records(repo_json_path))
+
+
+# Function to get the per-entity fingerprints of a section without the running "Row #" counter
+def content_fingerprints(file_path):
+    """
+    "Row #" counts rows across the whole sheet, so one inserted entity would change every entity
+    after it; leaving it out makes the added/modified/removed counts show real record changes.
+    """
+    records = json_stream.iter_records(file_path)
+    return fingerprints.section_fingerprints(
+        {field: value for field, value in record.items() if field != entities.ROW_NUMBER_FIELD} for record in records
+    )
+
+
+# Function to replace a repo section with an exported one, atomically and in the repo file's layout
+def write_section(output_json_path, repo_json_path):
+    temp_path = f"{repo_json_path}.tmp"
+    storage_format = json_stream.output_format(repo_json_path)
+    if json_stream.detect_format(output_json_path) == storage_format:
+        shutil.copyfile(output_json_path, temp_path)
+    else:
+        json_stream.write_records(temp_path, json_stream.iter_records(output_json_path), storage_format=storage_format)
+    os.replace(temp_path, repo_json_path)
+
+
+# Function to sync one exported section into the repo, writing it only when its records changed
+def sync_section(output_json_path, repo_json_path):
+    """
+    Identical bytes are skipped without parsing. Otherwise entities are compared by fingerprint
+    (keys sorted), so a file that only differs in key order or layout is left untouched.
+
+    :return: (written, (added, modified, removed) entity counts, not counting "Row #" changes)
+    """
+    if os.path.exists(repo_json_path) and fingerprints.git_blob_id(output_json_path) == fingerprints.git_blob_id(repo_json_path):
+        return False, (0, 0, 0)
+
+    # Any record difference, "Row #" included, means the file has to be written
+    new = fingerprints.section_fingerprints(json_stream.iter_records(output_json_path))
+    if os.path.exists(repo_json_path) and not any(fingerprints.compare_fingerprints(repo_fingerprints(repo_json_path), new)):
+        return False, (0, 0, 0)
+
+    old_content = content_fingerprints(repo_json_path) if os.path.exists(repo_json_path) else {}
+    added, modified, removed = fingerprints.compare_fingerprints(old_content, content_fingerprints(output_json_path))
+    write_section(output_json_path, repo_json_path)
+    return True, (len(added), len(modified), len(removed))
+
+
+# Function to sync every exported section into the repo
+def sync_sections(output_dir, repo_dir):
+    """
+    :return: Dictionary of section -> (added, modified, removed) for the sections that were written
+    """
+    changed = {}
+    for output_json_path in sorted(glob.glob(os.path.join(output_dir, '*.json'))):
+        # Derive the corresponding repo file path from the output path
+        file_name = os.path.basename(output_json_path)
+        section = os.path.splitext(file_name)[0]
+        repo_json_path = os.path.join(repo_dir, file_name)
+
+        try:
+            written, counts = sync_section(output_json_path, repo_json_path)
+        except Exception as e:
+            print(f"Error syncing {file_name} to {repo_json_path}: {e}")
+            continue
+
+        if written:
+            changed[section] = counts
+            for name, count in zip(("added", "modified", "removed"), counts):
+                instrumentation.count(f"records_{name}", count, section)
+            detail = f"{counts[0]} added, {counts[1]} modified, {counts[2]} removed" if any(counts) else "row numbers only"
+            print(f"Updated {file_name}: {detail}")
+        else:
+            print(f"Unchanged {file_name}, left as is")
+    return changed
+
+
+if __name__ == "__main__":
+    # Write only the sections whose records changed, so unchanged files keep their mtime and git sees no change
+    with instrumentation.stage("sync_sections"):
+        changed_sections = sync_sections(output_json_dir, repo_json_dir)
+    if changed_sections:
+        print(f"Sections changed: {', '.join(changed_sections)}")
+    else:
+        print("No section changed, nothing to commit")
+
+    # Refresh the per-record fingerprint index stored alongside repo-shopify-data
+    with instrumentation.stage("fingerprint_index"):
+        updated_indexes = fingerprints.update_indexes(repo_json_dir)
+    print(f"Fingerprint indexes updated: {', '.join(updated_indexes) if updated_indexes else 'none'}")
+
+    # Refresh the cross-section reference index used to extract the referrers of changed records
+    with instrumentation.stage("reference_index"):
+        updated_references = references.update_indexes(repo_json_dir)
+    print(f"Reference indexes updated: {', '.join(updated_references) if updated_references else 'none'}")
@@ -0,0 +1,187 @@
+import os
+import argparse
+from datetime import datetime
+
+import pandas as pd
+
+import entities
+import json_diff
+import fingerprints
+import change_state
+import excel_format
+import instrumentation
+
+# "delta" writes only changed columns of changed entities to changes/change-only-excel
+CHANGE_EXPORT_MODE = os.getenv("CHANGE_EXPORT_MODE", "full")
+# Also write a review workbook with every old → new value
+DELTA_REVIEW = os.getenv("DELTA_REVIEW", "0") == "1"
+
+# Columns Matrixify needs to find the record, kept on every row when the section has them
+IDENTITY_COLUMNS = ("ID", "Handle", "Path", "Definition: Handle", "Command")
+# Columns linking the rows of a multi-row entity
+LINK_COLUMNS = (entities.TOP_ROW_FIELD,) + entities.ROW_KEY_FIELDS
+# Columns that change without the record changing
+DERIVED_COLUMNS = (entities.ROW_NUMBER_FIELD,)
+
+MERGE_COMMAND = "MERGE"
+DELETE_COMMAND = "DELETE"
+
+REVIEW_COLUMNS = ["Section", "Key", "Row", "Change", "Field", "Old Value", "New Value"]
+OLD_VALUE_COLOR = "#FFC7CE"
+NEW_VALUE_COLOR = "#C6EFCE"
+
+
+# Function to diff only the sections whose content differs between two revisions
+def section_diffs(repo_dir, base_rev, head_rev=json_diff.WORKTREE):
+    """
+    :return: Dictionary of section -> json_diff.SectionDiff
+    """
+    base_signatures = change_state.revision_signatures(repo_dir, base_rev)
+    head_signatures = change_state.revision_signatures(repo_dir, head_rev)
+    if head_rev is json_diff.WORKTREE:
+        # Working tree signatures are mtimes; compare blob IDs instead
+        head_signatures = {section: fingerprints.git_blob_id(os.path.join(repo_dir, f"{section}.json"))
+                           for section in head_signatures}
+    sections = sorted(section for section in set(base_signatures) | set(head_signatures)
+                      if base_signatures.get(section) != head_signatures.get(section))
+    return json_diff.diff_files([os.path.join(repo_dir, f"{section}.json") for section in sections], base_rev, head_rev)
+
+
+# Function to get the columns of an entity that really changed
+def changed_columns(changes):
+    return {field for _, field, _, _ in changes if field not in DERIVED_COLUMNS}
+
+
+# Function to build the delta sheet of one section
+def delta_frame(section_diff):
+    """
+    Added entities keep every column; modified entities get the identity and link columns plus
+    the columns that changed in any modified entity of the section; removed entities become
+    DELETE rows. Every row of a written entity is kept, so Matrixify sees whole multi-row entities.
+
+    :return: DataFrame, or None when nothing changed beyond derived columns
+    """
+    modified = {}
+    for key, changes in section_diff.modified.items():
+        columns = changed_columns(changes)
+        if columns:
+            modified[key] = columns
+    added = set(section_diff.added)
+    if not (added or modified or section_diff.removed):
+        return None
+
+    # Column order follows the section
+    section_columns = {}
+    for key in list(section_diff.added) + list(modified):
+        for row in section_diff.new_index[key]:
+            section_columns.update(dict.fromkeys(row))
+    for row in section_diff.removed_rows.values():
+        section_columns.update(dict.fromkeys(row))
+
+    wanted = set(IDENTITY_COLUMNS) | set(LINK_COLUMNS)
+    for columns in modified.values():
+        wanted |= columns
+    if added:
+        wanted |= set(section_columns)
+    columns = [column for column in section_columns if column in wanted]
+    if "Command" not in columns:
+        columns.insert(min(len(columns), 1), "Command")
+
+    rows = []
+    for key in section_diff.new_index:
+        if key in added or key in modified:
+            for row in section_diff.new_index[key]:
+                delta_row = {column: row.get(column, "") for column in columns}
+                delta_row["Command"] = row.get("Command") or MERGE_COMMAND
+                rows.append(delta_row)
+    for key, row in section_diff.removed_rows.items():
+        delete_row = {column: row.get(column, "") if column in IDENTITY_COLUMNS or column == entities.TOP_ROW_FIELD else ""
+                      for column in columns}
+        delete_row["Command"] = DELETE_COMMAND
+        rows.append(delete_row)
+
+    df = pd.DataFrame(rows, columns=columns)
+    excel_format.format_for_excel(df)
+    return df
+
+
+# Function to list every cell change of the diffs for the review workbook
+def review_frame(diffs):
+    rows = []
+    for section, section_diff in diffs.items():
+        for key in section_diff.added:
+            rows.append([section, key, "", "added", "", "", ""])
+        for key, changes in section_diff.modified.items():
+            for row_number, field, old_value, new_value in changes:
+                if field not in DERIVED_COLUMNS:
+                    rows.append([section, key, row_number, "modified", field, old_value, new_value])
+        for key in section_diff.removed:
+            rows.append([section, key, "", "removed", "", "", ""])
+    return pd.DataFrame(rows, columns=REVIEW_COLUMNS)
+
+
+# Function to write the review workbook with old and new values highlighted
+def write_review(diffs, output_folder, current_time):
+    review_file = os.path.join(output_folder, f"Review_{current_time}.xlsx")
+    df = review_frame(diffs)
+    with pd.ExcelWriter(review_file, engine="xlsxwriter") as writer:
+        df.to_excel(writer, sheet_name="Review", index=False)
+        workbook = writer.book
+        sheet = writer.sheets["Review"]
+        old_format = workbook.add_format({"bg_color": OLD_VALUE_COLOR})
+        new_format = workbook.add_format({"bg_color": NEW_VALUE_COLOR})
+        old_column = REVIEW_COLUMNS.index("Old Value")
+        sheet.set_column(old_column, old_column, 50, old_format)
+        sheet.set_column(old_column + 1, old_column + 1, 50, new_format)
+        sheet.autofilter(0, 0, len(df), len(REVIEW_COLUMNS) - 1)
+        sheet.freeze_panes(1, 0)
+    print(f"🔎 Review workbook created: {review_file}")
+    return review_file
+
+
+# Function to write the changed-cells-only Matrixify workbook
+def write_delta_workbook(diffs, output_folder, review=DELTA_REVIEW):
+    """
+    :param diffs: Dictionary of section -> json_diff.SectionDiff
+    :param output_folder: Folder for Export_<time>.xlsx (and Review_<time>.xlsx)
+    :return: Path of the workbook, or None when nothing changed
+    """
+    sheets = {}
+    for section, section_diff in sorted(diffs.items()):
+        df = delta_frame(section_diff)
+        if df is not None:
+            sheets[section[:31]] = df
+    if not sheets:
+        print("🚫 No changed cells to export.")
+        return None
+
+    os.makedirs(output_folder, exist_ok=True)
+    current_time = datetime.now().strftime('%Y-%m-%d_%H%M%S')
+    output_excel_file = os.path.join(output_folder, f'Export_{current_time}.xlsx')
+    with pd.ExcelWriter(output_excel_file, engine='xlsxwriter') as writer:
+        for sheet_name, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            instrumentation.count("rows_exported", len(df), sheet_name)
+            instrumentation.count("cells_exported", df.size, sheet_name)
+            print(f"✅ {sheet_name}: {len(df)} rows × {len(df.columns)} columns")
+    print(f"🎉 Excel file created: {output_excel_file}")
+
+    if review:
+        write_review(diffs, output_folder, current_time)
+    return output_excel_file
+
+
+if __name__ == "__main__":
+    # Detect if running in GitHub Actions
+    GITHUB_WORKSPACE = os.getenv("GITHUB_WORKSPACE", os.getcwd())
+
+    parser = argparse.ArgumentParser(description="Write a Matrixify workbook with only the changed cells of each section.")
+    parser.add_argument("--base", required=True, help="Base revision to diff against (e.g. origin/main)")
+    parser.add_argument("--head", default=json_diff.WORKTREE, help="Head revision (default: working tree)")
+    parser.add_argument("--repo-dir", default=os.path.join(GITHUB_WORKSPACE, "repo-shopify-data"))
+    parser.add_argument("--output-dir", default=os.path.join(GITHUB_WORKSPACE, "changes/change-only-excel"))
+    parser.add_argument("--review", action="store_true", default=DELTA_REVIEW, help="Also write a review workbook")
+    args = parser.parse_args()
+
+    with instrumentation.stage("delta_export"):
+        write_delta_workbook(section_diffs(args.repo_dir, args.base, args.head), args.output_dir, args.review)
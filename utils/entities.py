@@ -0,0 +1,133 @@
+# Fields used to identify a record, in order of preference
+KEY_FIELDS = ("ID", "Handle")
+
+# Matrixify marks the first row of a multi-row entity with "Top Row"
+TOP_ROW_FIELD = "Top Row"
+TRUE_VALUES = (True, "True", "TRUE", "true")
+
+# Fields identifying a row within a multi-row entity (menu item, collection product, metaobject field)
+ROW_KEY_FIELDS = ("Menu Item: ID", "Product: ID", "Field")
+
+# Running row counter across the sheet; it shifts whenever a row is inserted above
+ROW_NUMBER_FIELD = "Row #"
+
+
+# Function to get the key (ID, or Handle when there is no ID) of a record
+def record_key(record):
+    for field in KEY_FIELDS:
+        value = record.get(field)
+        if value not in (None, ""):
+            return str(value)
+    return None
+
+
+# Function to order entity keys by ID: numerically on the trailing number (also for GIDs), then by text
+def order_key(key):
+    """
+    Keyless entities sort last. Handles sort as text, with a trailing number compared numerically.
+    """
+    if key is None:
+        return (2, "", 0, "")
+    prefix = key.rstrip("0123456789")
+    digits = key[len(prefix):]
+    if not digits:
+        return (1, key, 0, key)
+    return (0 if not prefix or prefix.endswith("/") else 1, prefix, int(digits), key)
+
+
+# Function to check if a record starts a new Matrixify multi-row entity
+def is_top_row(record):
+    return record.get(TOP_ROW_FIELD) in TRUE_VALUES
+
+
+class Entity:
+    """
+    One logical object: a single row for Pages/Files/Redirects, or every row linked by
+    ID + "Top Row" + "Row #" for Metaobjects, Menus and Custom_Collections.
+    """
+
+    __slots__ = ("key", "start", "stop", "rows")
+
+    def __init__(self, key, start):
+        self.key = key
+        self.start = start  # Index of the first row in the section
+        self.stop = start  # Index one past the last row in the section
+        self.rows = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __repr__(self):
+        return f"Entity({self.key!r}, rows={self.start}:{self.stop})"
+
+
+# Function to group section rows into entities in a single pass
+def iter_entities(records):
+    """
+    Stream entities from section rows. A new entity starts on a "Top Row" or when the
+    key changes; continuation rows with an empty ID stay with the current entity.
+
+    :param records: Iterable of section records, in file order
+    :return: Generator of Entity objects
+    """
+    entity = None
+    for position, record in enumerate(records):
+        key = record_key(record)
+        if entity is None or is_top_row(record) or (key is not None and key != entity.key):
+            if entity is not None:
+                yield entity
+            entity = Entity(key, position)
+        entity.rows.append(record)
+        entity.stop = position + 1
+    if entity is not None:
+        yield entity
+
+
+class SectionEntities:
+    """All entities of a section with a key -> entity index."""
+
+    __slots__ = ("entities", "index")
+
+    def __init__(self, records):
+        self.entities = []
+        self.index = {}
+        for entity in iter_entities(records):
+            existing = self.index.get(entity.key)
+            if existing is None:
+                self.entities.append(entity)
+                self.index[entity.key] = entity
+            else:
+                # The same key split across the file is still one entity
+                existing.rows.extend(entity.rows)
+                existing.stop = entity.stop
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __iter__(self):
+        return iter(self.entities)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def get(self, key):
+        return self.index.get(key)
+
+    def keys(self):
+        return self.index.keys()
+
+    def rows(self):
+        for entity in self.entities:
+            yield from entity.rows
+
+
+# Function to stream the rows of every entity whose key is in a set of IDs
+def select_rows(records, ids):
+    """
+    :param records: Iterable of section records
+    :param ids: Set of entity keys to keep
+    :return: Generator of rows, whole entities at a time
+    """
+    for entity in iter_entities(records):
+        if entity.key in ids:
+            yield from entity.rows
@@ -0,0 +1,120 @@
+import math
+import numpy as np
+import pandas as pd
+
+# Column classes
+BOOL = "bool"
+NUMERIC = "numeric"
+TEXT = "text"
+OTHER = "other"
+
+# Boolean spelling used by Matrixify sheets
+EXCEL_TRUE = "TRUE"
+EXCEL_FALSE = "FALSE"
+
+
+# Function to classify a column once, before any formatting
+def classify_column(series):
+    if pd.api.types.is_bool_dtype(series):
+        return BOOL
+    if pd.api.types.is_numeric_dtype(series):
+        return NUMERIC
+    if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        return TEXT
+    return OTHER
+
+
+# Function to classify every column of a DataFrame
+def classify_columns(df):
+    return {col: classify_column(df[col]) for col in df.columns}
+
+
+# Number format used when writing JSON to Excel (whole numbers without decimals)
+def format_number_for_excel(x):
+    if pd.notna(x) and math.isfinite(x) and x == int(x):
+        return f"{x:,.0f}"
+    return f"{x:,.2f}"
+
+
+# Number format used when reading Excel back to JSON (whole numbers as exact integers)
+def format_number_from_excel(x):
+    if pd.notna(x) and math.isfinite(x) and x == int(x):
+        return f"{int(x):,}"
+    return f"{x:,.2f}"
+
+
+# Function to map every value of an array through a formatter, calling it once per distinct value
+def map_unique(values, formatter):
+    uniques, inverse = np.unique(values, return_inverse=True)
+    formatted = np.array([formatter(value) for value in uniques], dtype=object)
+    return formatted[inverse.reshape(-1)]
+
+
+# Function to format a numeric column as text in one vectorized pass
+def format_numeric(series, formatter):
+    values = series.to_numpy()
+    if values.dtype == object:
+        # Nullable extension dtypes hand back objects; fall back to per-value mapping
+        return series.map(formatter).to_numpy(dtype=object)
+    return map_unique(values, formatter)
+
+
+# Function to format a boolean column as 'TRUE'/'FALSE'
+def format_bool(series):
+    if series.dtype == bool:
+        return np.where(series.to_numpy(), EXCEL_TRUE, EXCEL_FALSE).astype(object)
+    # Nullable booleans keep missing values as they are
+    return series.replace({True: EXCEL_TRUE, False: EXCEL_FALSE}).to_numpy(dtype=object)
+
+
+# Function to format a DataFrame for Excel export
+def format_for_excel(df, column_classes=None):
+    """
+    Turn booleans into 'TRUE'/'FALSE' and numbers into comma-grouped text, column by column.
+
+    :param df: DataFrame built from section JSON records (modified in place)
+    :param column_classes: Optional precomputed classify_columns(df) result
+    :return: The formatted DataFrame
+    """
+    column_classes = column_classes or classify_columns(df)
+    for col, column_class in column_classes.items():
+        if column_class == BOOL:
+            df[col] = format_bool(df[col])
+        elif column_class == NUMERIC:
+            df[col] = format_numeric(df[col], format_number_for_excel)
+    return df
+
+
+# Function to convert 'TRUE'/'FALSE' strings of a text column (Series, array or list) to booleans
+def coerce_bool_text(series):
+    values = np.asarray(series, dtype=object)
+    is_true = values == EXCEL_TRUE
+    is_false = values == EXCEL_FALSE
+    if not (is_true.any() or is_false.any()):
+        return None
+    values = values.copy()
+    values[is_true] = True
+    values[is_false] = False
+    return values
+
+
+# Function to coerce a DataFrame read from Excel back into JSON-ready values
+def coerce_from_excel(df, column_classes=None):
+    """
+    Reverse of format_for_excel: 'TRUE'/'FALSE' text becomes booleans and numbers become
+    comma-grouped text, column by column.
+
+    :param df: DataFrame read from a Matrixify sheet (modified in place)
+    :param column_classes: Optional precomputed classify_columns(df) result
+    :return: The coerced DataFrame
+    """
+    column_classes = column_classes or classify_columns(df)
+    for col, column_class in column_classes.items():
+        if column_class == TEXT:
+            values = coerce_bool_text(df[col])
+            if values is not None:
+                df[col] = pd.Series(values, index=df.index, dtype=object)
+        elif column_class in (BOOL, NUMERIC):
+            # Real booleans are numeric here, matching the original converter
+            df[col] = format_numeric(df[col], format_number_from_excel)
+    return df
@@ -0,0 +1,134 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import openpyxl
+
+import json_stream
+import excel_format
+import instrumentation
+import metafield_validation
+
+# Text that pandas.read_excel treats as missing by default; kept so output matches the pandas reader
+NA_VALUES = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+
+# Function to convert a cell value to the text pandas.read_excel(dtype=str) would produce
+def cell_to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value)
+    return "" if text in NA_VALUES else text
+
+
+# Function to build unique column names from a header row, like pandas does
+def header_columns(header_row):
+    columns = []
+    seen = {}
+    for position, value in enumerate(header_row):
+        name = f"Unnamed: {position}" if value is None or value == "" else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+
+# Function to read a sheet row by row into columns of text
+def read_sheet_columns(file_path, sheet):
+    """
+    Stream a sheet with openpyxl's read-only reader. Fully blank rows are skipped and
+    short rows are padded, as pandas.read_excel does.
+
+    :return: (column names, list of column value lists)
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        rows = workbook[sheet].iter_rows(values_only=True)
+        header_row = next(rows, None)
+        if header_row is None:
+            return [], []
+
+        # Trailing empty header cells are not columns
+        header_row = list(header_row)
+        while header_row and header_row[-1] is None:
+            header_row.pop()
+        columns = header_columns(header_row)
+        values = [[] for _ in columns]
+
+        for row in rows:
+            texts = [cell_to_text(value) for value in row[:len(columns)]]
+            if not any(texts):
+                continue
+            texts.extend([""] * (len(columns) - len(texts)))
+            for column_values, text in zip(values, texts):
+                column_values.append(text)
+        return columns, values
+    finally:
+        workbook.close()
+
+
+# Worker: convert one sheet and write its JSON file
+def convert_sheet(file_path, sheet, output_file, reference_dir=None):
+    """
+    :return: (sheet name, number of records written, metafield validation errors)
+    """
+    columns, values = read_sheet_columns(file_path, sheet)
+
+    # Typed metafield values are checked on the sheet's text, before coercion
+    errors = []
+    if metafield_validation.VALIDATION_MODE != "off":
+        names = metafield_validation.reference_names(reference_dir) if reference_dir and os.path.isdir(reference_dir) else None
+        errors = metafield_validation.validate_columns(sheet.replace(" ", "_"), columns, values, names)
+
+    # Typed coercion runs once per column ('TRUE'/'FALSE' text becomes booleans)
+    for position, column_values in enumerate(values):
+        coerced = excel_format.coerce_bool_text(column_values)
+        if coerced is not None:
+            values[position] = coerced.tolist()
+
+    records = (dict(zip(columns, row)) for row in zip(*values))
+    return sheet, json_stream.write_records(output_file, records), errors
+
+
+# Function to convert every sheet of a workbook to JSON files in parallel
+def convert_workbook(file_path, output_dir, excluded_sheets=(), workers=None, reference_dir=None):
+    """
+    :param file_path: Matrixify .xlsx workbook
+    :param output_dir: Directory for the <Sheet_Name>.json files
+    :param excluded_sheets: Sheet names to skip (e.g. "Export Summary")
+    :param workers: Number of worker processes (default: all cores)
+    :param reference_dir: Sections that metafield references must exist in (default: no existence check)
+    :return: Dictionary of sheet name -> number of records written
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True, keep_links=False)
+    sheet_names = [sheet for sheet in workbook.sheetnames if sheet not in excluded_sheets]
+    workbook.close()
+
+    converted = {}
+    errors = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(convert_sheet, file_path, sheet, os.path.join(output_dir, f"{sheet.replace(' ', '_')}.json"),
+                        reference_dir)
+            for sheet in sheet_names
+        ]
+        # Each sheet's JSON is written by its worker as soon as that sheet is done
+        for future in as_completed(futures):
+            sheet, count, sheet_errors = future.result()
+            converted[sheet] = count
+            errors.extend(sheet_errors)
+            instrumentation.count("rows_imported", count, sheet)
+            print(f"✅ Converted sheet {sheet} ({count} rows)")
+
+    # Reported once for the whole workbook; METAFIELD_VALIDATION=strict fails after every sheet is written
+    metafield_validation.enforce(errors, os.path.basename(file_path))
+    return converted
@@ -1,6 +1,12 @@
 import json
 import os
 import re
+import itertools
+
+import json_stream
+import references
+import section_mirror
+import instrumentation
 
 # Function to read config properties
 def load_properties(filepath):
@@ -29,17 +35,9 @@ for file_path in config["REPO_FILES"].split(", "):
     section_name = os.path.basename(file_path).replace(".json", "")
     original_files[section_name] = file_path
 
-# Function to load JSON data from a file
-def load_json(file_path):
-    if os.path.exists(file_path):
-        with open(file_path, 'r') as f:
-            return json.load(f)
-    return []
-
-# Function to write JSON data to a file
+# Function to write JSON records to a file, one record at a time
 def write_json(file_path, data):
-    with open(file_path, 'w') as f:
-        json.dump(data, f, indent=4)
+    return json_stream.write_records(file_path, data)
 
 # Function to read changed IDs from changed_ids.txt
 def read_changed_ids(changed_ids_file):
@@ -49,29 +47,38 @@ def read_changed_ids(changed_ids_file):
             match = re.match(r'(\w+) -> (.+)', line.strip())  
             if match:
                 section = match.group(1)
-                ids = match.group(2).split(", ")  
+                ids = set(match.group(2).split(", "))
                 changed_ids[section] = ids
     return changed_ids
 
 # Read changed IDs
-changed_ids = read_changed_ids(changed_ids_file)
+with instrumentation.stage("read_changed_ids"):
+    changed_ids = read_changed_ids(changed_ids_file)
+
+# Pull in the records that refer to changed records (e.g. Pages using a changed Metaobject)
+if references.INCLUDE_REFERRERS and changed_ids:
+    with instrumentation.stage("referrers"):
+        for section, ids in references.referrer_ids(os.path.dirname(next(iter(original_files.values()))), changed_ids).items():
+            changed_ids.setdefault(section, set()).update(ids)
 
 # Dictionary to store extracted data
 output_data = {}
 
 # Process each file and extract relevant JSON blocks
-for section, ids in changed_ids.items():
-    if section in original_files:
-        file_path = original_files[section]
-        data = load_json(file_path)
+with instrumentation.stage("extract_changes"):
+    for section, ids in changed_ids.items():
+        if section in original_files:
+            file_path = original_files[section]
 
-        # Extract only blocks that match the changed IDs
-        relevant_blocks = [block for block in data if str(block.get('ID')) in ids]
+            # Only blocks of entities that match the changed IDs (multi-row entities stay whole),
+            # filtered in the section's Parquet mirror when pyarrow is installed
+            relevant_blocks = section_mirror.iter_rows(file_path, ids)
+            first_block = next(relevant_blocks, None)
 
-        if relevant_blocks:
-            output_data[section] = relevant_blocks
-            output_file_path = os.path.join(output_dir, f"{section}.json")
-            write_json(output_file_path, relevant_blocks)
-            print(f"Extracted {len(relevant_blocks)} blocks for {section} and saved to {output_file_path}")
+            if first_block is not None:
+                output_file_path = os.path.join(output_dir, f"{section}.json")
+                output_data[section] = write_json(output_file_path, itertools.chain([first_block], relevant_blocks))
+                instrumentation.count("rows_extracted", output_data[section], section)
+                print(f"Extracted {output_data[section]} blocks for {section} and saved to {output_file_path}")
 
 print("Extraction process completed.")
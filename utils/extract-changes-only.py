@@ -1,8 +1,14 @@
 import os
 import re
 import json
+import itertools
 import subprocess
 
+import json_stream
+import references
+import section_mirror
+import instrumentation
+
 # Detect if running in GitHub Actions
 GITHUB_WORKSPACE = os.getenv("GITHUB_WORKSPACE", os.getcwd())
 
@@ -23,17 +29,9 @@ for json_file in os.listdir(repo_dir):
         section_name = os.path.splitext(json_file)[0]
         original_files[section_name] = os.path.join(repo_dir, json_file)
 
-# Function to load JSON data from a file
-def load_json(file_path):
-    if os.path.exists(file_path):
-        with open(file_path, 'r', encoding="utf-8") as f:
-            return json.load(f)
-    return []
-
-# Function to write JSON data to a file
+# Function to write JSON records to a file, one record at a time
 def write_json(file_path, data):
-    with open(file_path, 'w', encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+    return json_stream.write_records(file_path, data)
 
 # Function to read changed IDs from changed_ids.txt
 def read_changed_ids(changed_ids_file):
@@ -47,12 +45,19 @@ def read_changed_ids(changed_ids_file):
             match = re.match(r'(\w+) -> (.+)', line.strip())  
             if match:
                 section = match.group(1)
-                ids = match.group(2).split(", ")
+                ids = set(match.group(2).split(", "))
                 changed_ids[section] = ids
     return changed_ids
 
 # Read changed IDs
-changed_ids = read_changed_ids(changed_ids_file)
+with instrumentation.stage("read_changed_ids"):
+    changed_ids = read_changed_ids(changed_ids_file)
+
+# Pull in the records that refer to changed records (e.g. Pages using a changed Metaobject)
+if references.INCLUDE_REFERRERS and changed_ids:
+    with instrumentation.stage("referrers"):
+        for section, ids in references.referrer_ids(repo_dir, changed_ids).items():
+            changed_ids.setdefault(section, set()).update(ids)
 
 print(f"✅ Extracted IDs: {changed_ids}")
 
@@ -60,19 +65,21 @@ print(f"✅ Extracted IDs: {changed_ids}")
 output_data = {}
 
 # Process each file and extract relevant JSON blocks
-for section, ids in changed_ids.items():
-    if section in original_files:
-        file_path = original_files[section]
-        data = load_json(file_path)
-
-        # Extract only blocks that match the changed IDs
-        relevant_blocks = [block for block in data if str(block.get('ID')) in ids]
-
-        if relevant_blocks:
-            output_data[section] = relevant_blocks
-            output_file_path = os.path.join(output_dir, f"{section}.json")
-            write_json(output_file_path, relevant_blocks)
-            print(f"✅ Extracted {len(relevant_blocks)} blocks for {section} and saved to {output_file_path}")
+with instrumentation.stage("extract_changes"):
+    for section, ids in changed_ids.items():
+        if section in original_files:
+            file_path = original_files[section]
+
+            # Only blocks of entities that match the changed IDs (multi-row entities stay whole),
+            # filtered in the section's Parquet mirror when pyarrow is installed
+            relevant_blocks = section_mirror.iter_rows(file_path, ids)
+            first_block = next(relevant_blocks, None)
+
+            if first_block is not None:
+                output_file_path = os.path.join(output_dir, f"{section}.json")
+                output_data[section] = write_json(output_file_path, itertools.chain([first_block], relevant_blocks))
+                instrumentation.count("rows_extracted", output_data[section], section)
+                print(f"✅ Extracted {output_data[section]} blocks for {section} and saved to {output_file_path}")
 
 # Ensure at least one file was extracted
 if not output_data:
@@ -2,6 +2,8 @@ import os
 import re
 import subprocess
 
+import instrumentation
+
 # Detect if running in GitHub Actions
 GITHUB_WORKSPACE = os.getenv("GITHUB_WORKSPACE", os.getcwd())  # Use GitHub workspace if available
 
@@ -20,6 +22,8 @@ changed_ids = {}
 section_pattern = re.compile(r'^diff --git a/repo-shopify-data/([\w-]+)\.json')
 id_pattern = re.compile(r'"ID":\s*"((?:gid://shopify/[\w/]+/)?\d+)"')  # Captures both Shopify GID & numeric IDs
 change_block_pattern = re.compile(r'^@@')
+# Unchanged context line of a JSONL section (one record per line); its ID belongs to an unchanged record
+jsonl_context_pattern = re.compile(r'^ \{')
 
 # Initialize variables
 current_section = None
@@ -32,7 +36,7 @@ if not os.path.exists(diff_file_path):
     exit(1)
 
 # Read and process the diff file
-with open(diff_file_path, "r", encoding="utf-8") as file:
+with instrumentation.stage("parse_diff"), open(diff_file_path, "r", encoding="utf-8") as file:
     for line in file:
         section_match = section_pattern.search(line)
         if section_match:
@@ -49,8 +53,8 @@ with open(diff_file_path, "r", encoding="utf-8") as file:
             inside_change_block = True
             change_block_lines = []  
 
-        if inside_change_block:
-            change_block_lines.append(line.strip())  
+        if inside_change_block and not jsonl_context_pattern.match(line):
+            change_block_lines.append(line.strip())
 
 if current_section and change_block_lines:
     ids = id_pattern.findall(" ".join(change_block_lines))
@@ -58,6 +62,8 @@ if current_section and change_block_lines:
 
 # Remove empty sections
 changed_ids = {section: sorted(list(ids)) for section, ids in changed_ids.items() if ids}
+for section, ids in changed_ids.items():
+    instrumentation.count("changed_ids", len(ids), section)
 
 # Write extracted IDs to file
 with open(output_file_path, "w", encoding="utf-8") as output_file:
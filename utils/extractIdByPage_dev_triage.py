@@ -1,6 +1,8 @@
 import re
 import os
 
+import instrumentation
+
 # Paths
 diff_file_path = "../changes/git-diff/changes.diff"  # Path to the diff file
 output_folder = "../changes/id-output"  # Destination folder
@@ -16,13 +18,15 @@ changed_ids = {}
 section_pattern = re.compile(r'^diff --git a/repo-shopify-data/([\w-]+)\.json')
 id_pattern = re.compile(r'"ID":\s*"((?:gid://shopify/[\w/]+/)?\d+)"')
 change_block_pattern = re.compile(r'^@@')
+# Unchanged context line of a JSONL section (one record per line); its ID belongs to an unchanged record
+jsonl_context_pattern = re.compile(r'^ \{')
 
 # Initialize variables
 current_section = None
 inside_change_block = False
 
 # Read and process the diff file
-with open(diff_file_path, "r", encoding="utf-8") as file:
+with instrumentation.stage("parse_diff"), open(diff_file_path, "r", encoding="utf-8") as file:
     for line in file:
         # Detect section (e.g., Pages.json, Redirects.json)
         section_match = section_pattern.search(line)
@@ -37,13 +41,15 @@ with open(diff_file_path, "r", encoding="utf-8") as file:
             inside_change_block = True  # Mark that we're inside a change block
 
         # Extract **all** IDs within a change block
-        if inside_change_block:
+        if inside_change_block and not jsonl_context_pattern.match(line):
             id_matches = id_pattern.findall(line)  # Find all IDs in the current line
             if id_matches:
                 changed_ids[current_section].update(id_matches)  # Add all found IDs
 
 # Remove empty sections
 changed_ids = {section: sorted(list(ids)) for section, ids in changed_ids.items() if ids}
+for section, ids in changed_ids.items():
+    instrumentation.count("changed_ids", len(ids), section)
 
 # Write the IDs to a file
 with open(output_file_path, "w", encoding="utf-8") as output_file:
@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import glob
+import struct
+import hashlib
+import argparse
+
+import entities
+import git_objects
+import json_stream
+
+# Bytes per fingerprint (BLAKE2b digest size)
+DIGEST_SIZE = 16
+
+# Sidecar index: repo-shopify-data/.fingerprints/<Section>.fpi
+INDEX_DIR = ".fingerprints"
+INDEX_MAGIC = b"SFPI"
+INDEX_VERSION = 1
+# magic, version, git blob ID (SHA-1) of the source JSON, entry count
+INDEX_HEADER = struct.Struct(">4sB20sI")
+KEY_LENGTH = struct.Struct(">H")
+# Key length marking the entity without ID or Handle (entities.record_key returns None)
+NO_KEY = 0xFFFF
+
+
+# Function to fingerprint the rows of one entity, independent of key order
+def entity_fingerprint(rows):
+    normalized = json.dumps(rows, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=DIGEST_SIZE).hexdigest()
+
+
+# Function to fingerprint every entity of a section in one streaming pass
+def section_fingerprints(records):
+    """
+    :param records: Iterable of section records
+    :return: Dictionary of entity key -> fingerprint (hex), in file order
+    """
+    result = {}
+    for entity in entities.iter_entities(records):
+        fingerprint = entity_fingerprint(entity.rows)
+        if entity.key in result:
+            # The same key split across the file is one entity; chain the parts
+            fingerprint = entity_fingerprint([result[entity.key], fingerprint])
+        result[entity.key] = fingerprint
+    return result
+
+
+# Function to compare two fingerprint maps
+def compare_fingerprints(old, new):
+    """
+    :return: (added keys, modified keys, removed keys)
+    """
+    added = [key for key in new if key not in old]
+    modified = [key for key, fingerprint in new.items() if key in old and old[key] != fingerprint]
+    removed = [key for key in old if key not in new]
+    return added, modified, removed
+
+
+# Function to compute the git blob ID of a file, as `git hash-object` would
+def git_blob_id(file_path):
+    with open(file_path, "rb") as f:
+        content = f.read()
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+# Function to get the sidecar index path of a section file
+def index_path(section_file):
+    section = os.path.splitext(os.path.basename(section_file))[0]
+    return os.path.join(os.path.dirname(section_file), INDEX_DIR, f"{section}.fpi")
+
+
+# Function to encode a fingerprint map as a compact binary index
+def encode_index(fingerprint_map, source_blob_id):
+    """
+    Layout: header (magic, version, source blob ID, count), then per entry a
+    length-prefixed UTF-8 key and its raw digest. Entries are sorted by key, the keyless
+    entity (length NO_KEY, no key bytes) last.
+    """
+    parts = [INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, bytes.fromhex(source_blob_id), len(fingerprint_map))]
+    for key in sorted(fingerprint_map, key=lambda key: (key is None, key or "")):
+        if key is None:
+            parts.append(KEY_LENGTH.pack(NO_KEY))
+        else:
+            encoded_key = key.encode("utf-8")
+            parts.append(KEY_LENGTH.pack(len(encoded_key)))
+            parts.append(encoded_key)
+        parts.append(bytes.fromhex(fingerprint_map[key]))
+    return b"".join(parts)
+
+
+# Function to decode a binary index
+def decode_index(data):
+    """
+    :return: (source blob ID, dictionary of key -> fingerprint hex), or None if not a valid index
+        (a truncated or corrupt index is treated as stale)
+    """
+    if len(data) < INDEX_HEADER.size:
+        return None
+    magic, version, source_blob_id, count = INDEX_HEADER.unpack_from(data, 0)
+    if magic != INDEX_MAGIC or version != INDEX_VERSION:
+        return None
+
+    fingerprint_map = {}
+    pos = INDEX_HEADER.size
+    try:
+        for _ in range(count):
+            (key_length,) = KEY_LENGTH.unpack_from(data, pos)
+            pos += KEY_LENGTH.size
+            if key_length == NO_KEY:
+                key = None
+            else:
+                key = data[pos:pos + key_length].decode("utf-8")
+                pos += key_length
+            if pos + DIGEST_SIZE > len(data):
+                return None
+            fingerprint_map[key] = data[pos:pos + DIGEST_SIZE].hex()
+            pos += DIGEST_SIZE
+    except (struct.error, UnicodeDecodeError):
+        return None
+    return source_blob_id.hex(), fingerprint_map
+
+
+# Function to read a section's sidecar index from the working tree or a git revision
+def read_index(section_file, rev=None):
+    """
+    :param rev: None for the working tree, "" for the git index, or a git revision
+    :return: (source blob ID, fingerprint map) or None when there is no valid index
+    """
+    path = index_path(section_file)
+    if rev is None:
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return decode_index(f.read())
+
+    data = git_objects.read_file(path, rev)
+    return decode_index(data) if data is not None else None
+
+
+# Function to get a section's fingerprints from its index, if the index matches the JSON blob
+def fresh_index(section_file, source_blob_id, rev=None):
+    index = read_index(section_file, rev)
+    if index is None or index[0] != source_blob_id:
+        return None
+    return index[1]
+
+
+# Function to rebuild a section's sidecar index when its JSON changed
+def update_index(section_file, force=False):
+    """
+    :return: True if the index was (re)written, False if it was already up to date
+    """
+    source_blob_id = git_blob_id(section_file)
+    if not force and fresh_index(section_file, source_blob_id) is not None:
+        return False
+
+    fingerprint_map = section_fingerprints(json_stream.iter_records(section_file))
+    path = index_path(section_file)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(encode_index(fingerprint_map, source_blob_id))
+    os.replace(temp_path, path)
+    return True
+
+
+# Function to bring every sidecar index of a directory up to date
+def update_indexes(repo_dir, force=False):
+    """
+    :return: List of sections whose index was rewritten
+    """
+    updated = []
+    section_files = glob.glob(os.path.join(repo_dir, "*.json"))
+    for section_file in sorted(section_files):
+        if update_index(section_file, force):
+            updated.append(os.path.splitext(os.path.basename(section_file))[0])
+
+    # Drop indexes of sections that no longer exist
+    sections = {os.path.splitext(os.path.basename(path))[0] for path in section_files}
+    for path in glob.glob(os.path.join(repo_dir, INDEX_DIR, "*.fpi")):
+        if os.path.splitext(os.path.basename(path))[0] not in sections:
+            os.remove(path)
+    return updated
+
+
+if __name__ == "__main__":
+    # Detect if running in GitHub Actions
+    GITHUB_WORKSPACE = os.getenv("GITHUB_WORKSPACE", os.getcwd())
+
+    parser = argparse.ArgumentParser(description="Maintain the per-record fingerprint index of each section.")
+    parser.add_argument("--repo-dir", default=os.path.join(GITHUB_WORKSPACE, "repo-shopify-data"))
+    parser.add_argument("--force", action="store_true", help="Rebuild every index")
+    parser.add_argument("--check", action="store_true", help="Exit with an error if any index is stale")
+    args = parser.parse_args()
+
+    if args.check:
+        stale = [path for path in glob.glob(os.path.join(args.repo_dir, "*.json"))
+                 if fresh_index(path, git_blob_id(path)) is None]
+        for path in stale:
+            print(f"❌ Stale fingerprint index for {path}")
+        sys.exit(1 if stale else 0)
+
+    updated = update_indexes(args.repo_dir, args.force)
+    print(f"✅ Fingerprint indexes updated: {', '.join(updated) if updated else 'none'}")
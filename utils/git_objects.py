@@ -0,0 +1,139 @@
+import io
+import os
+import atexit
+import subprocess
+
+# Bytes copied from git per read of a blob stream
+CHUNK_SIZE = 1 << 16
+
+
+class BlobStream(io.RawIOBase):
+    """Binary stream over one blob of a `git cat-file --batch` response."""
+
+    def __init__(self, pipe, size):
+        super().__init__()
+        self._pipe = pipe
+        self.remaining = size
+        self.superseded = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.superseded:
+            raise OSError("Blob stream was cut short by a later request on the same reader")
+        count = min(len(buffer), self.remaining)
+        if count == 0:
+            return 0
+        data = self._pipe.read(count)
+        if not data:
+            raise EOFError("git cat-file exited in the middle of a blob")
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+    def drain(self):
+        """Skip the rest of the blob and its trailing newline so the next request can be read."""
+        unread = self.remaining > 0
+        while self.remaining:
+            self.read(min(self.remaining, CHUNK_SIZE))
+        self._pipe.read(1)
+        # Readers still holding this stream must not mistake the skipped part for the end of the blob
+        self.superseded = unread
+
+
+class GitObjectReader:
+    """
+    Read blobs through one long-lived `git cat-file --batch` process, so comparing two
+    revisions of every section costs one git process instead of one `git show` per file.
+    """
+
+    def __init__(self, cwd=None):
+        self.cwd = cwd
+        self._process = None
+        self._current = None
+        self._toplevel = None
+
+    def _start(self):
+        if self._process is None or self._process.poll() is not None:
+            self._toplevel = subprocess.run(
+                ["git", "rev-parse", "--show-toplevel"], cwd=self.cwd, capture_output=True, text=True, check=True
+            ).stdout.strip()
+            self._process = subprocess.Popen(
+                ["git", "cat-file", "--batch"], cwd=self.cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+            )
+            self._current = None
+        return self._process
+
+    def object_name(self, file_path, rev):
+        """Build "<rev>:<path>" for a file; cat-file wants paths relative to the repository root."""
+        self._start()
+        base = os.path.abspath(os.path.join(self.cwd or os.getcwd(), file_path))
+        return f"{rev}:{os.path.relpath(base, self._toplevel).replace(os.sep, '/')}"
+
+    def open(self, object_name):
+        """
+        :param object_name: Any name git understands ("HEAD:path", ":path" for the index, a blob ID)
+        :return: BlobStream of the blob content, or None if the object does not exist
+        """
+        process = self._start()
+        # A previous blob that was not read to the end is still in the pipe
+        if self._current is not None:
+            self._current.drain()
+            self._current = None
+
+        process.stdin.write(object_name.encode("utf-8") + b"\n")
+        process.stdin.flush()
+        header = process.stdout.readline().decode("utf-8").split()
+        if len(header) != 3:
+            # "<name> missing" or "<name> ambiguous"
+            return None
+        _, object_type, size = header
+        self._current = BlobStream(process.stdout, int(size))
+        if object_type != "blob":
+            self._current.drain()
+            self._current = None
+            return None
+        return self._current
+
+    def read(self, object_name):
+        """:return: Bytes of the blob, or None if it does not exist"""
+        stream = self.open(object_name)
+        return None if stream is None else stream.read()
+
+    def open_text(self, object_name, encoding="utf-8"):
+        """:return: Text stream of the blob, or None if it does not exist"""
+        stream = self.open(object_name)
+        return None if stream is None else io.TextIOWrapper(io.BufferedReader(stream, CHUNK_SIZE), encoding=encoding)
+
+    def close(self):
+        if self._process is not None:
+            self._process.stdin.close()
+            self._process.wait()
+            self._process.stdout.close()
+            self._process = None
+            self._current = None
+
+
+_reader = None
+
+
+# Function to get the shared reader of the current repository
+def default_reader():
+    global _reader
+    if _reader is None:
+        _reader = GitObjectReader()
+        atexit.register(_reader.close)
+    return _reader
+
+
+# Function to read a file at a revision as bytes (None if missing)
+def read_file(file_path, rev):
+    reader = default_reader()
+    return reader.read(reader.object_name(file_path, rev))
+
+
+# Function to open a file at a revision as a text stream (None if missing)
+def open_file(file_path, rev):
+    reader = default_reader()
+    return reader.open_text(reader.object_name(file_path, rev))
@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import time
+import atexit
+import contextlib
+import multiprocessing
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Append one JSON line per script run to this file (unset: nothing is written)
+METRICS_FILE = os.getenv("PIPELINE_METRICS_FILE")
+
+# "cprofile" or "pyinstrument" to capture a profile of every stage
+PROFILER = os.getenv("PIPELINE_PROFILE", "").lower()
+# Optional comma-separated stage names to profile (default: all)
+PROFILE_STAGES = {name.strip() for name in os.getenv("PIPELINE_PROFILE_STAGES", "").split(",") if name.strip()}
+PROFILE_DIR = os.getenv("PIPELINE_PROFILE_DIR", ".cache/profiles")
+
+SCRIPT = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+
+
+# Function to get the peak resident set size of this process or of its finished children, in MB
+def peak_rss_mb(children=False):
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss * unit / 2 ** 20, 2)
+
+
+class Profile:
+    """cProfile or pyinstrument capture of one stage, saved under PROFILE_DIR."""
+
+    def __init__(self, kind, stage_name):
+        self.kind = kind
+        self.stage_name = stage_name
+        self.path = None
+        if kind == "pyinstrument":
+            try:
+                import pyinstrument
+                self._profiler = pyinstrument.Profiler()
+            except ImportError:
+                print("⚠️ pyinstrument is not installed, falling back to cProfile")
+                self.kind = "cprofile"
+        if self.kind == "cprofile":
+            import cProfile
+            self._profiler = cProfile.Profile()
+
+    def __enter__(self):
+        self._profiler.enable() if self.kind == "cprofile" else self._profiler.start()
+        return self
+
+    def __exit__(self, *exc):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+        base = os.path.join(PROFILE_DIR, f"{SCRIPT}-{self.stage_name.replace('/', '.')}-{stamp}")
+        if self.kind == "cprofile":
+            self._profiler.disable()
+            self.path = f"{base}.prof"
+            self._profiler.dump_stats(self.path)
+        else:
+            self._profiler.stop()
+            self.path = f"{base}.html"
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(self._profiler.output_html())
+        print(f"🔬 Profile of {self.stage_name} saved to {self.path}")
+        return False
+
+
+class Metrics:
+    """Stage timings, peak RSS and per-section counters of one script run."""
+
+    def __init__(self, script=SCRIPT):
+        self.script = script
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self._start = time.perf_counter()
+        self.stages = []
+        self.counters = {}
+        self._stack = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Time a block of work. Nested stages are recorded as "outer/inner". Counters added
+        while the stage runs are attached to it as well as to the run totals.
+
+        ru_maxrss is a process-wide high-water mark, so a stage records the process peak so far
+        (`process_peak_rss_mb`) and how much the stage raised it (`peak_rss_growth_mb`, 0 when an
+        earlier stage already used more memory).
+        """
+        path = f"{self._stack[-1]['name']}/{name}" if self._stack else name
+        entry = {"name": path, "seconds": None, "process_peak_rss_mb": None, "peak_rss_growth_mb": None, "counters": {}}
+        self._stack.append(entry)
+        profile = Profile(PROFILER, path) if PROFILER and (not PROFILE_STAGES or name in PROFILE_STAGES) else None
+        start = time.perf_counter()
+        start_peak = peak_rss_mb()
+        try:
+            with profile or contextlib.nullcontext():
+                yield entry
+        finally:
+            entry["seconds"] = round(time.perf_counter() - start, 4)
+            entry["process_peak_rss_mb"] = peak_rss_mb()
+            if start_peak is not None:
+                entry["peak_rss_growth_mb"] = round(entry["process_peak_rss_mb"] - start_peak, 2)
+            if profile is not None and profile.path:
+                entry["profile"] = profile.path
+            self._stack.pop()
+            self.stages.append(entry)
+
+    def count(self, name, value=1, section=None):
+        """Add to a counter (e.g. rows written), optionally per section."""
+        targets = [self.counters] + [entry["counters"] for entry in self._stack]
+        for counters in targets:
+            if section is not None:
+                counters = counters.setdefault(section, {})
+            counters[name] = counters.get(name, 0) + value
+
+    def report(self):
+        return {
+            "script": self.script,
+            "started_at": self.started_at,
+            "seconds": round(time.perf_counter() - self._start, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "children_peak_rss_mb": peak_rss_mb(children=True),
+            "stages": self.stages,
+            "counters": self.counters,
+        }
+
+    def write(self, metrics_file):
+        """Append this run as one JSON line."""
+        os.makedirs(os.path.dirname(metrics_file) or ".", exist_ok=True)
+        with open(metrics_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.report(), ensure_ascii=False) + "\n")
+        print(f"📈 Metrics appended to {metrics_file}")
+
+
+# Shared collector of the running script
+metrics = Metrics()
+
+
+# Function to time a stage of the running script
+def stage(name):
+    return metrics.stage(name)
+
+
+# Function to add to a counter of the running script
+def count(name, value=1, section=None):
+    metrics.count(name, value, section)
+
+
+# Function to write the metrics of the running script when it exits
+def _write_on_exit():
+    # Worker processes have no stages of their own and must not append partial runs
+    if METRICS_FILE and metrics.stages and multiprocessing.parent_process() is None:
+        metrics.write(METRICS_FILE)
+
+
+atexit.register(_write_on_exit)
@@ -0,0 +1,214 @@
+import os
+import glob
+import json
+import argparse
+import subprocess
+
+import entities
+import git_objects
+import instrumentation
+import json_stream
+import record_store
+
+# Revision markers: None reads the working tree, "" reads the git index
+WORKTREE = None
+INDEX = ""
+
+
+# Function to index records by key in a single pass
+def index_records(records, section=None):
+    """
+    Build a hash index of key -> rows, grouping Matrixify multi-row entities.
+
+    :param records: Iterable of section records (dicts)
+    :param section: Section name; when given (and RECORD_STORE is on), rows are kept in a columnar
+        record_store shared by the section's revisions instead of one dict per row
+    :return: Mapping of key -> list of rows, in file order
+    """
+    if section and record_store.USE_RECORD_STORE:
+        return record_store.index_records(records, section)
+    return {entity.key: entity.rows for entity in entities.SectionEntities(records)}
+
+
+# Function to compare the rows of one record field by field
+def diff_rows(old_rows, new_rows):
+    """
+    Compare two row lists position by position.
+
+    :return: List of (row_number, field, old_value, new_value) tuples
+    """
+    changes = []
+    for row_number in range(max(len(old_rows), len(new_rows))):
+        old_row = old_rows[row_number] if row_number < len(old_rows) else {}
+        new_row = new_rows[row_number] if row_number < len(new_rows) else {}
+        for field in new_row:
+            if field not in old_row or old_row[field] != new_row[field]:
+                changes.append((row_number + 1, field, old_row.get(field), new_row[field]))
+        for field in old_row:
+            if field not in new_row:
+                changes.append((row_number + 1, field, old_row[field], None))
+    return changes
+
+
+class SectionDiff:
+    """Added, removed and modified records of one section."""
+
+    def __init__(self, section):
+        self.section = section
+        self.added = []
+        self.removed = []
+        self.modified = {}  # key -> list of (row_number, field, old_value, new_value)
+        self.new_index = {}  # key -> rows of the new revision, kept for later pipeline stages
+        self.removed_rows = {}  # key -> first row of each removed entity, e.g. for DELETE commands
+
+    def changed_rows(self, extra_ids=()):
+        """Rows of every added or modified entity (and of extra_ids), in new-revision file order."""
+        changed = set(self.added) | set(self.modified) | set(extra_ids)
+        for key in self.new_index:
+            if key in changed:
+                yield from self.new_index[key]
+
+    @property
+    def changed_ids(self):
+        """Keys present in the new revision that were added or modified, in ID order."""
+        return sorted(self.added + list(self.modified), key=entities.order_key)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.modified)
+
+    def summary(self):
+        return f"{len(self.added)} added, {len(self.modified)} modified, {len(self.removed)} removed"
+
+
+# Function to diff two revisions of a section in one linear pass
+def diff_sections(section, old_records, new_records):
+    return diff_indexes(section, index_records(old_records, section), index_records(new_records, section))
+
+
+# Function to diff two indexed revisions of a section (see index_records)
+def diff_indexes(section, old_index, new_index):
+    section_diff = SectionDiff(section)
+    section_diff.new_index = new_index
+    if isinstance(new_index, record_store.StoreIndex) and new_index.shares_schema(old_index):
+        # Same schema: rows with equal 64-bit code hashes are taken as equal, so only rows that may differ are rebuilt
+        for key in new_index:
+            if key not in old_index:
+                section_diff.added.append(key)
+            elif old_index.hashes(key) != new_index.hashes(key):
+                old_rows, new_rows = old_index[key], new_index[key]
+                if old_rows != new_rows:
+                    section_diff.modified[key] = diff_rows(old_rows, new_rows)
+    else:
+        for key, new_rows in new_index.items():
+            old_rows = old_index.get(key)
+            if old_rows is None:
+                section_diff.added.append(key)
+            elif old_rows != new_rows:
+                section_diff.modified[key] = diff_rows(old_rows, new_rows)
+    section_diff.removed = [key for key in old_index if key not in new_index]
+    section_diff.removed_rows = {key: old_index[key][0] for key in section_diff.removed}
+    return section_diff
+
+
+# Function to load the records of a section file at a revision
+def load_revision(file_path, rev=WORKTREE):
+    """
+    Load a section JSON file from the working tree, the git index or a commit.
+
+    :param file_path: Path to the section file
+    :param rev: WORKTREE, INDEX or any git revision (e.g. "HEAD", "origin/main")
+    :return: List of records, empty if the file does not exist at that revision
+    """
+    if rev is WORKTREE:
+        storage_format = json_stream.detect_format(file_path)
+        if storage_format is None:
+            return []
+        if storage_format == json_stream.JSONL:
+            return list(json_stream.iter_records(file_path))
+        with open(file_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    return list(iter_revision(file_path, rev))
+
+
+# Function to stream the records of a section file at a revision
+def iter_revision(file_path, rev=WORKTREE):
+    """
+    Revisions are read through the shared `git cat-file --batch` process and parsed as the
+    blob streams in, without touching the working tree. Consume one revision at a time.
+    """
+    if rev is WORKTREE:
+        return json_stream.iter_records(file_path)
+    stream = git_objects.open_file(file_path, rev)
+    if stream is None:
+        return iter(())
+    return json_stream.iter_section_stream(stream)
+
+
+# Function to list section files present in a directory at a revision
+def list_section_files(repo_dir, rev=WORKTREE):
+    if rev is WORKTREE:
+        return glob.glob(os.path.join(repo_dir, "*.json"))
+
+    if rev == INDEX:
+        command = ["git", "ls-files", "--", os.path.join(repo_dir, "")]
+    else:
+        command = ["git", "ls-tree", "--name-only", rev, "--", os.path.join(repo_dir, "")]
+    result = subprocess.run(command, capture_output=True, text=True)
+    return [path for path in result.stdout.splitlines() if path.endswith(".json")]
+
+
+# Function to diff a single section file between two revisions
+def diff_file(file_path, base_rev, head_rev=WORKTREE):
+    section = os.path.splitext(os.path.basename(file_path))[0]
+    return diff_sections(section, load_revision(file_path, base_rev), load_revision(file_path, head_rev))
+
+
+# Function to diff a list of section files between two revisions
+def diff_files(file_paths, base_rev, head_rev=WORKTREE):
+    diffs = {}
+    for file_path in file_paths:
+        section_diff = diff_file(file_path, base_rev, head_rev)
+        diffs[section_diff.section] = section_diff
+        for name in ("added", "modified", "removed"):
+            instrumentation.count(name, len(getattr(section_diff, name)), section_diff.section)
+        print(f"🔍 {section_diff.section}: {section_diff.summary()}")
+    return diffs
+
+
+# Function to diff every section file of a directory between two revisions
+def diff_directory(repo_dir, base_rev, head_rev=WORKTREE):
+    file_names = {os.path.basename(path) for path in list_section_files(repo_dir, base_rev)}
+    file_names.update(os.path.basename(path) for path in list_section_files(repo_dir, head_rev))
+    return diff_files([os.path.join(repo_dir, name) for name in sorted(file_names)], base_rev, head_rev)
+
+
+# Function to write section -> IDs lists in the format read by extract-changes-only.py
+def write_id_lists(changed_ids, output_file_path):
+    os.makedirs(os.path.dirname(output_file_path) or ".", exist_ok=True)
+    with open(output_file_path, "w", encoding="utf-8") as output_file:
+        for section, ids in changed_ids.items():
+            # The entity without ID or Handle cannot be selected by ID
+            ids = [key for key in ids if key is not None]
+            if ids:
+                output_file.write(f"{section} -> {', '.join(ids)}\n")
+    print(f"✅ Extracted IDs written to {output_file_path}")
+
+
+# Function to write the changed IDs of section diffs
+def write_changed_ids(diffs, output_file_path):
+    write_id_lists({section: section_diff.changed_ids for section, section_diff in diffs.items()}, output_file_path)
+
+
+if __name__ == "__main__":
+    # Detect if running in GitHub Actions
+    GITHUB_WORKSPACE = os.getenv("GITHUB_WORKSPACE", os.getcwd())
+
+    parser = argparse.ArgumentParser(description="Diff repo-shopify-data sections record by record.")
+    parser.add_argument("--base", default=INDEX, help="Base revision (default: git index)")
+    parser.add_argument("--head", default=WORKTREE, help="Head revision (default: working tree)")
+    parser.add_argument("--repo-dir", default=os.path.join(GITHUB_WORKSPACE, "repo-shopify-data"))
+    parser.add_argument("--output", default=os.path.join(GITHUB_WORKSPACE, "changes/id-output/changed_ids.txt"))
+    args = parser.parse_args()
+
+    write_changed_ids(diff_directory(args.repo_dir, args.base, args.head), args.output)
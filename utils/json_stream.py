@@ -0,0 +1,327 @@
+import os
+import sys
+import json
+import argparse
+
+import entities
+
+# Characters read from disk per refill of the parse buffer
+CHUNK_SIZE = 1 << 16
+
+# Indentation used by array section files (json.dump(..., indent=4))
+INDENT = 4
+
+# Section storage formats: a pretty-printed JSON array, or one record per line (JSONL)
+ARRAY = "array"
+JSONL = "jsonl"
+FORMATS = (ARRAY, JSONL)
+
+# Format of newly written section files; existing files keep the format they are stored in
+STORAGE_FORMAT = os.getenv("SECTION_FORMAT", ARRAY)
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+# Function to skip whitespace in the parse buffer
+def _skip_whitespace(buffer, pos):
+    while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+# Function to stream the elements of a top-level JSON array from a text stream
+def iter_json_array(stream, chunk_size=CHUNK_SIZE):
+    """
+    Yield the elements of a JSON array one at a time without loading the whole document.
+
+    :param stream: Text stream positioned at the start of a JSON array
+    :param chunk_size: Number of characters to read per refill
+    :return: Generator of decoded elements
+    """
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def refill():
+        nonlocal buffer, pos, eof
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    # Find the opening bracket
+    while True:
+        pos = _skip_whitespace(buffer, pos)
+        if pos < len(buffer) or eof:
+            break
+        refill()
+    if pos >= len(buffer) or buffer[pos] != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+
+    expect_element = True
+    after_comma = False
+    while True:
+        pos = _skip_whitespace(buffer, pos)
+        if pos >= len(buffer):
+            if eof:
+                raise ValueError("Unterminated JSON array")
+            refill()
+            continue
+
+        if buffer[pos] == "]":
+            if expect_element and after_comma:
+                raise ValueError("Trailing comma in JSON array")
+            return
+        if not expect_element:
+            if buffer[pos] != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {buffer[pos]!r}")
+            pos += 1
+            expect_element = after_comma = True
+            continue
+
+        # Decode the next element, reading more input until it is complete
+        try:
+            element, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            refill()
+            continue
+        if end == len(buffer) and not eof:
+            # A scalar at the end of the buffer may continue in the next chunk
+            refill()
+            continue
+
+        yield element
+        pos = end
+        expect_element = False
+        if pos > chunk_size:
+            buffer = buffer[pos:]
+            pos = 0
+
+
+# Function to stream the records of a JSONL text stream (one JSON value per line)
+def iter_json_lines(stream, chunk_size=CHUNK_SIZE):
+    pending = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (pending + chunk).split("\n")
+        # JSON strings escape newlines, so only the last piece can be an incomplete record
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if pending.strip():
+        yield json.loads(pending)
+
+
+class _Prefixed:
+    """Text stream that replays an already-read prefix before the rest of the stream."""
+
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def read(self, size=-1):
+        if not self.prefix:
+            return self.stream.read(size)
+        data, self.prefix = self.prefix, ""
+        return data
+
+
+# Function to get the storage format of a text stream from its first character
+def _sniff(stream, chunk_size=CHUNK_SIZE):
+    """
+    :return: (ARRAY, JSONL or None for an empty stream, stream positioned at the start again)
+    """
+    prefix = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        prefix += chunk
+        content = prefix.lstrip(_WHITESPACE)
+        if content or not chunk:
+            break
+    if not content:
+        return None, _Prefixed(prefix, stream)
+    return (JSONL if content[0] == "{" else ARRAY), _Prefixed(prefix, stream)
+
+
+# Function to stream the records of a section from a text stream in either storage format
+def iter_section_stream(stream, chunk_size=CHUNK_SIZE):
+    storage_format, stream = _sniff(stream, chunk_size)
+    if storage_format == JSONL:
+        return iter_json_lines(stream, chunk_size)
+    if storage_format is None:
+        return iter(())
+    return iter_json_array(stream, chunk_size)
+
+
+# Function to get the storage format of a section file (None when it is missing or empty)
+def detect_format(file_path):
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path, "r", encoding="utf-8") as f:
+        return _sniff(f, 256)[0]
+
+
+# Function to stream the records of a section JSON file
+def iter_records(file_path):
+    """
+    Yield the records of a section file one at a time, in either storage format.
+    A missing file yields nothing.
+
+    :param file_path: Path to the section JSON file
+    """
+    if not os.path.exists(file_path):
+        return
+    with open(file_path, "r", encoding="utf-8") as f:
+        yield from iter_section_stream(f)
+
+
+# Function to format one array element exactly as json.dump(..., indent=4) would
+def format_element(element, indent=INDENT):
+    prefix = " " * indent
+    return prefix + json.dumps(element, indent=indent).replace("\n", "\n" + prefix)
+
+
+class JsonArrayWriter:
+    """
+    Incrementally write a JSON array, one element at a time. The output is byte-identical
+    to json.dump(elements, f, indent=4), so rewritten section files do not churn in git.
+    """
+
+    def __init__(self, file_path, indent=INDENT):
+        self.file_path = file_path
+        self.indent = indent
+        self.count = 0
+        self._file = open(file_path, "w", encoding="utf-8")
+        self._file.write("[")
+
+    def write(self, element):
+        self._file.write(",\n" if self.count else "\n")
+        self._file.write(format_element(element, self.indent))
+        self.count += 1
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.write("\n]" if self.count else "]")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class JsonLinesWriter:
+    """
+    Write a section in the canonical JSONL layout: one compact record per line, every record's
+    keys in one stable order (the order columns first appear in), and entities ordered by ID
+    with the rows of each entity kept together. A changed record is then a one-line git diff.
+    """
+
+    def __init__(self, file_path, ordered=True):
+        self.file_path = file_path
+        self.ordered = ordered
+        self.count = 0
+        self.columns = {}
+        self._last_keys = None
+        self._entities = []  # (sort key, lines) of every entity, written sorted on close
+        self._file = open(file_path, "w", encoding="utf-8")
+
+    def format(self, record):
+        keys = tuple(record)
+        if keys != self._last_keys:
+            for key in keys:
+                self.columns.setdefault(key, len(self.columns))
+            ordered_keys = sorted(keys, key=self.columns.__getitem__)
+            self._last_keys = keys if list(keys) == ordered_keys else None
+            if self._last_keys is None:
+                record = {key: record[key] for key in ordered_keys}
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    def write_entity(self, key, rows):
+        lines = "".join(self.format(row) for row in rows)
+        if self.ordered:
+            self._entities.append((entities.order_key(key), lines))
+        else:
+            self._file.write(lines)
+        self.count += len(rows)
+
+    def write(self, element):
+        self.write_entity(entities.record_key(element), [element])
+
+    def close(self):
+        if self._file.closed:
+            return
+        # Stable sort: entities with the same key keep their file order
+        self._entities.sort(key=lambda entity: entity[0])
+        for _, lines in self._entities:
+            self._file.write(lines)
+        self._entities = []
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# Function to pick the storage format a section file is written in
+def output_format(file_path, storage_format=None):
+    """
+    :return: storage_format if given, else the format the file is already stored in, else STORAGE_FORMAT
+    """
+    return storage_format or detect_format(file_path) or STORAGE_FORMAT
+
+
+# Function to write records to a section JSON file incrementally
+def write_records(file_path, records, indent=INDENT, storage_format=None):
+    """
+    :param file_path: Output path
+    :param records: Iterable of records, consumed one at a time
+    :param storage_format: ARRAY or JSONL (default: see output_format)
+    :return: Number of records written
+    """
+    if output_format(file_path, storage_format) == JSONL:
+        with JsonLinesWriter(file_path) as writer:
+            for entity in entities.iter_entities(records):
+                writer.write_entity(entity.key, entity.rows)
+        return writer.count
+
+    with JsonArrayWriter(file_path, indent) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
+# Function to rewrite a section file in a storage format
+def convert_file(file_path, storage_format):
+    """
+    :return: Number of records written
+    """
+    temp_path = f"{file_path}.tmp"
+    count = write_records(temp_path, iter_records(file_path), storage_format=storage_format)
+    os.replace(temp_path, file_path)
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert section files between the JSON array and JSONL layouts.")
+    parser.add_argument("files", nargs="+", help="Section JSON files, rewritten in place")
+    parser.add_argument("--format", choices=FORMATS, default=JSONL, help="Target storage format (default: jsonl)")
+    args = parser.parse_args()
+
+    for file_path in args.files:
+        if detect_format(file_path) is None:
+            print(f"⚠️ Skipping empty or missing file: {file_path}", file=sys.stderr)
+            continue
+        print(f"✅ {file_path}: {convert_file(file_path, args.format)} records written as {args.format}")
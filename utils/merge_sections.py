@@ -0,0 +1,241 @@
+import os
+import sys
+import argparse
+import subprocess
+from datetime import datetime
+
+import entities
+import json_stream
+import instrumentation
+
+# Name of the merge driver in .gitattributes (merge=shopify-sections)
+DRIVER_NAME = "shopify-sections"
+
+# Fields where both sides changing the value is resolved by taking the later timestamp
+LATEST_WINS_FIELDS = ("Updated At",)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S %z"
+
+# Conflicts printed per file (all of them are counted)
+MAX_REPORTED_CONFLICTS = 50
+
+# Marks a record, row or field that does not exist on one side
+MISSING = object()
+
+
+# Function to load a section as entity key -> list of rows, in file order
+def load_entities(file_path):
+    """
+    :param file_path: Section JSON file; an empty or missing file (no merge base) has no entities
+    :return: (dictionary of entity key -> rows, True if the rows carry a Row # counter)
+    """
+    if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+        return {}, False
+    result = {}
+    numbered = False
+    for entity in entities.SectionEntities(json_stream.iter_records(file_path)):
+        for row in entity.rows:
+            # The counter shifts on every insertion above a row, so it is not compared
+            if entities.ROW_NUMBER_FIELD in row:
+                row[entities.ROW_NUMBER_FIELD] = ""
+                numbered = True
+        result[entity.key] = entity.rows
+    return result, numbered
+
+
+# Function to order the keys of a 3-way merge: ours, with keys only in theirs after their predecessor
+def merged_order(ours, theirs):
+    inserted = {}
+    previous = None
+    for key in theirs:
+        if key in ours:
+            previous = key
+        else:
+            inserted.setdefault(previous, []).append(key)
+
+    order = list(inserted.get(None, []))
+    for key in ours:
+        order.append(key)
+        order.extend(inserted.get(key, []))
+    return order
+
+
+# Function to 3-way merge two ordered mappings, calling merge_both for keys changed on both sides
+def merge_mappings(base, ours, theirs, merge_both, conflicts, location):
+    """
+    :param base, ours, theirs: Ordered dictionaries of key -> value
+    :param merge_both: Function (key, base value, our value, their value) -> merged value, for
+        keys modified differently on both sides
+    :param conflicts: List that delete/modify conflicts are appended to
+    :param location: Description of where the mappings are, for conflict reports
+    :return: Ordered dictionary of key -> merged value (deleted keys are left out)
+    """
+    merged = {}
+    for key in merged_order(ours, theirs):
+        base_value = base.get(key, MISSING)
+        our_value = ours.get(key, MISSING)
+        their_value = theirs.get(key, MISSING)
+        if our_value == their_value or base_value == their_value:
+            value = our_value
+        elif base_value == our_value:
+            value = their_value
+        elif our_value is MISSING or their_value is MISSING:
+            # Deleted on one side, modified on the other: keep the modification
+            value = their_value if our_value is MISSING else our_value
+            conflicts.append({**location, "key": key, "base": describe(base_value, "(original)"),
+                              "ours": describe(our_value, "(changed)"), "theirs": describe(their_value, "(changed)")})
+        else:
+            value = merge_both(key, base_value, our_value, their_value)
+        if value is not MISSING:
+            merged[key] = value
+    return merged
+
+
+# Function to describe a value in a conflict report (whole records and rows by a label)
+def describe(value, label=None):
+    if value is MISSING:
+        return "(deleted)"
+    return label if isinstance(value, (list, dict)) else value
+
+
+# Function to index the rows of an entity by their row key
+def keyed_rows(rows):
+    result = {}
+    occurrences = {}
+    for row in rows:
+        row_key = next((str(row[field]) for field in entities.ROW_KEY_FIELDS if row.get(field) not in (None, "")), "")
+        # Rows without a key (or with a repeated one) are matched by occurrence
+        occurrences[row_key] = occurrences.get(row_key, 0) + 1
+        if not row_key or occurrences[row_key] > 1:
+            row_key = f"{row_key}#{occurrences[row_key]}"
+        result[row_key] = row
+    return result
+
+
+# Function to pick the later of two timestamps (the first one if either cannot be parsed)
+def latest(first, second):
+    try:
+        return first if datetime.strptime(first, TIMESTAMP_FORMAT) >= datetime.strptime(second, TIMESTAMP_FORMAT) else second
+    except (TypeError, ValueError):
+        return first
+
+
+# Function to merge one row field by field
+def merge_row(section, entity_key, row_key, base_row, our_row, their_row, conflicts):
+    def merge_field(field, base_value, our_value, their_value):
+        if field in LATEST_WINS_FIELDS:
+            return latest(our_value, their_value)
+        conflicts.append({
+            "section": section, "entity": entity_key, "row": row_key, "key": field,
+            "base": describe(base_value), "ours": our_value, "theirs": their_value,
+        })
+        return our_value
+
+    location = {"section": section, "entity": entity_key, "row": row_key}
+    return merge_mappings({} if base_row is MISSING else base_row, our_row, their_row, merge_field, conflicts, location)
+
+
+# Function to merge the rows of one entity changed on both sides
+def merge_entity(section, entity_key, base_rows, our_rows, their_rows, conflicts):
+    def merge_both(row_key, base_row, our_row, their_row):
+        return merge_row(section, entity_key, row_key, base_row, our_row, their_row, conflicts)
+
+    location = {"section": section, "entity": entity_key, "row": None}
+    rows = list(merge_mappings(keyed_rows([] if base_rows is MISSING else base_rows), keyed_rows(our_rows), keyed_rows(their_rows),
+                               merge_both, conflicts, location).values())
+
+    # Rows may have moved, so only the first row keeps the "Top Row" flag
+    top_value = next((row[entities.TOP_ROW_FIELD] for row in our_rows + their_rows if entities.is_top_row(row)), None)
+    if top_value is not None:
+        for position, row in enumerate(rows):
+            if entities.TOP_ROW_FIELD in row:
+                row[entities.TOP_ROW_FIELD] = top_value if position == 0 else ""
+    return rows
+
+
+# Function to 3-way merge the records of a section
+def merge_sections(base, ours, theirs, section=""):
+    """
+    Match entities by ID/Handle, take whole entities changed on one side only, and merge
+    entities changed on both sides row by row and field by field.
+
+    :param base, ours, theirs: Dictionaries of entity key -> rows (see load_entities)
+    :return: (merged rows, list of conflict dictionaries)
+    """
+    conflicts = []
+
+    def merge_both(entity_key, base_rows, our_rows, their_rows):
+        return merge_entity(section, entity_key, base_rows, our_rows, their_rows, conflicts)
+
+    location = {"section": section, "entity": None, "row": None}
+    merged = merge_mappings(base, ours, theirs, merge_both, conflicts, location)
+    rows = [row for entity_rows in merged.values() for row in entity_rows]
+    return rows, conflicts
+
+
+# Function to merge three versions of a section file into the current (ours) file
+def merge_files(base_path, our_path, their_path, output_path=None, section=None):
+    """
+    :return: List of conflicts; on a conflict our value is kept, so the output is always valid JSON
+    """
+    section = section or os.path.splitext(os.path.basename(output_path or our_path))[0]
+    with instrumentation.stage("merge"):
+        base, _ = load_entities(base_path)
+        ours, our_numbered = load_entities(our_path)
+        theirs, their_numbered = load_entities(their_path)
+        rows, conflicts = merge_sections(base, ours, theirs, section)
+
+        if our_numbered or their_numbered:
+            for number, row in enumerate(rows, 1):
+                if entities.ROW_NUMBER_FIELD in row:
+                    row[entities.ROW_NUMBER_FIELD] = str(number)
+
+        count = json_stream.write_records(output_path or our_path, rows)
+        instrumentation.count("rows_merged", count, section)
+        instrumentation.count("merge_conflicts", len(conflicts), section)
+    return conflicts
+
+
+# Function to print the conflicts of a merge
+def report_conflicts(file_path, conflicts):
+    print(f"❌ {file_path}: {len(conflicts)} conflicting fields (our values were kept)", file=sys.stderr)
+    for conflict in conflicts[:MAX_REPORTED_CONFLICTS]:
+        where = " / ".join(str(part) for part in (conflict["entity"], conflict["row"]) if part)
+        print(f"   {where} [{conflict['key']}]: base={conflict['base']!r} ours={conflict['ours']!r} "
+              f"theirs={conflict['theirs']!r}", file=sys.stderr)
+    if len(conflicts) > MAX_REPORTED_CONFLICTS:
+        print(f"   ... and {len(conflicts) - MAX_REPORTED_CONFLICTS} more", file=sys.stderr)
+
+
+# Function to register the merge driver in the repository's git config
+def install(repo_dir="."):
+    toplevel = subprocess.check_output(["git", "rev-parse", "--show-toplevel"], cwd=repo_dir, text=True).strip()
+    script = os.path.abspath(__file__)
+    if script.startswith(toplevel + os.sep):
+        script = os.path.relpath(script, toplevel)
+    subprocess.run(["git", "config", f"merge.{DRIVER_NAME}.name", "Record-level merge of Shopify section JSON"],
+                   cwd=repo_dir, check=True)
+    # Git runs merge drivers from the top of the working tree
+    subprocess.run(["git", "config", f"merge.{DRIVER_NAME}.driver", f"python3 {script} %O %A %B %P"],
+                   cwd=repo_dir, check=True)
+    print(f"✅ Merge driver '{DRIVER_NAME}' installed (python3 {script})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Git merge driver for section JSON files: python3 merge_sections.py %O %A %B %P")
+    parser.add_argument("base", nargs="?", help="Common ancestor version (%%O)")
+    parser.add_argument("ours", nargs="?", help="Current version, overwritten with the result (%%A)")
+    parser.add_argument("theirs", nargs="?", help="Other branch's version (%%B)")
+    parser.add_argument("path", nargs="?", help="Path of the file in the repository (%%P)")
+    parser.add_argument("--install", action="store_true", help="Register the driver in this repository's git config")
+    args = parser.parse_args()
+
+    if args.install:
+        install()
+        sys.exit(0)
+    if not (args.base and args.ours and args.theirs):
+        parser.error("base, ours and theirs are required")
+
+    conflicts = merge_files(args.base, args.ours, args.theirs, section=os.path.splitext(os.path.basename(args.path or args.ours))[0])
+    if conflicts:
+        report_conflicts(args.path or args.ours, conflicts)
+        sys.exit(1)
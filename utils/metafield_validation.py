@@ -0,0 +1,277 @@
+import os
+import re
+import sys
+import json
+import glob
+import argparse
+import functools
+from collections import namedtuple
+
+import pandas as pd
+
+import json_stream
+import references
+import fingerprints
+
+# "warn" prints invalid metafield values, "strict" also fails the conversion, "off" skips the checks
+VALIDATION_MODE = os.getenv("METAFIELD_VALIDATION", "warn")
+
+# Longest metafield value accepted, in characters
+VALUE_LIMIT = int(os.getenv("METAFIELD_VALUE_LIMIT", "65535"))
+
+# Invalid values printed per column (all of them are counted)
+MAX_REPORTED_VALUES = 5
+
+# "Metafield: page.campaign_list [json]", "Metafield: custom.related [list.page_reference]"
+COLUMN_PATTERN = re.compile(r"^Metafield: (?P<key>.+) \[(?P<list>list\.)?(?P<type>\w+)\]$")
+
+GID = r"gid://shopify/\w+/\d+"
+HANDLE = r"[\w-]+"
+
+# Value formats of each metafield type (fully matched); types not listed only get the length check
+TYPE_PATTERNS = {
+    "boolean": r"(?i:true|false)",
+    "number_integer": r"[+-]?\d+",
+    "number_decimal": r"[+-]?\d+(?:\.\d+)?",
+    "date": r"\d{4}-\d{2}-\d{2}",
+    "date_time": r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|\s?[+-]\d{2}:?\d{2})?",
+    "color": r"#[0-9A-Fa-f]{6}",
+    "url": r"(?:https?://|mailto:|sms:|tel:|/)\S*",
+    "single_line_text_field": r"[^\r\n]*",
+    # Matrixify writes metaobject references as "<definition handle>.<handle>"
+    "metaobject_reference": rf"{GID}|{HANDLE}\.{HANDLE}",
+    "page_reference": rf"{GID}|{HANDLE}",
+    "collection_reference": rf"{GID}|{HANDLE}",
+    "product_reference": rf"{GID}|{HANDLE}",
+    "variant_reference": rf"{GID}|\d+",
+    "file_reference": rf"{GID}|\S[^\r\n]*",
+}
+
+ColumnType = namedtuple("ColumnType", ["key", "type", "is_list"])
+
+
+# Function to parse the Shopify type in a metafield column header
+def parse_column(column):
+    """
+    :return: ColumnType, or None for columns that are not typed metafields
+    """
+    match = COLUMN_PATTERN.match(column)
+    if match is None:
+        return None
+    return ColumnType(match.group("key"), match.group("type"), bool(match.group("list")))
+
+
+# Function to check that text is well-formed JSON
+def is_json(text):
+    try:
+        json.loads(text)
+        return True
+    except ValueError:
+        return False
+
+
+# Function to compile the checks of a set of columns once (sheets of a section share their header)
+@functools.lru_cache(maxsize=None)
+def compile_checks(columns):
+    """
+    :param columns: Tuple of column names
+    :return: List of (column, ColumnType, compiled pattern or None)
+    """
+    checks = []
+    for column in columns:
+        column_type = parse_column(column)
+        if column_type is not None:
+            pattern = TYPE_PATTERNS.get(column_type.type)
+            checks.append((column, column_type, re.compile(pattern) if pattern else None))
+    return checks
+
+
+# Function to collect the names each section's entities can be referenced by
+@functools.lru_cache(maxsize=None)
+def reference_names(repo_dir):
+    """
+    Uses the sections' fresh reference indexes (see references.py) where they exist.
+
+    :return: (set of sections found, set of reference tokens: gids and section handle tokens)
+    """
+    sections = set()
+    names = set()
+    for section_file in sorted(glob.glob(os.path.join(repo_dir, "*.json"))):
+        section = os.path.splitext(os.path.basename(section_file))[0]
+        index = references.fresh_index(section_file, fingerprints.git_blob_id(section_file))
+        try:
+            if index is None:
+                index = references.section_references(section, json_stream.iter_records(section_file))
+        except ValueError as e:
+            # Its references are then not checked, like a section that is not there
+            print(f"⚠️ Skipping references of {section_file}: not valid JSON ({e})")
+            continue
+        sections.add(section)
+        names.update(token for tokens in index["names"].values() for token in tokens)
+    return sections, names
+
+
+# Function to get the reference token of each value of a reference column
+def reference_tokens(items, metafield_type, sections):
+    """
+    GIDs are looked up in their own section and handles in the section of the metafield type.
+
+    :return: Series of tokens, None where the referenced section is not available
+    """
+    gid_sections = {gid_type: section for section, gid_type in references.SECTION_GID_TYPES.items()}
+    is_gid = items.str.startswith("gid://shopify/")
+    gid_section = items.str.extract(r"^gid://shopify/(\w+)/\d+$", expand=False).map(gid_sections)
+    tokens = items.where(is_gid & gid_section.isin(list(sections)))
+
+    target = references.HANDLE_REFERENCE_SECTIONS.get(metafield_type)
+    if target in sections:
+        tokens = tokens.mask(~is_gid, references.handle_token(target, "") + items)
+    return tokens
+
+
+# Function to check one metafield column; every check runs on the whole column at once
+def check_column(column_type, pattern, values, names=None):
+    """
+    :param values: Series of cell values, indexed by row position
+    :param names: Optional (sections, tokens) from reference_names, for the reference existence check
+    :return: List of (row position, value, problem)
+    """
+    text = values.fillna("").astype(str)
+    items = text[text != ""]
+    if column_type.is_list:
+        # List values are JSON arrays (or one value per line); each item is checked on its own
+        items = items.map(references.split_values).explode().dropna().astype(str)
+    if items.empty:
+        return []
+    positions = items.index
+    items = items.reset_index(drop=True)
+
+    problems = [(items.str.len() > VALUE_LIMIT, f"longer than {VALUE_LIMIT} characters")]
+    if column_type.type == "json":
+        # Each distinct value is parsed once
+        unique = items.unique()
+        problems.append((~items.map(dict(zip(unique, map(is_json, unique)))).astype(bool), "invalid JSON"))
+    elif pattern is not None:
+        problems.append((~items.str.fullmatch(pattern).astype(bool), f"not a valid {column_type.type} value"))
+    if names is not None and column_type.type.endswith("_reference"):
+        tokens = reference_tokens(items, column_type.type, names[0])
+        problems.append((tokens.notna() & ~tokens.isin(names[1]), "references a record that does not exist"))
+
+    errors = []
+    reported = pd.Series(False, index=items.index)
+    for mask, problem in problems:
+        mask = mask & ~reported
+        reported |= mask
+        errors.extend((positions[index], items[index], problem) for index in mask[mask].index)
+    return errors
+
+
+# Function to validate the typed metafield columns of a section
+def validate_columns(section, columns, values, names=None):
+    """
+    :param columns: Column names, in order
+    :param values: Mapping (e.g. a DataFrame) or list of column values, matching columns
+    :param names: Optional (sections, tokens) from reference_names
+    :return: List of error dictionaries (section, row, column, value, problem)
+    """
+    errors = []
+    for column, column_type, pattern in compile_checks(tuple(columns)):
+        column_values = values[column] if hasattr(values, "keys") else values[list(columns).index(column)]
+        if not isinstance(column_values, pd.Series):
+            column_values = pd.Series(column_values, dtype=object)
+        for position, value, problem in check_column(column_type, pattern, column_values, names):
+            # Sheet row: the header is row 1
+            errors.append({"section": section, "row": position + 2, "column": column, "value": value, "problem": problem})
+    return errors
+
+
+# Function to validate the typed metafield columns of a DataFrame
+def validate_frame(df, section, reference_dir=None):
+    names = reference_names(reference_dir) if reference_dir and os.path.isdir(reference_dir) else None
+    return validate_columns(section, list(df.columns), df.reset_index(drop=True), names)
+
+
+# Function to print validation errors grouped by section, column and problem
+def report(errors, label=""):
+    """
+    :return: Number of errors
+    """
+    if not errors:
+        return 0
+    groups = {}
+    for error in errors:
+        groups.setdefault((error["section"], error["column"], error["problem"]), []).append(error)
+    print(f"❌ {label + ': ' if label else ''}{len(errors)} invalid metafield values")
+    for (section, column, problem), group in groups.items():
+        examples = ", ".join(f"row {error['row']}: {str(error['value'])[:60]!r}" for error in group[:MAX_REPORTED_VALUES])
+        more = f" (+{len(group) - MAX_REPORTED_VALUES} more)" if len(group) > MAX_REPORTED_VALUES else ""
+        print(f"   {section} / {column}: {len(group)} {problem} — {examples}{more}")
+    return len(errors)
+
+
+# Function to report errors and fail in strict mode
+def enforce(errors, label="", mode=None):
+    mode = mode or VALIDATION_MODE
+    report(errors, label)
+    if errors and mode == "strict":
+        raise ValueError(f"{len(errors)} invalid metafield values{' in ' + label if label else ''} (METAFIELD_VALIDATION=strict)")
+
+
+# Function to validate every section file of a directory
+def validate_directory(json_dir, reference_dir=None):
+    """
+    :return: List of error dictionaries
+    """
+    names = reference_names(reference_dir or json_dir)
+    errors = []
+    for json_file in sorted(glob.glob(os.path.join(json_dir, "*.json"))):
+        section = os.path.splitext(os.path.basename(json_file))[0]
+        try:
+            df = pd.DataFrame(list(json_stream.iter_records(json_file)), dtype=object)
+        except ValueError as e:
+            print(f"⚠️ Skipping {json_file}: not valid JSON ({e})")
+            continue
+        errors.extend(validate_columns(section, list(df.columns), df, names))
+    return errors
+
+
+# Function to validate every sheet of a Matrixify workbook
+def validate_workbook(file_path, reference_dir=None):
+    """
+    :return: List of error dictionaries
+    """
+    # Imported here: excel_import validates the sheets it converts with this module
+    import openpyxl
+    import excel_import
+
+    names = reference_names(reference_dir) if reference_dir and os.path.isdir(reference_dir) else None
+    workbook = openpyxl.load_workbook(file_path, read_only=True, keep_links=False)
+    sheet_names = workbook.sheetnames
+    workbook.close()
+    errors = []
+    for sheet in sheet_names:
+        columns, values = excel_import.read_sheet_columns(file_path, sheet)
+        errors.extend(validate_columns(sheet.replace(" ", "_"), columns, values, names))
+    return errors
+
+
+if __name__ == "__main__":
+    # Detect if running in GitHub Actions
+    GITHUB_WORKSPACE = os.getenv("GITHUB_WORKSPACE", os.getcwd())
+
+    parser = argparse.ArgumentParser(description="Validate the values of typed metafield columns in section JSON files or Matrixify workbooks.")
+    parser.add_argument("paths", nargs="*", default=[os.path.join(GITHUB_WORKSPACE, "repo-shopify-data")],
+                        help="Directories of section JSON files and/or .xlsx workbooks")
+    parser.add_argument("--reference-dir", help="Sections that references must exist in (default: the JSON directory; none for workbooks)")
+    args = parser.parse_args()
+
+    total = 0
+    for path in args.paths:
+        if path.endswith(".xlsx"):
+            found = validate_workbook(path, args.reference_dir)
+        else:
+            found = validate_directory(path, args.reference_dir)
+        total += report(found, path)
+        if not found:
+            print(f"✅ {path}: all metafield values are valid")
+    sys.exit(1 if total else 0)
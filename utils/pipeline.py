@@ -0,0 +1,197 @@
+import os
+import glob
+import argparse
+import subprocess
+
+import json_diff
+import json_stream
+import change_state
+import instrumentation
+import references
+import redirect_analyzer
+import delta_export
+import fingerprints
+import convertJSONToExcel_in_git
+from section_cache import SectionCache
+
+# Paths relative to the workspace root
+REPO_DIR = "repo-shopify-data"
+CHANGED_IDS_FILE = "changes/id-output/changed_ids.txt"
+CHANGE_ONLY_JSON_DIR = "changes/change-only-jsons"
+FINAL_EXPORT_DIR = "final-matrixify-export"
+CHANGE_ONLY_EXCEL_DIR = "changes/change-only-excel"
+
+# State of the previous run, used by --incremental (kept out of git, e.g. in the Actions cache)
+STATE_FILE = os.getenv("PIPELINE_STATE_FILE", ".cache/change-state.json")
+
+# Outputs staged by the single commit at the end of a run
+OUTPUT_PATHS = [
+    CHANGED_IDS_FILE, CHANGE_ONLY_JSON_DIR, FINAL_EXPORT_DIR, CHANGE_ONLY_EXCEL_DIR,
+    os.path.join(REPO_DIR, fingerprints.INDEX_DIR), os.path.join(REPO_DIR, references.INDEX_DIR),
+]
+
+
+# Function to remove files matching a pattern from a directory
+def clear_files(dir_path, pattern):
+    os.makedirs(dir_path, exist_ok=True)
+    for file_path in glob.glob(os.path.join(dir_path, pattern)):
+        os.remove(file_path)
+
+
+# Function to write the changed entities of each section from the in-memory diff
+def extract_changes(diffs, output_dir, referrers=None):
+    """
+    Write the rows of every added or modified entity to <output_dir>/<Section>.json.
+
+    :param diffs: Dictionary of section -> json_diff.SectionDiff
+    :param output_dir: Directory for the change-only JSON files
+    :param referrers: Optional dictionary of section -> unchanged keys to extract as well
+    :return: Dictionary of section -> number of rows written
+    """
+    clear_files(output_dir, "*.json")
+    referrers = referrers or {}
+    extracted = {}
+    for section, section_diff in diffs.items():
+        if not (section_diff.changed_ids or referrers.get(section)):
+            continue
+        output_file_path = os.path.join(output_dir, f"{section}.json")
+        rows = section_diff.changed_rows(referrers.get(section, ()))
+        extracted[section] = json_stream.write_records(output_file_path, rows)
+        instrumentation.count("rows_extracted", extracted[section], section)
+        print(f"✅ Extracted {extracted[section]} blocks for {section} and saved to {output_file_path}")
+
+    if not extracted:
+        print("✅ No relevant JSON changes extracted.")
+    return extracted
+
+
+# Function to convert the full and change-only sections to Excel
+def convert_to_excel(mode=convertJSONToExcel_in_git.EXCEL_WRITER_MODE, workers=convertJSONToExcel_in_git.EXCEL_WORKERS,
+                     diffs=None):
+    """
+    :param diffs: Dictionary of section -> json_diff.SectionDiff; when given, the change-only
+        workbook holds only the changed cells (CHANGE_EXPORT_MODE=delta) instead of whole entities
+    """
+    clear_files(FINAL_EXPORT_DIR, "*.xlsx")
+    cache = SectionCache(convertJSONToExcel_in_git.CONVERTER_VERSION)
+    if diffs is None:
+        return convertJSONToExcel_in_git.convert_all({
+            REPO_DIR: FINAL_EXPORT_DIR,
+            CHANGE_ONLY_JSON_DIR: CHANGE_ONLY_EXCEL_DIR,
+        }, cache, mode, workers)
+
+    generated_files = convertJSONToExcel_in_git.convert_all({REPO_DIR: FINAL_EXPORT_DIR}, cache, mode, workers)
+    clear_files(CHANGE_ONLY_EXCEL_DIR, "*.xlsx")
+    with instrumentation.stage("delta_export"):
+        delta_file = delta_export.write_delta_workbook(diffs, CHANGE_ONLY_EXCEL_DIR)
+    return generated_files + ([delta_file] if delta_file else [])
+
+
+# Function to commit (and optionally push) every pipeline output in one commit
+def commit_outputs(message, branch=None, push=False):
+    subprocess.run(["git", "config", "user.name", "github-actions"], check=True)
+    subprocess.run(["git", "config", "user.email", "github-actions@github.com"], check=True)
+
+    subprocess.run(["git", "add", "-A", "--"] + [path for path in OUTPUT_PATHS if os.path.exists(path)], check=True)
+
+    # ** Prevent empty commits **
+    if subprocess.run(["git", "diff", "--cached", "--quiet"]).returncode == 0:
+        print("✅ No new changes detected. Skipping commit.")
+        return False
+
+    subprocess.run(["git", "commit", "-m", message], check=True)
+
+    if push and branch:
+        if subprocess.run(["git", "push", "origin", branch]).returncode != 0:
+            print("⚠️ Push failed. Retrying after pulling latest changes...")
+            subprocess.run(["git", "pull", "--rebase", "origin", branch], check=True)
+            subprocess.run(["git", "push", "origin", branch], check=True)
+    return True
+
+
+class Pipeline:
+    """
+    Run diff → extract IDs → extract changes → convert in a single process, handing the
+    parsed sections from one stage to the next instead of re-reading them from disk.
+    """
+
+    def __init__(self, base_rev, head_rev=json_diff.WORKTREE):
+        self.base_rev = base_rev
+        self.head_rev = head_rev
+        self.timings = []  # List of (stage, seconds)
+
+    def stage(self, name, func, *args, **kwargs):
+        print(f"\n🚀 Stage: {name}")
+        with instrumentation.stage(name) as entry:
+            result = func(*args, **kwargs)
+        self.timings.append((name, entry["seconds"]))
+        print(f"⏱️ {name} finished in {entry['seconds']:.2f}s (process peak RSS {entry['process_peak_rss_mb']} MB, "
+              f"+{entry['peak_rss_growth_mb']} MB in this stage)")
+        return result
+
+    def timing_report(self):
+        lines = [f"{name}: {seconds:.2f}s" for name, seconds in self.timings]
+        lines.append(f"total: {sum(seconds for _, seconds in self.timings):.2f}s")
+        return "\n".join(lines)
+
+    def run(self, convert=True, commit=False, push=False, branch=None, excel_mode=None, workers=None,
+            incremental=False, state_file=STATE_FILE):
+        if incremental:
+            # Only sections whose base or head changed since the last run are re-read and rewritten
+            result = self.stage(
+                "incremental_extract", change_state.run_incremental,
+                REPO_DIR, CHANGE_ONLY_JSON_DIR, CHANGED_IDS_FILE, self.base_rev, self.head_rev, state_file,
+                include_referrers=references.INCLUDE_REFERRERS
+            )
+        else:
+            result = self.stage("diff", json_diff.diff_directory, REPO_DIR, self.base_rev, self.head_rev)
+            self.stage("extract_ids", json_diff.write_changed_ids, result, CHANGED_IDS_FILE)
+            referrers = {}
+            if references.INCLUDE_REFERRERS:
+                changed_ids = {section: section_diff.changed_ids for section, section_diff in result.items()}
+                referrers = self.stage("referrers", references.referrer_ids, REPO_DIR, changed_ids, self.head_rev)
+            self.stage("extract_changes", extract_changes, result, CHANGE_ONLY_JSON_DIR, referrers)
+        # Report redirect loops, chains and shadowed paths the change introduces
+        self.stage("redirects", redirect_analyzer.analyze_directory, REPO_DIR, os.path.join(CHANGE_ONLY_JSON_DIR, "Redirects.json"))
+        # Keep the fingerprint and reference indexes next to the sections up to date for later runs
+        self.stage("fingerprint_index", fingerprints.update_indexes, REPO_DIR)
+        self.stage("reference_index", references.update_indexes, REPO_DIR)
+        if convert:
+            diffs = None
+            if delta_export.CHANGE_EXPORT_MODE == "delta":
+                # The incremental path keeps no diffs in memory, so only the changed sections are diffed again
+                diffs = (self.stage("delta_diff", delta_export.section_diffs, REPO_DIR, self.base_rev, self.head_rev)
+                         if incremental else result)
+            self.stage("convert", convert_to_excel, excel_mode or convertJSONToExcel_in_git.EXCEL_WRITER_MODE, workers, diffs)
+
+        print("\n📊 Stage timings:\n" + self.timing_report())
+
+        if commit:
+            message = f"Update extracted changes and Excel exports after merging into {branch or 'HEAD'}"
+            self.stage("commit", commit_outputs, f"{message}\n\n{self.timing_report()}", branch, push)
+        return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the change capture and Excel export pipeline in one process.")
+    parser.add_argument("--base", required=True, help="Base revision to diff against (e.g. origin/main)")
+    parser.add_argument("--head", default=json_diff.WORKTREE, help="Head revision (default: working tree)")
+    parser.add_argument("--no-convert", action="store_true", help="Skip the JSON to Excel stage")
+    parser.add_argument("--excel-mode", choices=["pandas", "streaming"], help="Excel writer (default: EXCEL_WRITER_MODE)")
+    parser.add_argument("--workers", type=int, help="Worker processes for the streaming Excel writer")
+    parser.add_argument("--incremental", action="store_true", help="Reuse the previous run's state file")
+    parser.add_argument("--state-file", default=STATE_FILE, help="State file for --incremental")
+    parser.add_argument("--commit", action="store_true", help="Commit all outputs once at the end")
+    parser.add_argument("--push", action="store_true", help="Push the commit to --branch")
+    parser.add_argument("--branch", default=os.getenv("GITHUB_REF_NAME"), help="Branch to push to")
+    args = parser.parse_args()
+
+    # Run from the workspace root so every stage sees the same relative paths
+    os.chdir(os.getenv("GITHUB_WORKSPACE", os.getcwd()))
+
+    Pipeline(args.base, args.head).run(
+        convert=not args.no_convert, commit=args.commit, push=args.push, branch=args.branch,
+        excel_mode=args.excel_mode, workers=args.workers,
+        incremental=args.incremental, state_file=args.state_file
+    )
+    print("\n🎉 Pipeline completed successfully!")
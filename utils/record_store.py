@@ -0,0 +1,279 @@
+import os
+import sys
+import zlib
+import array
+import hashlib
+import weakref
+import argparse
+from collections.abc import Mapping
+
+import entities
+import json_stream
+
+# Keep loaded sections in columnar stores instead of one dict per row ("0" to turn off)
+USE_RECORD_STORE = os.getenv("RECORD_STORE", "1") != "0"
+
+# Values at least this long (Body HTML, Metaobject JSON values) are kept zlib-compressed until read
+LARGE_TEXT_CHARS = int(os.getenv("RECORD_STORE_LARGE_TEXT", "1024"))
+COMPRESSION_LEVEL = 1
+
+# Code 0 of every column: the row has no such field
+MISSING_CODE = 0
+_MISSING = object()
+
+
+class ColumnDictionary:
+    """
+    Dictionary encoding of one column: every distinct value is stored once and rows hold its code.
+    Large strings are stored compressed and found again by digest, so the plain text is not kept.
+    """
+
+    __slots__ = ("codes", "values")
+
+    def __init__(self):
+        self.codes = {}  # value (or digest of a large string) -> code
+        self.values = [_MISSING]  # code -> value, or compressed UTF-8 bytes for large strings
+
+    def encode(self, value):
+        large = isinstance(value, str) and len(value) >= LARGE_TEXT_CHARS
+        if large:
+            lookup = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        elif isinstance(value, str):
+            lookup = value
+        else:
+            # True == 1 == 1.0 would otherwise share a code
+            lookup = (type(value), value)
+        try:
+            code = self.codes.get(lookup)
+        except TypeError:
+            # Unhashable values (lists, objects) are not shared
+            code = None
+            lookup = _MISSING
+        if code is None:
+            code = len(self.values)
+            self.values.append(zlib.compress(value.encode("utf-8"), COMPRESSION_LEVEL) if large else value)
+            if lookup is not _MISSING:
+                self.codes[lookup] = code
+        return code
+
+    def decode(self, code):
+        value = self.values[code]
+        # JSON values are never bytes, so bytes are always a compressed large string
+        return zlib.decompress(value).decode("utf-8") if isinstance(value, bytes) else value
+
+    def __len__(self):
+        return len(self.values) - 1
+
+
+class SectionSchema:
+    """Column order and column dictionaries shared by every store of one section."""
+
+    def __init__(self, section=None):
+        self.section = section
+        self.dictionaries = {}  # column -> ColumnDictionary, in first-seen column order
+
+    @property
+    def columns(self):
+        return list(self.dictionaries)
+
+    def dictionary(self, column):
+        dictionary = self.dictionaries.get(column)
+        if dictionary is None:
+            dictionary = self.dictionaries[column] = ColumnDictionary()
+        return dictionary
+
+    def value_count(self):
+        """Distinct values held, across every column."""
+        return sum(len(dictionary) for dictionary in self.dictionaries.values())
+
+
+# Section -> schema, held only as long as a store uses it
+_schemas = weakref.WeakValueDictionary()
+
+
+# Function to get the shared schema of a section, so its revisions store each distinct value once
+def schema_for(section):
+    schema = _schemas.get(section)
+    if schema is None:
+        schema = _schemas[section] = SectionSchema(section)
+    return schema
+
+
+# Function to start new schemas for a section (default: every section)
+def reset(section=None):
+    """
+    A schema keeps every value any revision of its section ever had. Stores indexed after a reset
+    get a new schema, and the old one is freed with the last store that uses it.
+    """
+    if section is None:
+        _schemas.clear()
+    else:
+        _schemas.pop(section, None)
+
+
+class SectionStore:
+    """
+    Columnar copy of a section's rows: one array of value codes per column instead of a dict per row.
+    Rows are rebuilt on access, with their fields in the order the columns first appear in this store.
+    """
+
+    def __init__(self, schema=None):
+        self.schema = schema or SectionSchema()
+        self.columns = {}  # column -> array of codes, one per row, in first-seen order
+        self.length = 0
+        self._encoders = {}  # column -> (codes, value -> code lookup, ColumnDictionary)
+        # Hash of every row's column order and codes: rows of stores sharing a schema differ when their hashes do
+        self.hashes = array.array("q")
+        self._shape = None
+        self._shape_hash = 0
+        self._shape_encoders = []
+
+    @classmethod
+    def from_records(cls, records, schema=None):
+        store = cls(schema)
+        for record in records:
+            store.append(record)
+        return store
+
+    @classmethod
+    def load(cls, file_path, schema=None):
+        return cls.from_records(json_stream.iter_records(file_path), schema)
+
+    def _add_column(self, column):
+        codes = self.columns[column] = array.array("I", bytes(4 * self.length))
+        dictionary = self.schema.dictionary(column)
+        encoder = self._encoders[column] = (codes, dictionary.codes, dictionary)
+        return encoder
+
+    def append(self, record):
+        shape = tuple(record)
+        if shape != self._shape:
+            # Rows of a section nearly always share one column order, so encoders are looked up once per shape
+            self._shape = shape
+            self._shape_hash = hash(shape)
+            self._shape_encoders = [self._encoders.get(column) or self._add_column(column) for column in shape]
+        row_codes = []
+        for (codes, lookup, dictionary), value in zip(self._shape_encoders, record.values()):
+            # Fast path: a string already in the dictionary (large strings are keyed by digest, so they miss)
+            code = lookup.get(value) if value.__class__ is str else None
+            if code is None:
+                code = dictionary.encode(value)
+            codes.append(code)
+            row_codes.append(code)
+        self.hashes.append(hash((self._shape_hash, tuple(row_codes))))
+        self.length += 1
+        if len(record) < len(self.columns):
+            # Columns this record does not have
+            for codes in self.columns.values():
+                if len(codes) < self.length:
+                    codes.append(MISSING_CODE)
+
+    def __len__(self):
+        return self.length
+
+    def row(self, position):
+        row = {}
+        dictionaries = self.schema.dictionaries
+        for column, codes in self.columns.items():
+            if codes[position] != MISSING_CODE:
+                row[column] = dictionaries[column].decode(codes[position])
+        return row
+
+    def value(self, position, column):
+        codes = self.columns.get(column)
+        if codes is None or codes[position] == MISSING_CODE:
+            return None
+        return self.schema.dictionaries[column].decode(codes[position])
+
+    def column(self, column):
+        """Decoded values of a column (None where a row has no such field)."""
+        dictionary = self.schema.dictionaries[column]
+        values = [dictionary.decode(code) if code != MISSING_CODE else None for code in range(len(dictionary.values))]
+        return [values[code] for code in self.columns[column]]
+
+    def __iter__(self):
+        for position in range(self.length):
+            yield self.row(position)
+
+    def nbytes(self):
+        """Approximate memory of the row codes (the shared dictionaries are counted by schema_nbytes)."""
+        return sum(codes.itemsize * len(codes) for codes in self.columns.values())
+
+
+# Function to approximate the memory held by the dictionaries of a schema
+def schema_nbytes(schema):
+    total = 0
+    for dictionary in schema.dictionaries.values():
+        total += sys.getsizeof(dictionary.codes) + sys.getsizeof(dictionary.values)
+        total += sum(sys.getsizeof(value) for value in dictionary.values[1:])
+    return total
+
+
+class StoreIndex(Mapping):
+    """
+    Entity key -> rows over a SectionStore, with the same keys and grouping as
+    json_diff.index_records. Rows are rebuilt only for the keys that are looked up.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.ranges = {}  # key -> list of (start, stop) row ranges, in file order
+        fields = [field for field in entities.KEY_FIELDS + (entities.TOP_ROW_FIELD,) if field in store.columns]
+        columns = [store.column(field) for field in fields]
+        key_rows = (dict(zip(fields, values)) for values in zip(*columns)) if fields else ({} for _ in range(len(store)))
+        for entity in entities.iter_entities(key_rows):
+            self.ranges.setdefault(entity.key, []).append((entity.start, entity.stop))
+
+    def positions(self, key):
+        for start, stop in self.ranges[key]:
+            yield from range(start, stop)
+
+    def __getitem__(self, key):
+        return [self.store.row(position) for position in self.positions(key)]
+
+    def __iter__(self):
+        return iter(self.ranges)
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def __contains__(self, key):
+        return key in self.ranges
+
+    def hashes(self, key):
+        hashes = self.store.hashes
+        return [hashes[position] for position in self.positions(key)]
+
+    def shares_schema(self, other):
+        return isinstance(other, StoreIndex) and other.store.schema is self.store.schema
+
+    @property
+    def schema(self):
+        return self.store.schema
+
+
+# Function to index the records of a section in a columnar store
+def index_records(records, section=None):
+    """
+    :param section: Section name; revisions of the same section share one schema, so their rows
+        can be compared by code and each distinct value is stored once
+    :return: StoreIndex of key -> rows
+    """
+    schema = schema_for(section) if section else None
+    return StoreIndex(SectionStore.from_records(records, schema))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load sections into columnar stores and report their memory.")
+    parser.add_argument("files", nargs="+", help="Section JSON files")
+    args = parser.parse_args()
+
+    for file_path in args.files:
+        section = os.path.splitext(os.path.basename(file_path))[0]
+        store = SectionStore.load(file_path, schema_for(section))
+        categorical = sum(1 for dictionary in store.schema.dictionaries.values() if len(dictionary) <= len(store) // 10)
+        compressed = sum(isinstance(value, bytes) for dictionary in store.schema.dictionaries.values()
+                         for value in dictionary.values)
+        size_mb = (store.nbytes() + schema_nbytes(store.schema)) / 2 ** 20
+        print(f"📦 {section}: {len(store)} rows, {len(store.columns)} columns ({categorical} low-cardinality), "
+              f"{compressed} compressed values, ~{size_mb:.1f} MB")
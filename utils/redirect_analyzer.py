@@ -0,0 +1,281 @@
+import os
+import sys
+import argparse
+import urllib.parse
+from datetime import datetime
+
+import pandas as pd
+
+import json_stream
+import instrumentation
+
+# Storefront paths of the live resources a redirect can no longer override
+LIVE_RESOURCE_PREFIXES = {"Pages": "/pages/", "Custom_Collections": "/collections/"}
+
+# Finding types, in report order
+LOOP = "loop"
+CHAIN = "chain"
+SHADOWED = "shadowed"
+DUPLICATE = "duplicate"
+FINDING_TYPES = (LOOP, CHAIN, SHADOWED, DUPLICATE)
+
+# Paths shown per chain in reports
+VIA_LIMIT = 10
+
+# Sheet names of the flattened import workbook (Matrixify reads the "Redirects" sheet)
+IMPORT_SHEET = "Redirects"
+FINDINGS_SHEET = "Redirect Findings"
+
+
+# Function to normalize a redirect path the way the storefront matches it
+def normalize_path(path):
+    """
+    Paths match case-insensitively and without a trailing slash; the query string is kept.
+    Absolute URLs (external targets) are returned as they are.
+
+    :return: Normalized path, or None for an empty value
+    """
+    if not path:
+        return None
+    path = path.strip()
+    if path.startswith("/") and "?" not in path and "#" not in path and not path.startswith("//"):
+        return path.lower().rstrip("/") or "/"
+    url = urllib.parse.urlsplit(path)
+    if url.scheme or url.netloc:
+        return path
+    normalized = url.path.lower().rstrip("/") or "/"
+    if not normalized.startswith("/"):
+        normalized = "/" + normalized
+    return f"{normalized}?{url.query}" if url.query else normalized
+
+
+class RedirectIndex:
+    """Normalized Path -> redirect index with every chain resolved to its final target."""
+
+    def __init__(self, redirects, live=()):
+        """
+        :param redirects: Iterable of Redirects rows (ID, Path, Command, Target)
+        :param live: Storefront paths of live resources; their redirects never fire, so chains end there
+        """
+        self.redirects = {}  # normalized path -> row
+        self.duplicates = {}  # normalized path -> rows shadowed by a later row with the same path
+        for row in redirects:
+            path = normalize_path(row.get("Path"))
+            if path is None:
+                continue
+            if path in self.redirects:
+                self.duplicates.setdefault(path, []).append(self.redirects[path])
+            self.redirects[path] = row
+        # Normalized once, as every walk below follows targets
+        self.targets = {path: normalize_path(row.get("Target")) for path, row in self.redirects.items()}
+        # Redirects that can fire, in file order
+        self.active = {path: True for path in self.redirects if path not in live}
+        self.final = {}  # active path -> (final target, hops), or None when it ends in a loop
+        self.loops = []  # Lists of normalized paths forming a cycle
+        for path in self.active:
+            self._resolve(path)
+
+    def target_of(self, path):
+        return self.targets[path]
+
+    def _resolve(self, path):
+        # Walk until a resolved path, a path that is not redirected, or a cycle; each path is walked once
+        walk = []
+        on_walk = {}
+        current = path
+        while current in self.active and current not in self.final:
+            if current in on_walk:
+                cycle = walk[on_walk[current]:]
+                self.loops.append(cycle)
+                for cycle_path in cycle:
+                    self.final[cycle_path] = None
+                walk = walk[:on_walk[current]]
+                break
+            on_walk[current] = len(walk)
+            walk.append(current)
+            current = self.target_of(current)
+
+        # Unwind: every path on the walk shares the end of the chain
+        for walk_path in reversed(walk):
+            target = self.target_of(walk_path)
+            if target in self.final:
+                end = self.final[target]
+                self.final[walk_path] = None if end is None else (end[0], end[1] + 1)
+            else:
+                self.final[walk_path] = (self.redirects[walk_path].get("Target"), 1)
+
+    def chain(self, path, limit=VIA_LIMIT):
+        """Normalized paths visited from path, for reports (stops at the first repeated path)."""
+        visited = [path]
+        seen = {path}
+        current = self.target_of(path)
+        while current in self.active and current not in seen and len(visited) < limit:
+            visited.append(current)
+            seen.add(current)
+            current = self.target_of(current)
+        return visited
+
+    def upstream(self, paths):
+        """The given paths plus every redirected path whose chain passes through one of them."""
+        sources = {}
+        for path in self.active:
+            sources.setdefault(self.target_of(path), []).append(path)
+        result = set(paths)
+        pending = list(result)
+        while pending:
+            for source in sources.get(pending.pop(), ()):
+                if source not in result:
+                    result.add(source)
+                    pending.append(source)
+        return result
+
+
+# Function to collect the storefront paths of live pages and collections
+def live_paths(repo_dir):
+    paths = {}
+    for section, prefix in LIVE_RESOURCE_PREFIXES.items():
+        for row in json_stream.iter_records(os.path.join(repo_dir, f"{section}.json")):
+            if row.get("Handle"):
+                paths[normalize_path(prefix + row["Handle"])] = section
+    return paths
+
+
+# Function to analyze redirects for loops, chains, shadowed paths and duplicate paths
+def analyze(redirects, live=None, delta=None):
+    """
+    :param redirects: Redirects rows of the full section
+    :param live: Dictionary of live storefront path -> section (see live_paths)
+    :param delta: Optional change-only Redirects rows; they override rows with the same path and only
+        findings involving a changed path are reported
+    :return: (RedirectIndex, list of finding dictionaries)
+    """
+    live = live or {}
+    delta_paths = None
+    if delta is not None:
+        delta = list(delta)
+        delta_paths = {normalize_path(row.get("Path")) for row in delta} - {None}
+        redirects = [row for row in redirects if normalize_path(row.get("Path")) not in delta_paths] + delta
+    index = RedirectIndex(redirects, live)
+
+    findings = []
+    in_cycle = {path for cycle in index.loops for path in cycle}
+    for cycle in index.loops:
+        findings.append({"type": LOOP, "path": cycle[0], "row": index.redirects[cycle[0]],
+                         "final_target": None, "hops": len(cycle), "via": cycle[:VIA_LIMIT]})
+    for path, row in index.redirects.items():
+        if path in live:
+            findings.append({"type": SHADOWED, "path": path, "row": row, "final_target": None, "hops": None,
+                             "via": [path], "live": live[path]})
+            continue
+        end = index.final[path]
+        if end is None and path not in in_cycle:
+            # Leads into a loop without being part of it
+            findings.append({"type": LOOP, "path": path, "row": row, "final_target": None, "hops": None,
+                             "via": index.chain(path)})
+        elif end is not None and end[1] > 1:
+            findings.append({"type": CHAIN, "path": path, "row": row, "final_target": end[0], "hops": end[1],
+                             "via": index.chain(path)})
+    for path, rows in index.duplicates.items():
+        for row in rows:
+            findings.append({"type": DUPLICATE, "path": path, "row": row, "final_target": None, "hops": None,
+                             "via": [path]})
+
+    if delta_paths is not None:
+        # A changed redirect also affects the chains that pass through it
+        affected = index.upstream(delta_paths)
+        findings = [finding for finding in findings
+                    if finding["path"] in affected or (finding["type"] == LOOP and affected.intersection(finding["via"]))]
+    findings.sort(key=lambda finding: (FINDING_TYPES.index(finding["type"]), finding["path"]))
+    return index, findings
+
+
+# Function to build the Matrixify rows that fix the findings
+def flattened_rows(findings):
+    """
+    Chained redirects point straight at their final target; shadowed and duplicate redirects
+    never fire and are deleted. Loops need a decision and are only reported.
+    """
+    rows = {}
+    for finding in findings:
+        row = finding["row"]
+        key = row.get("ID") or row.get("Path")
+        if finding["type"] == CHAIN:
+            rows.setdefault(key, dict(row, Command="MERGE", Target=finding["final_target"]))
+        elif finding["type"] in (SHADOWED, DUPLICATE):
+            rows[key] = dict(row, Command="DELETE")
+    return list(rows.values())
+
+
+# Function to build the findings sheet
+def findings_frame(findings):
+    return pd.DataFrame([{
+        "Type": finding["type"],
+        "ID": finding["row"].get("ID", ""),
+        "Path": finding["row"].get("Path", ""),
+        "Target": finding["row"].get("Target", ""),
+        "Final Target": finding["final_target"] or "",
+        "Hops": finding["hops"] or "",
+        "Via": " → ".join(finding["via"]),
+        "Live Resource": finding.get("live", ""),
+    } for finding in findings], columns=["Type", "ID", "Path", "Target", "Final Target", "Hops", "Via", "Live Resource"])
+
+
+# Function to write the flattened Redirects import workbook
+def write_workbook(findings, output_folder):
+    os.makedirs(output_folder, exist_ok=True)
+    current_time = datetime.now().strftime('%Y-%m-%d_%H%M%S')
+    output_excel_file = os.path.join(output_folder, f'Redirects_Flattened_{current_time}.xlsx')
+    with pd.ExcelWriter(output_excel_file, engine='xlsxwriter') as writer:
+        pd.DataFrame(flattened_rows(findings), columns=["ID", "Path", "Command", "Target"]).to_excel(
+            writer, sheet_name=IMPORT_SHEET, index=False)
+        findings_frame(findings).to_excel(writer, sheet_name=FINDINGS_SHEET, index=False)
+    return output_excel_file
+
+
+# Function to print a summary of the findings
+def report(findings, label):
+    counts = {finding_type: 0 for finding_type in FINDING_TYPES}
+    for finding in findings:
+        counts[finding["type"]] += 1
+        instrumentation.count(f"redirect_{finding['type']}s")
+    print(f"🔀 {label}: " + ", ".join(f"{count} {finding_type}" for finding_type, count in counts.items()))
+    for finding in findings:
+        if finding["type"] == LOOP:
+            print(f"   ❌ Loop: {' → '.join(finding['via'])}")
+    return counts
+
+
+# Function to analyze the full Redirects section, or only a change-only delta against it
+def analyze_directory(repo_dir, delta_file=None):
+    """
+    :return: List of findings (empty when there is no Redirects section or delta)
+    """
+    redirects_file = os.path.join(repo_dir, "Redirects.json")
+    if delta_file is not None and not os.path.exists(delta_file):
+        return []
+    delta = json_stream.iter_records(delta_file) if delta_file else None
+    _, findings = analyze(json_stream.iter_records(redirects_file), live_paths(repo_dir), delta)
+    report(findings, f"Redirects{' delta' if delta_file else ''}")
+    return findings
+
+
+if __name__ == "__main__":
+    # Detect if running in GitHub Actions
+    GITHUB_WORKSPACE = os.getenv("GITHUB_WORKSPACE", os.getcwd())
+
+    parser = argparse.ArgumentParser(description="Find redirect loops, chains and shadowed paths, and flatten them.")
+    parser.add_argument("--repo-dir", default=os.path.join(GITHUB_WORKSPACE, "repo-shopify-data"))
+    parser.add_argument("--delta", nargs="?", const=os.path.join(GITHUB_WORKSPACE, "changes/change-only-jsons/Redirects.json"),
+                        help="Only report findings involving this change-only Redirects file")
+    parser.add_argument("--output-dir", default=os.path.join(GITHUB_WORKSPACE, "changes/redirects"),
+                        help="Folder for the flattened Redirects import workbook")
+    parser.add_argument("--no-workbook", action="store_true", help="Only print the findings")
+    parser.add_argument("--fail-on-loops", action="store_true", help="Exit with an error when a loop is found")
+    args = parser.parse_args()
+
+    with instrumentation.stage("redirects"):
+        findings = analyze_directory(args.repo_dir, args.delta)
+    if findings and not args.no_workbook:
+        print(f"🎉 Excel file created: {write_workbook(findings, args.output_dir)}")
+    if args.fail_on_loops and any(finding["type"] == LOOP for finding in findings):
+        sys.exit(1)
@@ -0,0 +1,335 @@
+import os
+import re
+import sys
+import json
+import glob
+import argparse
+
+import entities
+import json_diff
+import git_objects
+import fingerprints
+
+# Add the entities referring to changed records to change-only extractions ("0" to turn off)
+INCLUDE_REFERRERS = os.getenv("EXTRACT_REFERRERS", "1") != "0"
+
+# Sidecar index: repo-shopify-data/.references/<Section>.refs
+INDEX_DIR = ".references"
+INDEX_EXTENSION = ".refs"
+INDEX_VERSION = 3
+
+# Admin GraphQL object type of each section's IDs (Files IDs already are GIDs)
+SECTION_GID_TYPES = {
+    "Pages": "Page",
+    "Custom_Collections": "Collection",
+    "Metaobjects": "Metaobject",
+    "Menus": "Menu",
+}
+# GID types that can be resolved to a section entity
+REFERENCE_GID_TYPES = set(SECTION_GID_TYPES.values()) | {"MediaImage", "GenericFile", "Video", "Model3d"}
+
+# Section referenced by a handle, per metafield reference type
+HANDLE_REFERENCE_SECTIONS = {
+    "metaobject_reference": "Metaobjects",
+    "page_reference": "Pages",
+    "collection_reference": "Custom_Collections",
+}
+# Section referenced by a menu item, per resource type
+MENU_RESOURCE_SECTIONS = {"PAGE": "Pages", "COLLECTION": "Custom_Collections"}
+
+GID_PATTERN = re.compile(r"gid://shopify/(\w+)/(\d+)")
+FILE_URL_PATTERN = re.compile(r"https://cdn\.shopify\.com/s/files/[^\s\"'<>()?,]+")
+METAFIELD_COLUMN_PATTERN = re.compile(r"^Metafield: .+ \[(?:list\.)?(\w+)\]$")
+# Metaobject fields carry no type, so "definition.handle" values are matched by shape
+METAOBJECT_HANDLE_PATTERN = re.compile(r"^[a-z0-9_-]+\.[a-z0-9][a-z0-9_-]*$")
+# Metaobject file fields hold the file name ("ICON_HYDRATE.svg"), which would otherwise pass as a handle
+FILE_NAME_PATTERN = re.compile(r"^[^/\s]+\.(?:jpe?g|png|gif|webp|svg|heic|avif|mp4|mov|webm|glb|usdz|pdf|txt|csv|json|zip)$", re.IGNORECASE)
+
+
+# Function to build the token naming a gid
+def gid_token(gid_type, object_id):
+    return f"gid://shopify/{gid_type}/{object_id}"
+
+
+# Function to build the token naming an entity by handle
+def handle_token(section, handle):
+    return f"{section}:handle:{handle}"
+
+
+# Function to split a cell holding one reference or a list of them
+def split_values(value):
+    """
+    Matrixify writes lists as ", "-separated text ("form.cream, form.gel"); JSON arrays and
+    one value per line are accepted too.
+    """
+    if not isinstance(value, str) or not value.strip():
+        return []
+    value = value.strip()
+    if value.startswith("["):
+        try:
+            return [str(item) for item in json.loads(value) if item]
+        except ValueError:
+            pass
+    return [item.strip() for line in value.splitlines() for item in line.split(", ") if item.strip()]
+
+
+# Function to build the token naming a file by its file name
+def file_name_token(file_name):
+    return f"Files:name:{file_name}"
+
+
+# Function to get the tokens other records may use to refer to an entity
+def entity_names(section, key, rows):
+    names = set()
+    first = rows[0]
+    gid_type = SECTION_GID_TYPES.get(section)
+    if gid_type and str(first.get("ID", "")).isdigit():
+        names.add(gid_token(gid_type, first["ID"]))
+    elif GID_PATTERN.fullmatch(key or ""):
+        names.add(key)
+    if first.get("Handle"):
+        handle = first["Handle"]
+        if section == "Metaobjects":
+            handle = f"{first.get('Definition: Handle', '')}.{handle}"
+        names.add(handle_token(section, handle))
+    if first.get("Link"):
+        names.add(first["Link"].split("?", 1)[0])
+    if section == "Files" and first.get("File Name"):
+        names.add(file_name_token(first["File Name"]))
+    return names
+
+
+# Function to get the tokens of everything the rows of an entity refer to
+def entity_references(section, rows):
+    references = set()
+    for row in rows:
+        for column, value in row.items():
+            if not isinstance(value, str) or not value:
+                continue
+            references.update(
+                gid_token(gid_type, object_id) for gid_type, object_id in GID_PATTERN.findall(value)
+                if gid_type in REFERENCE_GID_TYPES
+            )
+            references.update(FILE_URL_PATTERN.findall(value))
+
+            metafield = METAFIELD_COLUMN_PATTERN.match(column)
+            target = HANDLE_REFERENCE_SECTIONS.get(metafield.group(1)) if metafield else None
+            if target:
+                references.update(handle_token(target, item) for item in split_values(value))
+            elif section == "Metaobjects" and column == "Value":
+                for item in split_values(value):
+                    if FILE_NAME_PATTERN.match(item):
+                        references.add(file_name_token(item))
+                    elif METAOBJECT_HANDLE_PATTERN.match(item):
+                        references.add(handle_token("Metaobjects", item))
+
+        target = MENU_RESOURCE_SECTIONS.get(row.get("Menu Item: Resource Type"))
+        if target and str(row.get("Menu Item: Resource ID", "")).isdigit():
+            references.add(gid_token(SECTION_GID_TYPES[target], row["Menu Item: Resource ID"]))
+        if target and row.get("Menu Item: Resource Handle"):
+            references.add(handle_token(target, row["Menu Item: Resource Handle"]))
+    return references
+
+
+# Function to index the names and outgoing references of every entity of a section
+def section_references(section, records):
+    """
+    :return: {"names": {key: [tokens]}, "references": {key: [tokens]}}
+    """
+    names = {}
+    references = {}
+    for entity in entities.SectionEntities(records):
+        entity_tokens = entity_names(section, entity.key, entity.rows)
+        names[entity.key] = sorted(entity_tokens)
+        outgoing = entity_references(section, entity.rows) - entity_tokens
+        if outgoing:
+            references[entity.key] = sorted(outgoing)
+    return {"names": names, "references": references}
+
+
+# Function to get the sidecar index path of a section file
+def index_path(section_file):
+    section = os.path.splitext(os.path.basename(section_file))[0]
+    return os.path.join(os.path.dirname(section_file), INDEX_DIR, f"{section}{INDEX_EXTENSION}")
+
+
+# Function to get a section's reference index, if it was built from the same JSON blob
+def fresh_index(section_file, source_blob_id, rev=json_diff.WORKTREE):
+    path = index_path(section_file)
+    if rev is json_diff.WORKTREE:
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+    else:
+        data = git_objects.read_file(path, rev)
+    try:
+        index = json.loads(data) if data else None
+    except ValueError:
+        return None
+    if not index or index.get("version") != INDEX_VERSION or index.get("source") != source_blob_id:
+        return None
+    return dict(index, names=dict(index["names"]), references=dict(index["references"]))
+
+
+# Function to write a section's reference index
+def write_index(section_file, index):
+    """
+    Entity maps are stored as [key, tokens] pairs in ID order: the keyless entity's None key
+    cannot be a JSON object key.
+    """
+    path = index_path(section_file)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    stored = dict(index, **{
+        field: sorted(index[field].items(), key=lambda entry: entities.order_key(entry[0]))
+        for field in ("names", "references")
+    })
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(stored, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    os.replace(temp_path, path)
+
+
+# Function to get a section's reference index, rebuilding it when its JSON changed
+def current_index(section_file, force=False):
+    """
+    :return: (index, True if the index was (re)written)
+    """
+    source_blob_id = fingerprints.git_blob_id(section_file)
+    index = None if force else fresh_index(section_file, source_blob_id)
+    if index is not None:
+        return index, False
+    section = os.path.splitext(os.path.basename(section_file))[0]
+    index = dict(section_references(section, json_diff.iter_revision(section_file)),
+                 version=INDEX_VERSION, source=source_blob_id)
+    write_index(section_file, index)
+    return index, True
+
+
+# Function to rebuild a section's reference index when its JSON changed
+def update_index(section_file, force=False):
+    """
+    :return: True if the index was (re)written, False if it was already up to date
+    """
+    return current_index(section_file, force)[1]
+
+
+# Function to bring every reference index of a directory up to date
+def update_indexes(repo_dir, force=False):
+    """
+    :return: List of sections whose index was rewritten
+    """
+    updated = []
+    section_files = glob.glob(os.path.join(repo_dir, "*.json"))
+    for section_file in sorted(section_files):
+        if update_index(section_file, force):
+            updated.append(os.path.splitext(os.path.basename(section_file))[0])
+
+    # Drop indexes of sections that no longer exist
+    sections = {os.path.splitext(os.path.basename(path))[0] for path in section_files}
+    for path in glob.glob(os.path.join(repo_dir, INDEX_DIR, f"*{INDEX_EXTENSION}")):
+        if os.path.splitext(os.path.basename(path))[0] not in sections:
+            os.remove(path)
+    return updated
+
+
+class ReferenceGraph:
+    """Entity → referrers graph across all sections, built from the per-section indexes."""
+
+    def __init__(self, indexes):
+        """
+        :param indexes: Dictionary of section -> section index (see section_references)
+        """
+        owners = {}
+        for section, index in indexes.items():
+            for key, tokens in index["names"].items():
+                for token in tokens:
+                    owners[token] = (section, key)
+
+        self.referrers = {}  # (section, key) -> set of (section, key)
+        for section, index in indexes.items():
+            for key, tokens in index["references"].items():
+                for token in tokens:
+                    target = owners.get(token)
+                    if target is not None and target != (section, key):
+                        self.referrers.setdefault(target, set()).add((section, key))
+
+    def referrers_of(self, section, key):
+        return self.referrers.get((section, key), set())
+
+    def expand(self, changed_ids):
+        """
+        Follow referrers transitively (a changed File pulls in the Metaobject using it and
+        the Pages using that Metaobject).
+
+        :param changed_ids: Dictionary of section -> iterable of changed entity keys
+        :return: Dictionary of section -> set of referrer keys that are not changed themselves
+        """
+        seen = {(section, key) for section, keys in changed_ids.items() for key in keys}
+        pending = list(seen)
+        added = {}
+        while pending:
+            for referrer in self.referrers.get(pending.pop(), ()):
+                if referrer not in seen:
+                    seen.add(referrer)
+                    pending.append(referrer)
+                    added.setdefault(referrer[0], set()).add(referrer[1])
+        return added
+
+
+# Function to load the reference graph of a directory at a revision
+def load_graph(repo_dir, rev=json_diff.WORKTREE, blob_ids=None):
+    """
+    Fresh sidecar indexes are used as they are; other sections are indexed from their JSON
+    (and, for the working tree, the index is rewritten for the next run).
+
+    :param blob_ids: Optional dictionary of section -> blob ID at rev (e.g. from `git ls-tree`)
+    """
+    indexes = {}
+    for section_file in json_diff.list_section_files(repo_dir, rev):
+        section = os.path.splitext(os.path.basename(section_file))[0]
+        if rev is json_diff.WORKTREE:
+            indexes[section] = current_index(section_file)[0]
+            continue
+        blob_id = (blob_ids or {}).get(section)
+        index = fresh_index(section_file, blob_id, rev) if blob_id else None
+        indexes[section] = index or section_references(section, json_diff.iter_revision(section_file, rev))
+    return ReferenceGraph(indexes)
+
+
+# Function to get the referrers to add to the change-only extraction of changed IDs
+def referrer_ids(repo_dir, changed_ids, rev=json_diff.WORKTREE, blob_ids=None):
+    """
+    :return: Dictionary of section -> sorted list of referrer keys that are not changed themselves
+    """
+    if not any(changed_ids.values()):
+        return {}
+    added = load_graph(repo_dir, rev, blob_ids).expand(changed_ids)
+    for section, keys in sorted(added.items()):
+        print(f"🔗 {section}: {len(keys)} referrers of changed records added")
+    # The entity without ID or Handle cannot be selected by ID
+    return {section: sorted((key for key in keys if key is not None), key=entities.order_key)
+            for section, keys in added.items()}
+
+
+if __name__ == "__main__":
+    # Detect if running in GitHub Actions
+    GITHUB_WORKSPACE = os.getenv("GITHUB_WORKSPACE", os.getcwd())
+
+    parser = argparse.ArgumentParser(description="Maintain the cross-section reference index of each section.")
+    parser.add_argument("--repo-dir", default=os.path.join(GITHUB_WORKSPACE, "repo-shopify-data"))
+    parser.add_argument("--force", action="store_true", help="Rebuild every index")
+    parser.add_argument("--referrers", metavar="SECTION:ID", nargs="+", help="Print the referrers of records instead")
+    args = parser.parse_args()
+
+    if args.referrers:
+        changed = {}
+        for item in args.referrers:
+            section, _, key = item.partition(":")
+            changed.setdefault(section, []).append(key)
+        for section, keys in load_graph(args.repo_dir).expand(changed).items():
+            print(f"{section} -> {', '.join(str(key) for key in sorted(keys, key=entities.order_key))}")
+        sys.exit(0)
+
+    updated = update_indexes(args.repo_dir, args.force)
+    print(f"✅ Reference indexes updated for: {', '.join(updated) or 'no sections'}")
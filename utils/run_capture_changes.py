@@ -1,10 +1,11 @@
 import os
-import json
-import glob
-import subprocess
+import sys
 import shutil
-import pandas as pd
-from datetime import datetime
+
+import json_diff
+import change_state
+import watch_changes
+import instrumentation
 
 # Function to load properties from config.properties
 def load_properties(filepath):
@@ -31,6 +32,7 @@ GIT_DIFF_DIR = config["GIT_DIFF_DIR"]
 ID_OUTPUT_DIR = config["ID_OUTPUT_DIR"]
 CHANGED_IDS_FILE = config["CHANGED_IDS_FILE"]
 DIFF_FILE = config["DIFF_FILE"]
+STATE_FILE = config.get("STATE_FILE", "../.cache/capture-changes-state.json")
 
 # Convert comma-separated repo files into a list and handle spaces correctly
 REPO_FILES = [file.strip() for file in config["REPO_FILES"].split(",")]
@@ -43,25 +45,28 @@ def clear_directory(dir_path):
     print(f"📂 Creating directory: {dir_path}")
     os.makedirs(dir_path, exist_ok=True)
 
-# Clear required directories
-clear_directory(FINAL_OUTPUT_DIR)
-clear_directory(GIT_DIFF_DIR)
-clear_directory(ID_OUTPUT_DIR)
-
-# Run git diff on the specified files and save output
-print(f"📄 Running: git diff on {len(REPO_FILES)} files...")
-git_diff_command = ["git", "diff"] + REPO_FILES
-with open(DIFF_FILE, "w") as diff_output:
-    subprocess.run(git_diff_command, stdout=diff_output, check=True)
+# `--full` discards the previous run's state and rebuilds everything from scratch
+if "--full" in sys.argv:
+    clear_directory(FINAL_OUTPUT_DIR)
+    clear_directory(GIT_DIFF_DIR)
+    clear_directory(ID_OUTPUT_DIR)
+    if os.path.exists(STATE_FILE):
+        os.remove(STATE_FILE)
 
-print(f"✅ Git diff output saved to {DIFF_FILE}")
+repo_dir = os.path.dirname(REPO_FILES[0])
+sections = [os.path.splitext(os.path.basename(file))[0] for file in REPO_FILES]
 
-# Run extractIdByPage.py
-print("🔍 Running extractIdByPage.py...")
-subprocess.run(["python3.13", "extractIdByPage.py"], check=True)
+# `--watch` keeps the sections in memory and re-diffs each file as soon as it is saved
+if "--watch" in sys.argv:
+    watch_changes.watch(repo_dir, FINAL_OUTPUT_DIR, CHANGED_IDS_FILE, sections)
+    sys.exit(0)
 
-# Run extract-changes-only.py
-print("🔍 Running extract-changes-only.py...")
-subprocess.run(["python3.13", "extract-changes-only.py"], check=True)
+# Diff the specified files (git index vs working tree, like `git diff`), re-reading only
+# sections that changed since the last run and rewriting only their change-only JSON files
+print(f"📄 Diffing {len(REPO_FILES)} files against the git index...")
+with instrumentation.stage("incremental_extract"):
+    change_state.run_incremental(
+        repo_dir, FINAL_OUTPUT_DIR, CHANGED_IDS_FILE, json_diff.INDEX, json_diff.WORKTREE, STATE_FILE, sections
+    )
 
 print("🎉 Script execution completed successfully!")
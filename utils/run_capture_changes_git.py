@@ -1,10 +1,9 @@
 import os
-import json
-import glob
-import subprocess
 import shutil
-import pandas as pd
-from datetime import datetime
+
+import json_diff
+import pipeline
+import instrumentation
 
 # Detect if running in GitHub Actions
 GITHUB_WORKSPACE = os.getenv("GITHUB_WORKSPACE", os.getcwd())  # Use GitHub workspace if available
@@ -51,20 +50,18 @@ clear_directory(FINAL_OUTPUT_DIR)
 clear_directory(GIT_DIFF_DIR)
 clear_directory(ID_OUTPUT_DIR)
 
-# Run git diff and save output
-print(f"📄 Running: git diff on {len(REPO_FILES)} files...")
-git_diff_command = ["git", "diff"] + REPO_FILES
-with open(DIFF_FILE, "w") as diff_output:
-    subprocess.run(git_diff_command, stdout=diff_output, check=True)
-
-print(f"✅ Git diff output saved to {DIFF_FILE}")
+# Diff the repo files record by record (git index vs working tree, like `git diff`)
+print(f"📄 Diffing {len(REPO_FILES)} files against the git index...")
+with instrumentation.stage("diff"):
+    diffs = json_diff.diff_files(REPO_FILES, base_rev=json_diff.INDEX)
 
-# Run extractIdByPage.py
-print("🔍 Running extractIdByPage.py...")
-#subprocess.run(["python3", os.path.join(GITHUB_WORKSPACE, "extractIdByPage.py")], check=True)
+# Write changed IDs to changed_ids.txt
+with instrumentation.stage("write_changed_ids"):
+    json_diff.write_changed_ids(diffs, CHANGED_IDS_FILE)
 
-# Run extract-changes-only.py
-print("🔍 Running extract-changes-only.py...")
-#subprocess.run(["python3", os.path.join(GITHUB_WORKSPACE, "extract-changes-only.py")], check=True)
+# Extract the changed blocks from the in-memory diff
+print("🔍 Extracting changed blocks...")
+with instrumentation.stage("extract_changes"):
+    pipeline.extract_changes(diffs, FINAL_OUTPUT_DIR)
 
 print("🎉 Script execution completed successfully!")
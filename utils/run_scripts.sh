@@ -4,6 +4,9 @@
 OUTPUT_DIR="../output_json"  # The directory where the completed file will be located
 COMPLETED_FILE="$OUTPUT_DIR/convert.json.completed"  # Path to the completion file
  
+# Append stage timings, peak memory and per-section counters of each script to a metrics file
+export PIPELINE_METRICS_FILE="${PIPELINE_METRICS_FILE:-../.cache/metrics.jsonl}"
+
 # Delete the directory if it exists
 if [ -d "$OUTPUT_DIR" ]; then
     echo "Deleting the directory: $OUTPUT_DIR"
@@ -12,9 +15,14 @@ else
     echo "Directory $OUTPUT_DIR does not exist, skipping deletion."
 fi
 
-# Execute the first Python script
-echo "Executing convertUpdatedDevExcelToJSON_local.py..."
-python3.13 convertUpdatedDevExcelToJSON_local.py
+# Execute the first Python script (EXPORT_SOURCE=bulk exports straight from Shopify with bulk operations)
+if [ "$EXPORT_SOURCE" = "bulk" ]; then
+    echo "Executing bulk_export.py..."
+    python3.13 bulk_export.py --output-dir "$OUTPUT_DIR"
+else
+    echo "Executing convertUpdatedDevExcelToJSON_local.py..."
+    python3.13 convertUpdatedDevExcelToJSON_local.py
+fi
 
 
 echo "Waiting for conversion to complete..."
@@ -53,8 +53,11 @@ done
 # Debugging: Print git diff command
 echo "Running: git diff $file_list > \"$DIFF_FILE\""
 
-# Run git diff on the specified files
-eval git diff $file_list > "$DIFF_FILE"
+# Append stage timings, peak memory and per-section counters of each script to a metrics file
+export PIPELINE_METRICS_FILE="${PIPELINE_METRICS_FILE:-../.cache/metrics.jsonl}"
+
+# Run git diff on the specified files (timed here, since it runs outside the Python metrics)
+time eval git diff $file_list > "$DIFF_FILE"
 
 # Execute the Python scripts
 python3.13 extractIdByPage_dev_triage.py
@@ -0,0 +1,95 @@
+import os
+import hashlib
+import pandas as pd
+
+# Cache location and size limit (override with environment variables, e.g. for the Actions cache)
+DEFAULT_CACHE_DIR = os.getenv("SECTION_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "shopify-sections"))
+DEFAULT_MAX_BYTES = int(os.getenv("SECTION_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Bytes read per update when hashing section files
+HASH_CHUNK_SIZE = 1 << 20
+
+
+# Function to compute the SHA-256 of a file without loading it into memory
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SectionCache:
+    """
+    Persistent on-disk cache of per-section intermediate output (formatted sheet DataFrames),
+    keyed by the section file's SHA-256 and the converter version. Entries are evicted
+    least-recently-used first once the cache grows past max_bytes.
+    """
+
+    def __init__(self, version, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.version = str(version)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, file_path, namespace="sheet"):
+        source = f"{self.version}\0{namespace}\0{file_sha256(file_path)}"
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def load(self, key):
+        entry_path = self._entry_path(key)
+        if not os.path.exists(entry_path):
+            return None
+        try:
+            value = pd.read_pickle(entry_path)
+        except Exception as e:
+            print(f"⚠️ Dropping unreadable cache entry {entry_path}: {e}")
+            os.remove(entry_path)
+            return None
+        os.utime(entry_path)  # Mark as recently used
+        return value
+
+    def store(self, key, value):
+        entry_path = self._entry_path(key)
+        temp_path = f"{entry_path}.tmp"
+        pd.to_pickle(value, temp_path)
+        os.replace(temp_path, entry_path)
+        self.evict()
+
+    def get_or_build(self, file_path, build, namespace="sheet"):
+        """
+        Return the cached output for a section file, building and storing it on a miss.
+
+        :param file_path: Section JSON file the output is derived from
+        :param build: Function called with file_path to produce the output
+        :param namespace: Distinguishes different outputs derived from the same file
+        """
+        key = self.key(file_path, namespace)
+        value = self.load(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = build(file_path)
+        self.store(key, value)
+        return value
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
@@ -0,0 +1,190 @@
+import os
+import json
+import hashlib
+import pandas as pd
+
+import entities
+import json_stream
+import instrumentation
+from section_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, file_sha256
+
+# pyarrow is optional: without it every reader falls back to streaming the JSON
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Bump whenever the mirror layout below changes, so mirrors are rebuilt
+MIRROR_VERSION = "2"
+
+# Parquet mirrors live next to the sheet cache, with the same size limit
+MIRROR_DIR = os.getenv("SECTION_MIRROR_DIR", os.path.join(DEFAULT_CACHE_DIR, "parquet"))
+
+# Extra column with the key of the entity each row belongs to (continuation rows may have an empty ID)
+ENTITY_KEY_COLUMN = "__entity_key"
+
+# Extra column with each row as compact JSON, so rows read back exactly as stored (types, missing fields)
+ROW_COLUMN = "__row"
+EXTRA_COLUMNS = (ENTITY_KEY_COLUMN, ROW_COLUMN)
+
+# Field metadata marking a column whose mixed-type cells are stored as JSON text
+JSON_FIELD_METADATA = {b"encoding": b"json"}
+
+# Rows per Parquet row group; row group statistics let ID filters skip whole groups
+ROW_GROUP_SIZE = 10000
+
+
+# Function to check if Parquet mirrors can be used
+def available():
+    return pq is not None
+
+
+# Function to get the mirror path of a section file's current content
+def mirror_path(file_path, mirror_dir=MIRROR_DIR):
+    source = f"{MIRROR_VERSION}\0{file_sha256(file_path)}"
+    return os.path.join(mirror_dir, hashlib.sha256(source.encode("utf-8")).hexdigest() + ".parquet")
+
+
+# Function to build a column field and array, keeping the JSON types when they are consistent
+def column_array(name, values):
+    """
+    :return: (pyarrow field, pyarrow array)
+    """
+    try:
+        array = pa.array(values)
+        return pa.field(name, array.type), array
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed cell types in one column are stored as JSON text and decoded on read
+        array = pa.array([None if value is None else json.dumps(value, ensure_ascii=False) for value in values], pa.string())
+        return pa.field(name, pa.string(), metadata=JSON_FIELD_METADATA), array
+
+
+# Function to convert section records to an Arrow table with an entity key column
+def records_to_table(records):
+    columns = {}
+    keys = []
+    rows = []
+    for entity in entities.iter_entities(records):
+        for record in entity.rows:
+            rows.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            for name, value in record.items():
+                values = columns.setdefault(name, [])
+                # Pad columns missing from earlier rows with nulls
+                values.extend([None] * (len(keys) - len(values)))
+                values.append(value)
+            keys.append(entity.key)
+    for values in columns.values():
+        values.extend([None] * (len(keys) - len(values)))
+
+    fields, arrays = zip(*[column_array(name, values) for name, values in columns.items()]) if columns else ((), ())
+    schema = pa.schema(list(fields) + [pa.field(ENTITY_KEY_COLUMN, pa.string()), pa.field(ROW_COLUMN, pa.string())])
+    return pa.Table.from_arrays(list(arrays) + [pa.array(keys, pa.string()), pa.array(rows, pa.string())], schema=schema)
+
+
+# Function to make sure a section file has an up-to-date Parquet mirror
+def ensure_mirror(file_path, mirror_dir=MIRROR_DIR, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Return the path of the section's Parquet mirror, building it when the JSON's hash changed.
+
+    :param file_path: Section JSON file
+    :return: Mirror path, or None when pyarrow is not installed or the file does not exist
+    """
+    if not available() or not os.path.exists(file_path):
+        return None
+
+    path = mirror_path(file_path, mirror_dir)
+    if os.path.exists(path):
+        os.utime(path)  # Mark as recently used
+        instrumentation.count("mirror_hits")
+        return path
+
+    os.makedirs(mirror_dir, exist_ok=True)
+    table = records_to_table(json_stream.iter_records(file_path))
+    temp_path = f"{path}.tmp"
+    pq.write_table(table, temp_path, row_group_size=ROW_GROUP_SIZE)
+    os.replace(temp_path, path)
+    instrumentation.count("mirror_builds")
+    evict(mirror_dir, max_bytes)
+    return path
+
+
+# Function to read a section's mirror, optionally only some columns or entities
+def read_table(file_path, ids=None, columns=None, mirror_dir=MIRROR_DIR):
+    """
+    :param ids: Optional set of entity keys to keep (whole multi-row entities are kept)
+    :param columns: Optional list of columns to read
+    :return: pyarrow Table without the extra columns, or None when there is no mirror
+    """
+    path = ensure_mirror(file_path, mirror_dir)
+    if path is None:
+        return None
+
+    filters = [(ENTITY_KEY_COLUMN, "in", sorted(ids))] if ids is not None else None
+    if columns is None:
+        columns = [name for name in pq.read_schema(path).names if name not in EXTRA_COLUMNS]
+    columns = list(columns) + ([ENTITY_KEY_COLUMN] if filters else [])
+    table = pq.read_table(path, columns=columns, filters=filters, memory_map=True)
+    if ENTITY_KEY_COLUMN in table.column_names:
+        table = table.drop([ENTITY_KEY_COLUMN])
+    return table
+
+
+# Function to load a section as a DataFrame, through the mirror when possible
+def load_dataframe(file_path, ids=None, columns=None):
+    table = read_table(file_path, ids, columns)
+    if table is not None:
+        df = table.to_pandas()
+        for field in table.schema:
+            if field.metadata == JSON_FIELD_METADATA:
+                df[field.name] = df[field.name].map(json.loads, na_action="ignore")
+        return df
+
+    records = json_stream.iter_records(file_path)
+    if ids is not None:
+        records = entities.select_rows(records, ids)
+    df = pd.DataFrame.from_records(records)
+    return df[list(columns)] if columns is not None else df
+
+
+# Function to stream section rows, through the mirror when possible
+def iter_rows(file_path, ids=None):
+    """
+    :param ids: Optional set of entity keys to keep (whole multi-row entities are kept)
+    :return: Iterator of row dictionaries, in file order, exactly as stored in the JSON
+    """
+    table = read_table(file_path, ids, columns=[ROW_COLUMN])
+    if table is None:
+        records = json_stream.iter_records(file_path)
+        return entities.select_rows(records, ids) if ids is not None else records
+    return (json.loads(row) for batch in table.column(ROW_COLUMN).chunks for row in batch.to_pylist())
+
+
+# Function to drop the least recently used mirrors once the directory grows past max_bytes
+def evict(mirror_dir=MIRROR_DIR, max_bytes=DEFAULT_MAX_BYTES):
+    entries = []
+    for name in os.listdir(mirror_dir):
+        if name.endswith(".parquet"):
+            stat = os.stat(os.path.join(mirror_dir, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(os.path.join(mirror_dir, name))
+        total -= size
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build Parquet mirrors of section JSON files.")
+    parser.add_argument("files", nargs="+", help="Section JSON files")
+    args = parser.parse_args()
+
+    if not available():
+        raise SystemExit("❌ pyarrow is not installed")
+    for section_file in args.files:
+        print(f"✅ {section_file} → {ensure_mirror(section_file)}")
@@ -0,0 +1,270 @@
+import os
+import re
+import ssl
+import json
+import time
+import asyncio
+import http.client
+import urllib.parse
+
+API_VERSION = os.getenv("SHOPIFY_API_VERSION", "2024-10")
+
+# Connections kept open per client; also the number of requests in flight at once
+MAX_CONNECTIONS = int(os.getenv("SHOPIFY_MAX_CONNECTIONS", "4"))
+
+# Cost assumed for a query until Shopify has reported its real cost once
+DEFAULT_QUERY_COST = 10
+
+# Retries for throttled, 429 and 5xx responses and dropped connections
+MAX_RETRIES = 5
+RETRY_BACKOFF = 1.0
+
+REQUEST_TIMEOUT = 60
+
+
+class GraphQLError(Exception):
+    """Top-level `errors` of a GraphQL response."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(str(error.get("message", error)) for error in errors))
+
+
+class ThrottleState:
+    """
+    Client-side copy of Shopify's cost bucket (`extensions.cost.throttleStatus`). Points
+    restore continuously; a request only starts when the bucket can cover its estimated cost.
+    """
+
+    def __init__(self, maximum=1000.0, restore_rate=50.0):
+        self.maximum = maximum
+        self.restore_rate = restore_rate
+        self.available = maximum
+        self.in_flight = 0.0  # Points reserved by requests Shopify has not answered yet
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _restore(self):
+        now = time.monotonic()
+        self.available = min(self.maximum, self.available + (now - self.updated) * self.restore_rate)
+        self.updated = now
+
+    async def reserve(self, cost):
+        """Wait until `cost` points are available and take them; returns the points reserved."""
+        cost = min(cost, self.maximum)
+        async with self.lock:
+            while True:
+                self._restore()
+                if self.available >= cost:
+                    self.available -= cost
+                    self.in_flight += cost
+                    return cost
+                await asyncio.sleep((cost - self.available) / self.restore_rate)
+
+    def finish(self, reserved, throttle_status=None):
+        """
+        Settle a reservation. With a reported `throttleStatus` the bucket adopts Shopify's state,
+        minus what other in-flight requests still hold; without one the points are returned.
+        """
+        self.in_flight -= reserved
+        if throttle_status is None:
+            self._restore()
+            self.available = min(self.maximum, self.available + reserved)
+            return
+        self.maximum = float(throttle_status["maximumAvailable"])
+        self.restore_rate = float(throttle_status["restoreRate"])
+        self.available = float(throttle_status["currentlyAvailable"]) - self.in_flight
+        self.updated = time.monotonic()
+
+
+class ShopifyGraphQLClient:
+    """
+    Async Admin GraphQL client with a pool of keep-alive connections. Requests are bounded
+    by the pool size and paced by Shopify's cost-based throttle.
+
+    Use as `async with ShopifyGraphQLClient(store, token) as client: ...`.
+    """
+
+    def __init__(self, store=None, access_token=None, api_version=API_VERSION, endpoint=None,
+                 max_connections=MAX_CONNECTIONS):
+        """
+        :param store: Shop domain (e.g. "mb-stg.myshopify.com")
+        :param endpoint: Full GraphQL URL, e.g. a local mock server (default: the store's Admin API)
+        """
+        self.endpoint = endpoint or f"https://{store}/admin/api/{api_version}/graphql.json"
+        url = urllib.parse.urlsplit(self.endpoint)
+        self._scheme = url.scheme
+        self._host = url.hostname
+        self._port = url.port
+        self._path = url.path or "/"
+        self._headers = {"Content-Type": "application/json", "Accept": "application/json", "Connection": "keep-alive"}
+        if access_token:
+            self._headers["X-Shopify-Access-Token"] = access_token
+
+        self.max_connections = max_connections
+        self.throttle = ThrottleState()
+        self._pool = None
+        self._ssl_context = ssl.create_default_context() if self._scheme == "https" else None
+        self._query_costs = {}  # query -> last requested cost reported by Shopify
+        self.requests = 0
+        self.throttled = 0
+
+    async def __aenter__(self):
+        self._pool = asyncio.Queue()
+        for _ in range(self.max_connections):
+            self._pool.put_nowait(self._connect())
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+        return False
+
+    def _connect(self):
+        if self._scheme == "https":
+            return http.client.HTTPSConnection(self._host, self._port, timeout=REQUEST_TIMEOUT, context=self._ssl_context)
+        return http.client.HTTPConnection(self._host, self._port, timeout=REQUEST_TIMEOUT)
+
+    async def close(self):
+        if self._pool is None:
+            return
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+        self._pool = None
+
+    # Blocking round trip on one pooled connection (run in a worker thread)
+    def _post(self, connection, body):
+        connection.request("POST", self._path, body=body, headers=self._headers)
+        response = connection.getresponse()
+        payload = response.read()
+        if response.getheader("Connection", "").lower() == "close":
+            connection.close()
+        return response.status, response.getheader("Retry-After"), payload
+
+    async def _send(self, body, cost):
+        """:return: (points reserved, HTTP status, Retry-After header, response body)"""
+        connection = await self._pool.get()
+        reserved = 0
+        try:
+            # Reserve only once a connection is free, so waiting requests use the latest bucket state and cost
+            reserved = await self.throttle.reserve(cost())
+            return (reserved,) + await asyncio.to_thread(self._post, connection, body)
+        except (http.client.HTTPException, ConnectionError, OSError):
+            # Drop the broken connection; the pool gets a fresh one
+            self.throttle.finish(reserved)
+            connection.close()
+            connection = self._connect()
+            raise
+        finally:
+            self._pool.put_nowait(connection)
+
+    async def execute(self, query, variables=None, cost=None):
+        """
+        Run one query or mutation.
+
+        :param cost: Estimated query cost (default: the last reported cost of the same query)
+        :return: The `data` of the response
+        :raises GraphQLError: If the response has top-level errors other than throttling
+        """
+        if self._pool is None:
+            raise RuntimeError("ShopifyGraphQLClient must be used with 'async with'")
+        body = json.dumps({"query": query, "variables": variables or {}}).encode("utf-8")
+
+        for attempt in range(MAX_RETRIES + 1):
+            self.requests += 1
+            try:
+                estimate, status, retry_after, payload = await self._send(
+                    body, lambda: cost or self._query_costs.get(query, DEFAULT_QUERY_COST)
+                )
+            except (http.client.HTTPException, ConnectionError, OSError):
+                if attempt == MAX_RETRIES:
+                    raise
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+                continue
+
+            if status == 429 or status >= 500:
+                self.throttle.finish(estimate)
+                if attempt == MAX_RETRIES:
+                    raise GraphQLError([{"message": f"HTTP {status} from {self.endpoint}"}])
+                await asyncio.sleep(float(retry_after) if retry_after else RETRY_BACKOFF * 2 ** attempt)
+                continue
+            if status >= 400:
+                self.throttle.finish(estimate)
+                raise GraphQLError([{"message": f"HTTP {status} from {self.endpoint}: {payload[:200]!r}"}])
+
+            result = json.loads(payload)
+            query_cost = result.get("extensions", {}).get("cost", {})
+            self.throttle.finish(estimate, query_cost.get("throttleStatus"))
+            if "requestedQueryCost" in query_cost:
+                self._query_costs[query] = query_cost["requestedQueryCost"]
+
+            errors = result.get("errors")
+            if errors and any(error.get("extensions", {}).get("code") == "THROTTLED" for error in errors):
+                # The bucket state was just updated, so the next reserve() waits for enough points
+                self.throttled += 1
+                if attempt == MAX_RETRIES:
+                    raise GraphQLError(errors)
+                continue
+            if errors:
+                raise GraphQLError(errors)
+            return result.get("data")
+
+    async def paginate(self, query, connection_path, variables=None, cursor_variable="after"):
+        """
+        Stream the nodes of a paginated connection, one page request at a time.
+
+        :param query: Query declaring `$after: String` and selecting `pageInfo { hasNextPage endCursor }`
+            plus `edges { node { ... } }` or `nodes { ... }` on the connection
+        :param connection_path: Keys from `data` to the connection, e.g. ("metafieldDefinitions",)
+        :return: Async generator of nodes
+        """
+        variables = dict(variables or {})
+        while True:
+            data = await self.execute(query, variables)
+            connection = data
+            for key in connection_path:
+                connection = connection[key]
+            if "nodes" in connection:
+                for node in connection["nodes"]:
+                    yield node
+            else:
+                for edge in connection.get("edges", []):
+                    yield edge["node"]
+
+            page_info = connection.get("pageInfo", {})
+            if not page_info.get("hasNextPage"):
+                return
+            variables[cursor_variable] = page_info["endCursor"]
+
+    async def execute_batched(self, operation, field, variable_types, variables_list, batch_size=10):
+        """
+        Send many calls of the same field in aliased batches (Shopify has no array batching, but
+        one document may hold several aliased fields). Batches run concurrently up to the pool size.
+
+        :param operation: "query" or "mutation"
+        :param field: The field call with its selection, using variables from `variable_types`, e.g.
+            "metafieldDefinitionCreate(definition: $definition) { createdDefinition { id } userErrors { message } }"
+        :param variable_types: Dictionary of variable name -> GraphQL type, e.g. {"definition": "MetafieldDefinitionInput!"}
+        :param variables_list: One variables dictionary per call
+        :return: List of per-call results, in the order of variables_list
+        """
+        def build(items):
+            declarations = []
+            fields = []
+            variables = {}
+            for number, item in enumerate(items):
+                for name, graphql_type in variable_types.items():
+                    declarations.append(f"${name}_{number}: {graphql_type}")
+                    variables[f"{name}_{number}"] = item.get(name)
+                aliased = re.sub(r"\$(\w+)", lambda m: f"${m.group(1)}_{number}" if m.group(1) in variable_types else m.group(0), field)
+                fields.append(f"call{number}: {aliased}")
+            return f"{operation} Batch({', '.join(declarations)}) {{\n  " + "\n  ".join(fields) + "\n}", variables
+
+        async def run(start):
+            items = variables_list[start:start + batch_size]
+            query, variables = build(items)
+            # Aliases are numbered per batch, so batches of the same size share a document and a cost estimate
+            data = await self.execute(query, variables)
+            return [data[f"call{number}"] for number in range(len(items))]
+
+        batches = await asyncio.gather(*(run(start) for start in range(0, len(variables_list), batch_size)))
+        return [result for batch in batches for result in batch]
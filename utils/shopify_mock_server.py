@@ -0,0 +1,212 @@
+import os
+import re
+import json
+import glob
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Cost of one top-level field; aliased batches cost this per field
+FIELD_COST = 10
+
+CREATE_FIELD = re.compile(r"(?:(\w+)\s*:\s*)?(metafieldDefinitionCreate|metaobjectDefinitionCreate)\s*\(\s*definition:\s*\$(\w+)")
+CONNECTION_FIELD = re.compile(r"\b(metafieldDefinitions|metaobjectDefinitions)\s*\(")
+# First field of a bulk query, e.g. "pages" in "{ pages { edges ... } }"
+BULK_ROOT_FIELD = re.compile(r"^\s*\{\s*(\w+)")
+
+
+class MockShop:
+    """In-memory definitions plus a Shopify-style cost bucket."""
+
+    def __init__(self, maximum=1000, restore_rate=50, page_size=50, bulk_results=None, bulk_polls=1,
+                 rate_limited=0, retry_after=2.0):
+        """
+        :param bulk_results: Dictionary of bulk query root field (e.g. "pages") -> canned JSONL text
+        :param bulk_polls: Status checks a bulk operation stays RUNNING for
+        :param rate_limited: Number of first requests answered with HTTP 429
+        :param retry_after: Retry-After seconds sent with a 429
+        """
+        self.maximum = maximum
+        self.restore_rate = restore_rate
+        self.page_size = page_size
+        self.available = float(maximum)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.metafield_definitions = []
+        self.metaobject_definitions = []
+        self.bulk_results = bulk_results or {}
+        self.bulk_polls = bulk_polls
+        self.bulk_operations = {}  # id -> {"root": field, "polls": status checks so far}
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+        self.requests = 0
+        self.throttled = 0
+        self.connections = 0
+
+    def limit(self):
+        """:return: True when this request gets a 429 (it never reaches the cost bucket)"""
+        with self.lock:
+            if self.rate_limited <= 0:
+                return False
+            self.rate_limited -= 1
+            self.requests += 1
+            return True
+
+    def charge(self, cost):
+        """:return: (accepted, throttleStatus)"""
+        with self.lock:
+            now = time.monotonic()
+            self.available = min(self.maximum, self.available + (now - self.updated) * self.restore_rate)
+            self.updated = now
+            accepted = self.available >= cost
+            if accepted:
+                self.available -= cost
+            else:
+                self.throttled += 1
+            self.requests += 1
+            status = {
+                "maximumAvailable": float(self.maximum),
+                "currentlyAvailable": int(self.available),
+                "restoreRate": float(self.restore_rate),
+            }
+            return accepted, status
+
+    def page(self, items, variables):
+        start = int(variables.get("after") or 0)
+        stop = start + self.page_size
+        return {
+            "edges": [{"cursor": str(position + 1), "node": node} for position, node in enumerate(items[start:stop], start)],
+            "pageInfo": {"hasNextPage": stop < len(items), "endCursor": str(min(stop, len(items)))},
+        }
+
+    def create(self, field, definition):
+        with self.lock:
+            if field == "metaobjectDefinitionCreate":
+                node = {"id": f"gid://shopify/MetaobjectDefinition/{len(self.metaobject_definitions) + 1}", "type": definition["type"]}
+                self.metaobject_definitions.append(node)
+                return {"metaobjectDefinition": node, "userErrors": []}
+
+            key = (definition.get("namespace"), definition.get("key"))
+            if any((node["namespace"], node["key"]) == key for node in self.metafield_definitions):
+                return {"createdDefinition": None, "userErrors": [{"field": ["definition", "key"], "message": "Key is in use"}]}
+            node = dict(definition, id=f"gid://shopify/MetafieldDefinition/{len(self.metafield_definitions) + 1}")
+            node["type"] = {"name": definition.get("type"), "category": None}
+            self.metafield_definitions.append(node)
+            return {"createdDefinition": node, "userErrors": []}
+
+    def run_bulk(self, bulk_query):
+        with self.lock:
+            operation_id = f"gid://shopify/BulkOperation/{len(self.bulk_operations) + 1}"
+            root = BULK_ROOT_FIELD.match(bulk_query)
+            self.bulk_operations[operation_id] = {"root": root.group(1) if root else None, "polls": 0}
+        return {"bulkOperation": {"id": operation_id, "status": "CREATED"}, "userErrors": []}
+
+    def bulk_status(self, operation_id, base_url):
+        with self.lock:
+            operation = self.bulk_operations[operation_id]
+            operation["polls"] += 1
+            running = operation["polls"] <= self.bulk_polls
+        result = {"id": operation_id, "status": "RUNNING" if running else "COMPLETED", "errorCode": None, "url": None}
+        if not running and self.bulk_results.get(operation["root"]):
+            result["url"] = f"{base_url}/bulk/{operation_id.rsplit('/', 1)[-1]}.jsonl"
+        return result
+
+    def bulk_result(self, number):
+        operation = self.bulk_operations.get(f"gid://shopify/BulkOperation/{number}")
+        return self.bulk_results.get(operation["root"]) if operation else None
+
+    def resolve(self, query, variables, base_url=""):
+        """:return: Response body dictionary"""
+        creates = CREATE_FIELD.findall(query)
+        connections = CONNECTION_FIELD.findall(query)
+        cost = FIELD_COST * max(len(creates) + len(connections), 1)
+        accepted, status = self.charge(cost)
+        extensions = {"cost": {"requestedQueryCost": cost, "actualQueryCost": cost if accepted else None, "throttleStatus": status}}
+        if not accepted:
+            return {"errors": [{"message": "Throttled", "extensions": {"code": "THROTTLED"}}], "extensions": extensions}
+
+        data = {}
+        if "bulkOperationRunQuery" in query:
+            data["bulkOperationRunQuery"] = self.run_bulk(variables["query"])
+        elif "BulkOperation" in query and "node(" in query:
+            data["node"] = self.bulk_status(variables["id"], base_url)
+        for alias, field, variable in creates:
+            data[alias or field] = self.create(field, variables[variable])
+        for field in connections:
+            items = self.metafield_definitions if field == "metafieldDefinitions" else self.metaobject_definitions
+            data[field] = self.page(items, variables)
+        return {"data": data, "extensions": extensions}
+
+
+class MockGraphQLHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open between requests, like the Admin API
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.shop.connections += 1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if self.server.shop.limit():
+            self.respond(429, "application/json", b'{"errors":"Exceeded 2 calls per second for api client."}',
+                         {"Retry-After": str(self.server.shop.retry_after)})
+            return
+        base_url = f"http://{self.server.server_address[0]}:{self.server.server_address[1]}"
+        response = self.server.shop.resolve(body.get("query", ""), body.get("variables") or {}, base_url)
+        self.respond(200, "application/json", json.dumps(response).encode("utf-8"))
+
+    # Bulk operation results, like the signed download URLs Shopify hands out
+    def do_GET(self):
+        match = re.fullmatch(r"/bulk/(\d+)\.jsonl", self.path)
+        result = self.server.shop.bulk_result(match.group(1)) if match else None
+        if result is None:
+            self.respond(404, "text/plain", b"Not found")
+        else:
+            self.respond(200, "application/jsonl", result.encode("utf-8"))
+
+    def respond(self, status, content_type, payload, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+# Function to start a mock Admin GraphQL server in a background thread
+def start(shop=None, host="127.0.0.1", port=0):
+    """
+    :return: (server, endpoint URL); stop with server.shutdown()
+    """
+    server = ThreadingHTTPServer((host, port), MockGraphQLHandler)
+    server.daemon_threads = True
+    server.shop = shop or MockShop()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/admin/api/graphql.json"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local mock of the Shopify Admin GraphQL API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--maximum", type=int, default=1000, help="Cost bucket size")
+    parser.add_argument("--restore-rate", type=int, default=50, help="Points restored per second")
+    parser.add_argument("--bulk-dir", help="Directory of canned bulk results named <rootField>.jsonl (e.g. pages.jsonl)")
+    args = parser.parse_args()
+
+    bulk_results = {}
+    for path in glob.glob(os.path.join(args.bulk_dir, "*.jsonl")) if args.bulk_dir else []:
+        with open(path, "r", encoding="utf-8") as f:
+            bulk_results[os.path.splitext(os.path.basename(path))[0]] = f.read()
+
+    server, endpoint = start(MockShop(args.maximum, args.restore_rate, bulk_results=bulk_results), port=args.port)
+    print(f"🧪 Mock Shopify GraphQL endpoint: {endpoint}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,87 @@
+import os
+import math
+import pickle
+import tempfile
+import xlsxwriter
+from concurrent.futures import ProcessPoolExecutor
+
+# Rows per pickled chunk handed from a worker to the writer
+ROWS_PER_CHUNK = 1000
+
+# Excel sheet names max length = 31
+MAX_SHEET_NAME = 31
+
+
+# Function to get the sheet name of a JSON file
+def sheet_name_for(json_file):
+    return os.path.splitext(os.path.basename(json_file))[0][:MAX_SHEET_NAME]
+
+
+# Worker: format one sheet and spill its rows to a temporary file in chunks
+def _prepare_rows(json_file, prepare, cache, rows_dir, check=None):
+    df = cache.get_or_build(json_file, prepare) if cache else prepare(json_file)
+    if check is not None:
+        check(json_file, df.columns)
+
+    fd, rows_path = tempfile.mkstemp(suffix=".rows", dir=rows_dir)
+    with os.fdopen(fd, "wb") as f:
+        for start in range(0, len(df), ROWS_PER_CHUNK):
+            chunk = df.iloc[start:start + ROWS_PER_CHUNK]
+            pickle.dump(list(chunk.itertuples(index=False, name=None)), f, pickle.HIGHEST_PROTOCOL)
+    return [str(col) for col in df.columns], rows_path, len(df)
+
+
+# Function to read back the row chunks written by a worker
+def _iter_rows(rows_path):
+    with open(rows_path, "rb") as f:
+        while True:
+            try:
+                yield from pickle.load(f)
+            except EOFError:
+                return
+
+
+# Function to check if a cell should be left empty (missing key in the JSON record)
+def _is_blank(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+# Function to write prepared sheets into a workbook using xlsxwriter's constant_memory mode
+def write_workbook(json_files, output_excel_file, prepare, workers=None, cache=None, check=None):
+    """
+    Prepare sheets in a process pool and stream their rows into the workbook one row at a
+    time, so the writer's memory use does not grow with the total row count.
+
+    :param json_files: Section JSON files, one sheet each (written in this order)
+    :param output_excel_file: Path of the workbook to create
+    :param prepare: Picklable function json_file -> formatted DataFrame
+    :param workers: Number of worker processes (default: all cores)
+    :param cache: Optional SectionCache used by the workers
+    :param check: Optional picklable function (json_file, columns) run on every sheet, cached or not
+    :return: Dictionary of sheet name -> number of rows written
+    """
+    row_counts = {}
+    with tempfile.TemporaryDirectory() as rows_dir, ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_prepare_rows, json_file, prepare, cache, rows_dir, check) for json_file in json_files]
+
+        workbook = xlsxwriter.Workbook(output_excel_file, {"constant_memory": True})
+        header_format = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+        try:
+            # Sheets are written in file order; later sheets keep preparing in the background
+            for json_file, future in zip(json_files, futures):
+                columns, rows_path, row_count = future.result()
+                sheet_name = sheet_name_for(json_file)
+                worksheet = workbook.add_worksheet(sheet_name)
+                worksheet.write_row(0, 0, columns, header_format)
+
+                for row_number, row in enumerate(_iter_rows(rows_path), start=1):
+                    for col_number, value in enumerate(row):
+                        if not _is_blank(value):
+                            worksheet.write(row_number, col_number, value)
+                os.remove(rows_path)
+
+                row_counts[sheet_name] = row_count
+                print(f"✅ Streamed {row_count} rows into sheet {sheet_name}")
+        finally:
+            workbook.close()
+    return row_counts
@@ -0,0 +1,180 @@
+import os
+import re
+import glob
+import random
+import argparse
+
+import entities
+import json_stream
+
+# Fixtures checked into the repo (one JSON file per Matrixify sheet)
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "output_json")
+
+# "Metafield: page.campaign_list [json]" -> "json"
+METAFIELD_COLUMN = re.compile(r"^Metafield: .+ \[(\w+)\]$")
+
+# Share of empty Metafield cells given a value, so typed metafield columns are exercised
+METAFIELD_FILL_RATE = 0.3
+
+# How the changes between the base and head datasets are split
+ADDED_SHARE = 0.15
+REMOVED_SHARE = 0.15
+
+WORDS = (
+    "serum", "retinol", "bonus", "skincare", "night", "creme", "advanced", "formula",
+    "brightening", "hydrating", "travel", "kit", "deluxe", "system", "spray", "gift",
+)
+
+
+# Function to load the fixture sections used as templates
+def load_templates(fixture_dir=FIXTURE_DIR):
+    """
+    :return: Dictionary of section -> list of records (fixtures that do not parse are skipped)
+    """
+    templates = {}
+    for json_file in sorted(glob.glob(os.path.join(fixture_dir, "*.json"))):
+        section = os.path.splitext(os.path.basename(json_file))[0]
+        try:
+            templates[section] = list(json_stream.iter_records(json_file))
+        except ValueError as e:
+            print(f"⚠️ Skipping template {json_file}: {e}")
+    return templates
+
+
+# Function to derive the key of the n-th copy of an entity
+def copy_key(key, copy):
+    if copy == 0 or key is None:
+        return key
+    # Numeric IDs and gids keep their shape: a fixed-width suffix on the trailing number
+    if re.search(r"\d$", key):
+        return f"{key}{copy:04d}"
+    return f"{key}-{copy}"
+
+
+# Function to generate a plausible value for a Metafield column type
+def metafield_value(metafield_type, rng):
+    if metafield_type.endswith("_reference"):
+        resource = metafield_type[:-len("_reference")].title().replace("_", "")
+        return f"gid://shopify/{resource}/{rng.randrange(10 ** 11, 10 ** 12)}"
+    if metafield_type == "json":
+        return f'{{"{rng.choice(WORDS)}": {rng.randrange(100)}}}'
+    if metafield_type == "boolean":
+        return rng.choice(("true", "false"))
+    if metafield_type == "number_integer":
+        return str(rng.randrange(1000))
+    if metafield_type == "number_decimal":
+        return f"{rng.uniform(0, 1000):.2f}"
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+
+
+# Function to clone one template entity under new keys
+def clone_entity(rows, copy, rng):
+    clone = []
+    for row in rows:
+        row = dict(row)
+        for field in entities.KEY_FIELDS:
+            if row.get(field):
+                row[field] = copy_key(row[field], copy)
+        for column, value in row.items():
+            match = METAFIELD_COLUMN.match(column)
+            if match and value == "" and rng.random() < METAFIELD_FILL_RATE:
+                row[column] = metafield_value(match.group(1), rng)
+        clone.append(row)
+    return clone
+
+
+# Function to generate a section at a multiple of its template size
+def generate_section(template_records, scale, rng):
+    """
+    Every template entity (single row or Matrixify multi-row) is repeated `scale` times with
+    new IDs/handles, keeping the template's columns, "Top Row"/"Row #" layout and value shapes.
+
+    :return: List of records
+    """
+    template_entities = list(entities.iter_entities(template_records))
+    records = []
+    for copy in range(scale):
+        for entity in template_entities:
+            records.extend(clone_entity(entity.rows, copy, rng))
+    return records
+
+
+# Function to edit one row value the way a developer would in the workbook
+def edit_rows(rows, rng):
+    rows = [dict(row) for row in rows]
+    row = rng.choice(rows)
+    editable = [
+        column for column, value in row.items()
+        if column not in entities.KEY_FIELDS and column not in (entities.TOP_ROW_FIELD, "Row #", "Command")
+        and isinstance(value, str)
+    ]
+    if editable:
+        column = rng.choice(editable)
+        row[column] = f"{row[column]} {rng.choice(WORDS)}".strip()
+    return rows
+
+
+# Function to derive a head revision of a section with a share of entities changed
+def mutate_section(records, change_rate, rng, template_records=None):
+    """
+    :param change_rate: Share of entities added, modified or removed
+    :param template_records: Template used to create added entities (default: the section itself)
+    :return: List of records of the head revision
+    """
+    section_entities = list(entities.iter_entities(records))
+    changes = int(len(section_entities) * change_rate)
+    added = int(changes * ADDED_SHARE)
+    removed = int(changes * REMOVED_SHARE)
+    modified = changes - added - removed
+
+    positions = rng.sample(range(len(section_entities)), min(removed + modified, len(section_entities)))
+    removed_positions = set(positions[:removed])
+    modified_positions = set(positions[removed:])
+
+    head = []
+    for position, entity in enumerate(section_entities):
+        if position in removed_positions:
+            continue
+        head.extend(edit_rows(entity.rows, rng) if position in modified_positions else entity.rows)
+
+    # New entities get copy numbers no existing entity uses
+    template_entities = list(entities.iter_entities(template_records or records))
+    for number in range(added):
+        template = template_entities[number % len(template_entities)]
+        head.extend(clone_entity(template.rows, 9000 + number, rng))
+    return head
+
+
+# Function to write a base/head pair of synthetic sections
+def write_dataset(output_dir, scale, change_rate=0.05, seed=0, templates=None):
+    """
+    Write <output_dir>/base/<Section>.json and <output_dir>/head/<Section>.json.
+
+    :return: Dictionary of section -> (base rows, head rows)
+    """
+    rng = random.Random(seed)
+    templates = load_templates() if templates is None else templates
+    sizes = {}
+    for revision in ("base", "head"):
+        os.makedirs(os.path.join(output_dir, revision), exist_ok=True)
+    for section, template_records in templates.items():
+        base = generate_section(template_records, scale, rng)
+        head = mutate_section(base, change_rate, rng, template_records)
+        for revision, records in (("base", base), ("head", head)):
+            json_stream.write_records(os.path.join(output_dir, revision, f"{section}.json"), records)
+        sizes[section] = (len(base), len(head))
+    return sizes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic Matrixify sections from the output_json fixtures.")
+    parser.add_argument("output_dir", help="Directory for the base/ and head/ section files")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="Directory of section JSON templates")
+    parser.add_argument("--scale", type=int, default=10, help="Copies of every template entity")
+    parser.add_argument("--change-rate", type=float, default=0.05, help="Share of entities changed in head/")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = write_dataset(args.output_dir, args.scale, args.change_rate, args.seed, load_templates(args.fixtures))
+    for section, (base_rows, head_rows) in sizes.items():
+        print(f"✅ {section}: {base_rows} base rows, {head_rows} head rows")
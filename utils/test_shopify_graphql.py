@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import shopify_graphql
+import shopify_mock_server
+from shopify_graphql import ShopifyGraphQLClient
+
+DEFINITIONS_QUERY = """
+query Definitions($after: String) {
+  metafieldDefinitions(first: 50, ownerType: PAGE, after: $after) {
+    pageInfo { hasNextPage endCursor }
+    edges { node { id namespace key } }
+  }
+}
+"""
+
+
+class ShopifyGraphQLClientTest(unittest.IsolatedAsyncioTestCase):
+    """ShopifyGraphQLClient against the local mock Admin API (shopify_mock_server.py)."""
+
+    def start(self, shop):
+        server, endpoint = shopify_mock_server.start(shop)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return endpoint
+
+    async def test_paginate_follows_cursors(self):
+        shop = shopify_mock_server.MockShop(page_size=50)
+        for number in range(120):
+            shop.create("metafieldDefinitionCreate", {"namespace": "custom", "key": f"field_{number}", "type": "single_line_text_field"})
+        async with ShopifyGraphQLClient(endpoint=self.start(shop)) as client:
+            nodes = [node async for node in client.paginate(DEFINITIONS_QUERY, ("metafieldDefinitions",))]
+
+        self.assertEqual([node["key"] for node in nodes], [f"field_{number}" for number in range(120)])
+        self.assertEqual(shop.requests, 3)
+
+    async def test_throttled_request_is_retried(self):
+        # The client starts from a full local bucket, so concurrent requests overdraw the mock's small one
+        shop = shopify_mock_server.MockShop(maximum=10, restore_rate=200)
+        async with ShopifyGraphQLClient(endpoint=self.start(shop), max_connections=2) as client:
+            results = await asyncio.gather(*(client.execute(DEFINITIONS_QUERY) for _ in range(2)))
+
+        self.assertEqual([result["metafieldDefinitions"]["edges"] for result in results], [[], []])
+        self.assertGreaterEqual(shop.throttled, 1)
+        self.assertEqual(client.throttled, shop.throttled)
+
+    async def test_rate_limited_request_is_retried(self):
+        shop = shopify_mock_server.MockShop(rate_limited=2, retry_after=0.01)
+        async with ShopifyGraphQLClient(endpoint=self.start(shop)) as client:
+            result = await client.execute(DEFINITIONS_QUERY)
+
+        self.assertEqual(result["metafieldDefinitions"]["edges"], [])
+        self.assertEqual(shop.requests, 3)
+        self.assertEqual(client.requests, 3)
+
+    async def test_error_before_reservation_keeps_the_pool(self):
+        shop = shopify_mock_server.MockShop()
+        async with ShopifyGraphQLClient(endpoint=self.start(shop), max_connections=1) as client:
+            reserve = client.throttle.reserve
+            failures = [OSError("Connection reset")]
+
+            async def flaky_reserve(cost):
+                if failures:
+                    raise failures.pop()
+                return await reserve(cost)
+
+            with mock.patch.object(client.throttle, "reserve", flaky_reserve), \
+                    mock.patch.object(shopify_graphql, "RETRY_BACKOFF", 0):
+                result = await client.execute(DEFINITIONS_QUERY)
+
+            self.assertEqual(result["metafieldDefinitions"]["edges"], [])
+            self.assertEqual(client._pool.qsize(), 1)
+            self.assertEqual(client.throttle.in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,284 @@
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import argparse
+import subprocess
+
+import json_diff
+import git_objects
+import json_stream
+import record_store
+import change_state
+import instrumentation
+
+# Seconds between scans when inotify is not available (e.g. macOS)
+POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", "0.2"))
+# Seconds to wait for more events after the first one, so an editor's save (write + rename) is handled once
+DEBOUNCE = float(os.getenv("WATCH_DEBOUNCE", "0.02"))
+# Re-index a section's base once its record_store schema holds this many times the values it started with
+# (every saved revision adds its new values to the schema the base shares)
+SCHEMA_GROWTH = float(os.getenv("WATCH_SCHEMA_GROWTH", "2"))
+
+# inotify event masks (<sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+
+class InotifyWatcher:
+    """Changed files of a few directories (not recursive), through Linux inotify."""
+
+    def __init__(self, directories):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}  # watch descriptor -> directory
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self.directories[wd] = directory
+
+    def _read(self, paths):
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return
+        pos = 0
+        while pos < len(data):
+            wd, _, _, length = EVENT_HEADER.unpack_from(data, pos)
+            pos += EVENT_HEADER.size
+            name = data[pos:pos + length].rstrip(b"\0")
+            pos += length
+            if wd in self.directories and name:
+                paths.add(os.path.join(self.directories[wd], os.fsdecode(name)))
+
+    def changes(self, timeout=None):
+        """
+        :return: Set of changed paths (empty when nothing changed within the timeout)
+        """
+        paths = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        while ready:
+            self._read(paths)
+            ready, _, _ = select.select([self.fd], [], [], DEBOUNCE)
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Changed files of a few directories (not recursive), by comparing mtime and size."""
+
+    def __init__(self, directories, interval=POLL_INTERVAL):
+        self.directories = list(directories)
+        self.interval = interval
+        self.signatures = self._scan()
+
+    def _scan(self):
+        signatures = {}
+        for directory in self.directories:
+            for entry in os.scandir(directory):
+                if entry.is_file():
+                    stat = entry.stat()
+                    signatures[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return signatures
+
+    def changes(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            signatures = self._scan()
+            paths = {path for path in set(signatures) | set(self.signatures)
+                     if signatures.get(path) != self.signatures.get(path)}
+            self.signatures = signatures
+            if paths or (deadline is not None and time.monotonic() >= deadline):
+                return paths
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+# Function to watch directories with inotify, or by polling where it is not available
+def open_watcher(directories):
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError) as e:
+            print(f"⚠️ inotify is not available ({e}), polling every {POLL_INTERVAL}s")
+    return PollingWatcher(directories)
+
+
+class ChangeTracker:
+    """
+    In-memory diff of the working tree against a base revision (the git index by default).
+    Base sections are indexed once and re-read only when their blob changes; a saved section is
+    re-parsed and diffed alone, then changed_ids.txt and its change-only JSON file are rewritten.
+    """
+
+    def __init__(self, repo_dir, output_dir, changed_ids_file, sections=None, base_rev=json_diff.INDEX):
+        self.repo_dir = repo_dir
+        self.output_dir = output_dir
+        self.changed_ids_file = changed_ids_file
+        self.sections = sections
+        self.base_rev = base_rev
+        self.base_signatures = {}
+        self.base_indexes = {}  # section -> key -> rows at the base revision
+        self.base_values = {}  # section -> distinct values in the base's record_store schema when it was indexed
+        self.changed_ids = {}  # section -> sorted changed keys
+
+    def section_file(self, section):
+        return os.path.join(self.repo_dir, f"{section}.json")
+
+    def watched(self, section):
+        return self.sections is None or section in self.sections
+
+    def index_base(self, section, blob_id):
+        """Index a base revision with a new record_store schema, dropping the values of earlier revisions."""
+        record_store.reset(section)
+        # Read by blob ID: the long-lived cat-file process keeps the index it started with
+        stream = git_objects.default_reader().open_text(blob_id) if blob_id is not None else None
+        records = json_stream.iter_section_stream(stream) if stream is not None else ()
+        index = json_diff.index_records(records, section)
+        self.base_indexes[section] = index
+        if isinstance(index, record_store.StoreIndex):
+            self.base_values[section] = index.schema.value_count()
+
+    def compact(self, section):
+        """Re-index the base of a section whose schema has grown too much since it was indexed."""
+        index = self.base_indexes.get(section)
+        if not isinstance(index, record_store.StoreIndex) or section not in self.base_signatures:
+            return
+        if index.schema.value_count() > max(self.base_values.get(section, 0), 1) * SCHEMA_GROWTH:
+            self.index_base(section, self.base_signatures[section])
+
+    def refresh_base(self):
+        """
+        :return: Sections whose base revision changed (e.g. after `git add`)
+        """
+        signatures = change_state.revision_signatures(self.repo_dir, self.base_rev)
+        stale = {section for section in set(signatures) | set(self.base_signatures)
+                 if self.watched(section) and signatures.get(section) != self.base_signatures.get(section)}
+        for section in sorted(stale):
+            try:
+                self.index_base(section, signatures.get(section))
+            except ValueError as e:
+                # A staged half-written or conflicted section: keep diffing against the previous base
+                print(f"⚠️ {section}: base revision is not valid JSON ({e}), keeping the previous base")
+                stale.discard(section)
+                if section in self.base_signatures:
+                    signatures[section] = self.base_signatures[section]
+                else:
+                    signatures.pop(section, None)
+        self.base_signatures = signatures
+        return stale
+
+    def update(self, section):
+        """
+        Diff the working tree copy of a section against its base and rewrite its outputs.
+
+        :return: SectionDiff, or None when the file could not be parsed (e.g. saved half-way)
+        """
+        file_path = self.section_file(section)
+        try:
+            head_index = json_diff.index_records(json_stream.iter_records(file_path), section)
+        except ValueError as e:
+            print(f"⚠️ {section}: not valid JSON yet ({e}), keeping the previous result")
+            return None
+        section_diff = json_diff.diff_indexes(section, self.base_indexes.get(section, {}), head_index)
+        self.changed_ids[section] = section_diff.changed_ids
+
+        output_file_path = os.path.join(self.output_dir, f"{section}.json")
+        if section_diff.changed_ids:
+            temp_path = f"{output_file_path}.tmp"
+            json_stream.write_records(temp_path, section_diff.changed_rows(), storage_format=json_stream.output_format(output_file_path))
+            os.replace(temp_path, output_file_path)
+        elif os.path.exists(output_file_path):
+            os.remove(output_file_path)
+        instrumentation.count("watch_updates", 1, section)
+        self.compact(section)
+        return section_diff
+
+    def write_changed_ids(self):
+        json_diff.write_id_lists({section: self.changed_ids[section] for section in sorted(self.changed_ids)},
+                                 self.changed_ids_file)
+
+    def handle(self, sections):
+        """
+        :param sections: Sections saved in the working tree (in addition to those whose base changed)
+        """
+        started = time.perf_counter()
+        sections = set(sections) | self.refresh_base()
+        for section in sorted(sections):
+            if not os.path.exists(self.section_file(section)) and section not in self.base_indexes:
+                self.changed_ids.pop(section, None)
+                continue
+            section_diff = self.update(section)
+            if section_diff is not None:
+                print(f"🔍 {section}: {section_diff.summary()}")
+        if sections:
+            self.write_changed_ids()
+            print(f"⚡ Updated {', '.join(sorted(sections))} in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+# Function to get the git directory of a working tree (watched for index updates)
+def git_dir(repo_dir):
+    result = subprocess.run(["git", "rev-parse", "--absolute-git-dir"], cwd=repo_dir, capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+# Function to keep changed_ids.txt and the change-only JSON files current while sections are edited
+def watch(repo_dir, output_dir, changed_ids_file, sections=None):
+    """
+    Runs until interrupted (Ctrl+C).
+
+    :param sections: Optional list of section names to watch (default: every section file)
+    """
+    repo_dir = os.path.normpath(repo_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    tracker = ChangeTracker(repo_dir, output_dir, changed_ids_file, sections)
+    index_file = os.path.join(git_dir(repo_dir), "index")
+    watcher = open_watcher([repo_dir, os.path.dirname(index_file)])
+
+    # Start from a complete result, then re-diff only what is saved
+    initial = {change_state.section_name(path) for path in json_diff.list_section_files(repo_dir)}
+    tracker.handle(section for section in initial if tracker.watched(section))
+    print(f"👀 Watching {repo_dir} ({type(watcher).__name__}), press Ctrl+C to stop")
+    try:
+        while True:
+            paths = watcher.changes()
+            saved = {change_state.section_name(path) for path in paths
+                     if os.path.dirname(path) == repo_dir and path.endswith(".json")}
+            saved = {section for section in saved if tracker.watched(section)}
+            # The index is rewritten by `git add`, `git commit`, `git checkout`, ...
+            if saved or index_file in paths:
+                tracker.handle(saved)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    # Detect if running in GitHub Actions
+    GITHUB_WORKSPACE = os.getenv("GITHUB_WORKSPACE", os.getcwd())
+
+    parser = argparse.ArgumentParser(description="Keep changed IDs and change-only JSON files current while sections are edited.")
+    parser.add_argument("--repo-dir", default=os.path.join(GITHUB_WORKSPACE, "repo-shopify-data"))
+    parser.add_argument("--output-dir", default=os.path.join(GITHUB_WORKSPACE, "changes/change-only-jsons"))
+    parser.add_argument("--changed-ids", default=os.path.join(GITHUB_WORKSPACE, "changes/id-output/changed_ids.txt"))
+    parser.add_argument("--sections", nargs="+", help="Section names to watch (default: all)")
+    args = parser.parse_args()
+
+    watch(args.repo_dir, args.output_dir, args.changed_ids, args.sections)